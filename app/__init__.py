@@ -3,7 +3,6 @@ Module-level docstring:
 Initializes the Flask application, configures logging, CORS, and registers blueprints.
 """
 import os
-import logging
 
 from flask import Flask
 from flask_cors import CORS
@@ -19,55 +18,101 @@ def create_app() -> Flask:
     """
     app = Flask(__name__)
     CORS(app)
-    
-    # Set up root logger
-    root_logger = logging.getLogger()
-    root_logger.setLevel(logging.INFO)
-    
-    # Clear existing handlers to avoid duplicates
-    for handler in list(root_logger.handlers):
-        root_logger.removeHandler(handler)
-    
-    # Set up app.logger
-    app.logger.setLevel(logging.INFO)
-    for handler in list(app.logger.handlers):
-        app.logger.removeHandler(handler)
-    
-    # Common formatter
-    formatter = logging.Formatter('%(asctime)s %(levelname)s %(message)s')
-    
-    # Add FileHandler if NSEVIZ_LOG_FILE env var is set
-    log_file = os.environ.get('NSEVIZ_LOG_FILE')
-    if log_file:
-        file_handler = logging.FileHandler(log_file, mode='a')
-        file_handler.setFormatter(formatter)
-        file_handler.setLevel(logging.INFO)
-        root_logger.addHandler(file_handler)
-        
-        # Also add to app.logger for Flask internal logs
-        app_file_handler = logging.FileHandler(log_file, mode='a')
-        app_file_handler.setFormatter(formatter)
-        app_file_handler.setLevel(logging.INFO)
-        app.logger.addHandler(app_file_handler)
-    
-    # Add console handler
-    console_handler = logging.StreamHandler()
-    console_handler.setFormatter(formatter)
-    console_handler.setLevel(logging.INFO)
-    root_logger.addHandler(console_handler)
-    
-    # Ensure app.logger also has console handler
-    app_console_handler = logging.StreamHandler()
-    app_console_handler.setFormatter(formatter)
-    app_console_handler.setLevel(logging.INFO)
-    app.logger.addHandler(app_console_handler)
-    
-    # Disable Flask's default handlers
-    app.logger.propagate = False
-    
+
+    # Market-data provider: 'yfinance' (default) or 'file' for offline runs
+    app.config['MARKET_DATA_PROVIDER'] = os.environ.get('NSEVIZ_DATA_PROVIDER', 'yfinance')
+    app.config['MARKET_DATA_FILE'] = os.environ.get('NSEVIZ_DATA_FILE')
+
+    # Chunked downloads: symbols per provider call (0 = one call for the whole universe), chunks in flight.
+    # yfinance chunks always run one at a time; concurrency only applies to thread-safe providers
+    app.config['FETCH_CHUNK_SIZE'] = int(os.environ.get('NSEVIZ_FETCH_CHUNK_SIZE', 0))
+    app.config['FETCH_CONCURRENCY'] = int(os.environ.get('NSEVIZ_FETCH_CONCURRENCY', 1))
+
+    # Upstream (yfinance) client: calls per second and burst, retries with jittered backoff (base seconds),
+    # consecutive failures that open the circuit breaker and seconds before it lets a trial call through
+    app.config['UPSTREAM_RATE'] = float(os.environ.get('NSEVIZ_UPSTREAM_RATE', 2))
+    app.config['UPSTREAM_BURST'] = float(os.environ.get('NSEVIZ_UPSTREAM_BURST', 4))
+    app.config['UPSTREAM_RETRIES'] = int(os.environ.get('NSEVIZ_UPSTREAM_RETRIES', 2))
+    app.config['UPSTREAM_BACKOFF'] = float(os.environ.get('NSEVIZ_UPSTREAM_BACKOFF', 0.5))
+    app.config['UPSTREAM_TIMEOUT'] = float(os.environ.get('NSEVIZ_UPSTREAM_TIMEOUT', 10))
+    app.config['UPSTREAM_BREAKER_THRESHOLD'] = int(os.environ.get('NSEVIZ_UPSTREAM_BREAKER_THRESHOLD', 5))
+    app.config['UPSTREAM_BREAKER_RESET'] = float(os.environ.get('NSEVIZ_UPSTREAM_BREAKER_RESET', 30))
+
+    # Heatmap snapshot cache: entry count (0 disables), fresh seconds, stale-while-revalidate seconds
+    app.config['HEATMAP_CACHE_SIZE'] = int(os.environ.get('NSEVIZ_CACHE_SIZE', 256))
+    app.config['HEATMAP_CACHE_TTL'] = float(os.environ.get('NSEVIZ_CACHE_TTL', 30))
+    app.config['HEATMAP_CACHE_STALE_TTL'] = float(os.environ.get('NSEVIZ_CACHE_STALE_TTL', 300))
+
+    # Browser/proxy Cache-Control max-age (seconds): past sessions, today while trading, today outside hours
+    app.config['HTTP_MAX_AGE_PAST'] = int(os.environ.get('NSEVIZ_HTTP_MAX_AGE_PAST', 31536000))
+    app.config['HTTP_MAX_AGE_LIVE'] = int(os.environ.get('NSEVIZ_HTTP_MAX_AGE_LIVE', 15))
+    app.config['HTTP_MAX_AGE_CLOSED'] = int(os.environ.get('NSEVIZ_HTTP_MAX_AGE_CLOSED', 300))
+
+    # Server-Sent Events tile stream: open-stream limit (each open stream holds a server thread) and
+    # keepalive interval (seconds)
+    app.config['STREAM_MAX_CLIENTS'] = int(os.environ.get('NSEVIZ_STREAM_MAX_CLIENTS', 100))
+    app.config['STREAM_HEARTBEAT'] = float(os.environ.get('NSEVIZ_STREAM_HEARTBEAT', 15))
+
+    # Snapshot versions kept per view for ?since= delta responses
+    app.config['DELTA_HISTORY_VERSIONS'] = int(os.environ.get('NSEVIZ_DELTA_HISTORY_VERSIONS', 10))
+
+    # Index constituents data file (bundled app/data/constituents.json by default), re-checked for changes
+    app.config['CONSTITUENTS_FILE'] = os.environ.get('NSEVIZ_CONSTITUENTS_FILE')
+    app.config['CONSTITUENTS_RELOAD_INTERVAL'] = float(os.environ.get('NSEVIZ_CONSTITUENTS_RELOAD_INTERVAL', 5))
+
+    # Local OHLCV history store for past dates (disabled unless a directory is given)
+    app.config['HISTORY_DIR'] = os.environ.get('NSEVIZ_HISTORY_DIR')
+    # Years of daily bars synced for a symbol's first stock-detail chart request
+    app.config['HISTORY_BACKFILL_YEARS'] = float(os.environ.get('NSEVIZ_HISTORY_BACKFILL_YEARS', 10))
+
+    # Shared-memory quote board for multi-worker deployments (disabled unless a file is given, e.g. under /dev/shm):
+    # one process running the prefetch scheduler writes it, every worker reads today's quotes from it
+    app.config['SHARED_QUOTES_FILE'] = os.environ.get('NSEVIZ_SHARED_QUOTES_FILE')
+    app.config['SHARED_QUOTES_CAPACITY'] = int(os.environ.get('NSEVIZ_SHARED_QUOTES_CAPACITY', 4096))
+
+    # Background prefetch of the universe during market hours (off by default)
+    app.config['PREFETCH_ENABLED'] = os.environ.get('NSEVIZ_PREFETCH', '').lower() in ('1', 'true', 'yes')
+    app.config['PREFETCH_INTERVAL'] = float(os.environ.get('NSEVIZ_PREFETCH_INTERVAL', 60))
+
+    # Pre-fork warm-up: load heavy modules, constituents and the latest snapshot in create_app()
+    # so workers forked from a preloading master (gunicorn --preload) share them and serve at once
+    app.config['WARMUP'] = os.environ.get('NSEVIZ_WARMUP', '').lower() in ('1', 'true', 'yes')
+
+    # On-demand profiling of requests sent with the X-Profile header (disabled unless a directory is given)
+    app.config['PROFILE_DIR'] = os.environ.get('NSEVIZ_PROFILE_DIR')
+    app.config['PROFILE_TOKEN'] = os.environ.get('NSEVIZ_PROFILE_TOKEN')
+
+    # Logging: records are written by a background listener (see logging_config.py)
+    app.config['LOG_FILE'] = os.environ.get('NSEVIZ_LOG_FILE')
+    app.config['LOG_SAMPLE_RATE'] = float(os.environ.get('NSEVIZ_LOG_SAMPLE_RATE', 1.0))
+    from .logging_config import configure_logging
+    configure_logging(app)
+
     # Import and register blueprints
-    from .routes import api_bp
+    from .routes import api_bp, get_universe
     app.register_blueprint(api_bp)
+    from .profiling import init_profiling
+    init_profiling(app)
+
+    # Start the prefetch scheduler so requests read published snapshots instead of downloading
+    if app.config['PREFETCH_ENABLED']:
+        from .movers import get_movers_tracker
+        from .scheduler import start_prefetch
+        # Movers tables are rebuilt as each snapshot is published
+        get_movers_tracker(app, lambda: get_universe(app))
+        if app.config['WARMUP']:
+            # Threads do not survive a fork: each worker starts its own scheduler on its first request
+            from .scheduler import ensure_prefetch
+
+            @app.before_request
+            def start_worker_prefetch() -> None:
+                ensure_prefetch(app, lambda: get_universe(app))
+        else:
+            start_prefetch(app, lambda: get_universe(app))
+
+    if app.config['WARMUP']:
+        from .warmup import warm_up
+        warm_up(app)
 
     # App-level error handler for 500 errors: returns JSON for /api/*
     @app.errorhandler(500)
@@ -0,0 +1,160 @@
+"""
+Module-level docstring:
+In-process snapshot cache for API responses.
+Entries are bounded by LRU eviction and expire after a per-entry TTL. Expired
+entries stay servable for a stale window: a stale hit returns the old value
+immediately and refreshes it on a background thread (stale-while-revalidate).
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+# Sentinel meaning "use the cache's default TTL" (None already means "never expires")
+DEFAULT_TTL: Any = object()
+
+
+class _Entry:
+    """A cached value with its freshness deadlines (None means it never expires)."""
+    __slots__ = ("value", "fresh_until", "stale_until")
+
+    def __init__(self, value: Any, fresh_until: Optional[float], stale_until: Optional[float]) -> None:
+        self.value = value
+        self.fresh_until = fresh_until
+        self.stale_until = stale_until
+
+
+class SnapshotCache:
+    """
+    Thread-safe TTL/LRU cache with stale-while-revalidate.
+    Args:
+        max_entries (int): Maximum number of entries; 0 disables caching.
+        ttl (float): Default seconds an entry stays fresh.
+        stale_ttl (float): Seconds after expiry during which the stale value is still served.
+    """
+
+    def __init__(self, max_entries: int = 256, ttl: float = 30.0, stale_ttl: float = 300.0) -> None:
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._refreshing: set = set()
+        self._lock = threading.Lock()
+        self._stats: Dict[str, int] = {
+            "hits": 0, "stale_hits": 0, "misses": 0, "evictions": 0, "refreshes": 0, "refresh_errors": 0,
+        }
+
+    def get(self, key: Hashable, loader: Callable[[], Any], ttl: Any = DEFAULT_TTL) -> Any:
+        """
+        Returns the cached value for key, loading it on a miss.
+        Args:
+            key (hashable): Normalized cache key.
+            loader (callable): Computes the value; exceptions propagate and nothing is cached.
+            ttl (float or None): Freshness for a newly loaded value. None caches it
+                indefinitely (subject to LRU eviction); the default uses self.ttl.
+        Returns:
+            Any: The cached or freshly loaded value.
+        """
+        if self.max_entries <= 0:
+            return loader()
+        if ttl is DEFAULT_TTL:
+            ttl = self.ttl
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry.fresh_until is None or now < entry.fresh_until:
+                    self._entries.move_to_end(key)
+                    self._stats["hits"] += 1
+                    return entry.value
+                if entry.stale_until is not None and now < entry.stale_until:
+                    self._entries.move_to_end(key)
+                    self._stats["stale_hits"] += 1
+                    if key not in self._refreshing:
+                        self._refreshing.add(key)
+                        threading.Thread(
+                            target=self._refresh, args=(key, loader, ttl), daemon=True,
+                            name="snapshot-cache-refresh",
+                        ).start()
+                    return entry.value
+            self._stats["misses"] += 1
+        value = loader()
+        self.put(key, value, ttl)
+        return value
+
+    def put(self, key: Hashable, value: Any, ttl: Any = DEFAULT_TTL) -> None:
+        """
+        Stores a value, evicting least recently used entries beyond max_entries.
+        Args:
+            key (hashable): Normalized cache key.
+            value (Any): Value to cache.
+            ttl (float or None): Seconds the value stays fresh; None never expires.
+        """
+        if self.max_entries <= 0:
+            return
+        if ttl is DEFAULT_TTL:
+            ttl = self.ttl
+        now = time.monotonic()
+        if ttl is None:
+            entry = _Entry(value, None, None)
+        else:
+            entry = _Entry(value, now + ttl, now + ttl + self.stale_ttl)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def _refresh(self, key: Hashable, loader: Callable[[], Any], ttl: Optional[float]) -> None:
+        """Reloads a stale entry in the background; on failure the stale value is kept."""
+        try:
+            value = loader()
+        except Exception as e:
+            logging.getLogger().error(f"Background refresh failed for {key}: {e}")
+            with self._lock:
+                self._stats["refresh_errors"] += 1
+        else:
+            self.put(key, value, ttl)
+            with self._lock:
+                self._stats["refreshes"] += 1
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def clear(self) -> None:
+        """Removes all entries; statistics are kept."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Returns hit/miss counters and the current size for monitoring.
+        Returns:
+            dict: Counter name to value.
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["size"] = len(self._entries)
+            stats["max_entries"] = self.max_entries
+        return stats
+
+
+def get_cache(app: Any) -> SnapshotCache:
+    """
+    Returns the app's heatmap snapshot cache, creating it from config on first use.
+    Args:
+        app (Flask): The Flask application.
+    Returns:
+        SnapshotCache: The cache for this app.
+    """
+    cache = app.extensions.get("heatmap_cache")
+    if cache is None:
+        cache = SnapshotCache(
+            max_entries=int(app.config.get("HEATMAP_CACHE_SIZE", 256)),
+            ttl=float(app.config.get("HEATMAP_CACHE_TTL", 30.0)),
+            stale_ttl=float(app.config.get("HEATMAP_CACHE_STALE_TTL", 300.0)),
+        )
+        app.extensions["heatmap_cache"] = cache
+    return cache
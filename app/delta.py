@@ -0,0 +1,86 @@
+"""
+Module-level docstring:
+Delta heatmap responses keyed by snapshot version.
+Full responses built from a prefetched snapshot record each view's tiles under
+the snapshot version. A client polling with since=<version> then receives only
+the tiles whose price, change or volume differ from that version, plus the
+symbols that left the view. If the version is no longer retained, the client
+gets a full response instead.
+"""
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+Quote = Tuple[Any, Any, Any]
+
+
+def _quotes(tiles: List[Dict[str, Any]]) -> Dict[str, Quote]:
+    return {tile["symbol"]: (tile["price"], tile["change"], tile["volume"]) for tile in tiles}
+
+
+class ViewHistory:
+    """
+    Recent tile quotes per view, for the last `max_versions` snapshot versions of each.
+    Args:
+        max_versions (int): Versions kept per view; older clients get full responses.
+        max_views (int): Views tracked; the least recently recorded view is dropped first.
+    """
+
+    def __init__(self, max_versions: int = 10, max_views: int = 256) -> None:
+        self.max_versions = max_versions
+        self.max_views = max_views
+        self._views: "OrderedDict[Hashable, OrderedDict[int, Dict[str, Quote]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def record(self, view: Hashable, version: int, tiles: List[Dict[str, Any]]) -> None:
+        """Stores the quotes a view had at a snapshot version."""
+        quotes = _quotes(tiles)
+        with self._lock:
+            versions = self._views.get(view)
+            if versions is None:
+                versions = self._views[view] = OrderedDict()
+            self._views.move_to_end(view)
+            versions[version] = quotes
+            while len(versions) > self.max_versions:
+                versions.popitem(last=False)
+            while len(self._views) > self.max_views:
+                self._views.popitem(last=False)
+
+    def get(self, view: Hashable, version: int) -> Optional[Dict[str, Quote]]:
+        with self._lock:
+            versions = self._views.get(view)
+            return None if versions is None else versions.get(version)
+
+
+def delta_payload(full: Dict[str, Any], previous: Dict[str, Quote], since: str) -> Dict[str, Any]:
+    """
+    Turns a full heatmap payload into the changes since an earlier version.
+    Args:
+        full (dict): Full payload for the current version (with "version").
+        previous (dict): Symbol to (price, change, volume) at version `since`.
+        since (str): The client's version token.
+    Returns:
+        dict: Payload with only changed tiles in "data", plus "removed" and full=False.
+    """
+    tiles = full["data"]
+    current = _quotes(tiles)
+    changed = [tile for tile in tiles if previous.get(tile["symbol"]) != current[tile["symbol"]]]
+    payload = dict(full, data=changed, full=False, since=since,
+                   removed=[symbol for symbol in previous if symbol not in current])
+    payload["note"] = f"Changes since version {since}: {len(changed)} updated, {len(payload['removed'])} removed"
+    return payload
+
+
+def get_view_history(app: Any) -> ViewHistory:
+    """
+    Returns the app's view history, creating it on first use.
+    Args:
+        app (Flask): The Flask application.
+    Returns:
+        ViewHistory: History sized by DELTA_HISTORY_VERSIONS.
+    """
+    history = app.extensions.get("view_history")
+    if history is None:
+        history = app.extensions.setdefault(
+            "view_history", ViewHistory(int(app.config.get("DELTA_HISTORY_VERSIONS", 10))))
+    return history
@@ -0,0 +1,158 @@
+"""
+Module-level docstring:
+Asyncio fetch engine for large universes.
+The symbol list is split into chunks: each chunk runs provider.download() on a
+small thread pool, bounded by an asyncio semaphore, and the per-chunk frames are
+merged back into one yfinance-shaped frame, so tiles are computed exactly as for
+a single download. Only providers marked thread_safe download chunks
+concurrently. yfinance is not: yf.download keeps each call's results and errors
+in module globals, so its chunks run one at a time behind a lock (each call
+already fetches its tickers on yfinance's own threads) and share one pooled
+HTTP session. Chunking yfinance bounds the size of each call; it does not
+overlap them.
+
+The engine is used by the request path and the prefetch scheduler through
+download_universe(); async code can await FetchEngine.fetch() directly.
+"""
+from __future__ import annotations
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Tuple
+
+from .lazy import lazy_import
+from .providers import MarketDataProvider, get_provider, split_by_symbol
+from .upstream import make_session
+
+pd = lazy_import("pandas", globals())
+
+
+def chunked(symbols: List[str], size: int) -> List[List[str]]:
+    """Splits symbols into consecutive chunks of at most `size`."""
+    return [symbols[i:i + size] for i in range(0, len(symbols), size)]
+
+
+def merge_chunks(results: List[Tuple[List[str], pd.DataFrame]]) -> pd.DataFrame:
+    """
+    Merges per-chunk provider frames into one frame grouped by ticker.
+    Args:
+        results (list): (chunk symbols, frame) pairs in request order.
+    Returns:
+        DataFrame: (symbol, field) columns, chunk by chunk; empty if no chunk had data.
+    """
+    parts = []
+    for symbols, frame in results:
+        if frame.empty:
+            continue
+        if isinstance(frame.columns, pd.MultiIndex):
+            # Keep whole chunks as blocks; only requested tickers are taken
+            parts.append(frame.loc[:, frame.columns.get_level_values(0).isin(symbols)])
+        else:
+            per_symbol = split_by_symbol(frame, symbols)
+            parts.append(pd.concat(list(per_symbol.values()), axis=1, keys=list(per_symbol.keys())))
+    if not parts:
+        return pd.DataFrame()
+    return pd.concat(parts, axis=1).sort_index()
+
+
+class FetchEngine:
+    """
+    Chunked, concurrency-bounded downloads through a provider.
+    Args:
+        provider (MarketDataProvider): Source of the chunk frames.
+        chunk_size (int): Symbols per provider call.
+        concurrency (int): Chunks in flight at once; 1 for providers that are not thread_safe.
+    """
+
+    def __init__(self, provider: MarketDataProvider, chunk_size: int = 100, concurrency: int = 1) -> None:
+        self.provider = provider
+        self.chunk_size = max(1, chunk_size)
+        self.concurrency = max(1, concurrency)
+        self._executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="fetch-engine")
+        # Serializes downloads for providers that cannot run concurrently
+        self._provider_lock = None if getattr(provider, "thread_safe", False) else threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stats = {"fetches": 0, "chunks": 0, "chunk_errors": 0}
+
+    def _download(self, symbols: List[str], start: str, end: str) -> pd.DataFrame:
+        try:
+            if self._provider_lock is None:
+                return self.provider.download(symbols, start=start, end=end)
+            with self._provider_lock:
+                return self.provider.download(symbols, start=start, end=end)
+        except Exception:
+            with self._stats_lock:
+                self._stats["chunk_errors"] += 1
+            raise
+
+    async def fetch(self, symbols: List[str], start: str, end: str) -> pd.DataFrame:
+        """
+        Downloads all symbols in concurrent chunks and merges the result.
+        Raises:
+            Exception: The first chunk error; a partial universe is never returned.
+        """
+        chunks = chunked(list(symbols), self.chunk_size)
+        with self._stats_lock:
+            self._stats["fetches"] += 1
+            self._stats["chunks"] += len(chunks)
+        loop = asyncio.get_running_loop()
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def fetch_chunk(chunk: List[str]) -> pd.DataFrame:
+            async with semaphore:
+                return await loop.run_in_executor(self._executor, self._download, chunk, start, end)
+
+        frames = await asyncio.gather(*(fetch_chunk(chunk) for chunk in chunks))
+        if len(chunks) == 1:
+            return frames[0]
+        return merge_chunks(list(zip(chunks, frames)))
+
+    def fetch_blocking(self, symbols: List[str], start: str, end: str) -> pd.DataFrame:
+        """Runs fetch() to completion from synchronous code (request threads, the scheduler)."""
+        return asyncio.run(self.fetch(symbols, start, end))
+
+    def stats(self) -> Dict[str, int]:
+        with self._stats_lock:
+            return dict(self._stats)
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False)
+
+
+def get_fetch_engine(app: Any) -> FetchEngine:
+    """
+    Returns the app's fetch engine for its current provider, creating it on first use.
+    A yfinance provider without a session is given one pooled session here.
+    Args:
+        app (Flask): The Flask application.
+    Returns:
+        FetchEngine: Engine sized by FETCH_CHUNK_SIZE and FETCH_CONCURRENCY.
+    """
+    provider = get_provider(app)
+    engine = app.extensions.get("fetch_engine")
+    if engine is None or engine.provider is not provider:
+        concurrency = int(app.config.get("FETCH_CONCURRENCY", 1))
+        if hasattr(provider, "session") and provider.session is None:
+            # yf.download fetches a call's tickers on its own threads over this session
+            provider.session = make_session(max(4, concurrency))
+        engine = FetchEngine(provider, int(app.config.get("FETCH_CHUNK_SIZE", 100)), concurrency)
+        app.extensions["fetch_engine"] = engine
+    return engine
+
+
+def download_universe(app: Any, symbols: List[str], start: str, end: str) -> pd.DataFrame:
+    """
+    Downloads symbols through the fetch engine when FETCH_CHUNK_SIZE is set,
+    otherwise with a single provider call.
+    Args:
+        app (Flask): The Flask application.
+        symbols (list): Symbols to download.
+        start (str): First session date (YYYY-MM-DD).
+        end (str): Last session date (YYYY-MM-DD), inclusive.
+    Returns:
+        DataFrame: yfinance-shaped OHLCV frame.
+    """
+    if int(app.config.get("FETCH_CHUNK_SIZE") or 0) <= 0:
+        return get_provider(app).download(symbols, start=start, end=end)
+    return get_fetch_engine(app).fetch_blocking(symbols, start, end)
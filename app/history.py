@@ -0,0 +1,456 @@
+"""
+Module-level docstring:
+On-disk OHLCV history store.
+Each symbol is stored as one NumPy .npy file per column (date, open, high, low,
+close, volume) that is memory-mapped on read. The store records the date range
+it has synced for every symbol and only downloads the missing days, so past
+sessions are served from local disk without network I/O and survive restarts.
+Every write also stores weekly and monthly rollups of the daily bars, so each
+chart timeframe is answered from precomputed bars.
+
+Layout:
+    <root>/<SYMBOL>/meta.json      {"version": n, "start": "YYYY-MM-DD", "through": "YYYY-MM-DD"}
+    <root>/<SYMBOL>/v<n>/<column>.npy           daily bars
+    <root>/<SYMBOL>/v<n>/<level>_<column>.npy   weekly/monthly bars
+A write creates a new version directory and then atomically replaces meta.json,
+so readers never see a half-written symbol. Writers hold an flock on the symbol
+directory, and a sync holds the flocks of the symbols it downloads for, so
+processes sharing the store never write the same version or download the same
+gap twice, while syncs of other symbols go ahead; a reader whose version was
+deleted by a newer write retries once with the new meta.json.
+"""
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import threading
+from contextlib import ExitStack, contextmanager
+from datetime import date as date_cls, datetime, timedelta
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, TypeVar
+
+from .lazy import lazy_import
+from .providers import OHLCV_FIELDS, MarketDataProvider, split_by_symbol
+
+try:
+    import fcntl
+except ImportError:  # not POSIX: writers are only serialized within a process
+    fcntl = None
+
+np = lazy_import("numpy", globals())
+pd = lazy_import("pandas", globals())
+
+T = TypeVar("T")
+
+COLUMNS: List[str] = ["date"] + [field.lower() for field in OHLCV_FIELDS]
+# Bar sizes stored for every symbol; rollup levels are derived from the daily bars
+LEVELS: List[str] = ["daily", "weekly", "monthly"]
+# Chart timeframe -> (bar level, months back from the latest bar, or None for all; latest n bars only)
+TIMEFRAMES: Dict[str, Tuple[str, Optional[int], Optional[int]]] = {
+    "5D": ("daily", None, 5),
+    "1M": ("daily", 1, None),
+    "6M": ("daily", 6, None),
+    "1Y": ("weekly", 12, None),
+    "MAX": ("monthly", None, None),
+}
+
+
+def _iso(day: date_cls) -> str:
+    return day.strftime("%Y-%m-%d")
+
+
+def _to_day(value: Any) -> date_cls:
+    if isinstance(value, date_cls) and not isinstance(value, datetime):
+        return value
+    return datetime.strptime(str(value)[:10], "%Y-%m-%d").date()
+
+
+class HistoryStore:
+    """
+    Per-symbol columnar daily OHLCV store with incremental sync.
+    Args:
+        root (str): Directory holding the store; created if missing.
+    """
+
+    def __init__(self, root: str) -> None:
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        self._lock = threading.Lock()
+        # symbol -> lock serializing this process's threads before they take the symbol's flock
+        self._symbol_locks: Dict[str, threading.Lock] = {}
+        # symbol -> (version, memory-mapped columns)
+        self._mapped: Dict[str, Tuple[int, Dict[str, np.ndarray]]] = {}
+        # (symbol, rollup level) -> (version, memory-mapped columns)
+        self._rollups: Dict[Tuple[str, str], Tuple[int, Dict[str, np.ndarray]]] = {}
+
+    # --- Layout helpers ---
+    def _symbol_dir(self, symbol: str) -> str:
+        if not symbol or symbol.startswith(".") or "/" in symbol or "\\" in symbol:
+            raise ValueError(f"Invalid symbol for history store: {symbol!r}")
+        return os.path.join(self.root, symbol)
+
+    def _read_meta(self, symbol: str) -> Optional[Dict[str, Any]]:
+        path = os.path.join(self._symbol_dir(symbol), "meta.json")
+        try:
+            with open(path, "r") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def _with_meta(self, symbol: str, load: Callable[[Dict[str, Any]], T]) -> Optional[T]:
+        """
+        Calls load(meta) for the symbol's stored version, or returns None if not stored.
+        A write deletes the previous version directory, so a load that fails with
+        FileNotFoundError is retried once if meta.json has moved on.
+        """
+        meta = self._read_meta(symbol)
+        if meta is None:
+            return None
+        try:
+            return load(meta)
+        except FileNotFoundError:
+            latest = self._read_meta(symbol)
+            if latest is None or latest["version"] == meta["version"]:
+                raise
+            return load(latest)
+
+    @contextmanager
+    def _symbol_lock(self, symbol: str) -> Iterator[str]:
+        """Holds the symbol's write lock across threads and (flock on its directory) processes; yields the directory."""
+        sdir = self._symbol_dir(symbol)
+        os.makedirs(sdir, exist_ok=True)
+        with self._lock:
+            lock = self._symbol_locks.setdefault(symbol, threading.Lock())
+        with lock, _flock(sdir, os.O_RDONLY):
+            yield sdir
+
+    def coverage(self, symbol: str) -> Optional[Tuple[date_cls, date_cls]]:
+        """
+        Returns the (start, through) date range synced for a symbol, or None.
+        """
+        meta = self._read_meta(symbol)
+        if meta is None:
+            return None
+        return _to_day(meta["start"]), _to_day(meta["through"])
+
+    def columns(self, symbol: str) -> Optional[Dict[str, np.ndarray]]:
+        """
+        Returns the symbol's columns as read-only memory-mapped arrays, or None if not stored.
+        """
+        def load(meta: Dict[str, Any]) -> Dict[str, np.ndarray]:
+            cached = self._mapped.get(symbol)
+            if cached is not None and cached[0] == meta["version"]:
+                return cached[1]
+            vdir = os.path.join(self._symbol_dir(symbol), f"v{meta['version']}")
+            mapped = {name: np.load(os.path.join(vdir, f"{name}.npy"), mmap_mode="r") for name in COLUMNS}
+            self._mapped[symbol] = (meta["version"], mapped)
+            return mapped
+
+        return self._with_meta(symbol, load)
+
+    def version(self, symbol: str) -> Optional[int]:
+        """Returns the symbol's stored version (changes on every write), or None if not stored."""
+        meta = self._read_meta(symbol)
+        return None if meta is None else meta["version"]
+
+    def bars(self, symbol: str, level: str = "daily") -> Optional[Dict[str, np.ndarray]]:
+        """
+        Returns the symbol's bars at one level of the rollup pyramid, or None if not stored.
+        Args:
+            symbol (str): Symbol to read.
+            level (str): "daily", "weekly" or "monthly".
+        Returns:
+            dict: Column arrays (see COLUMNS); weekly bars are dated by their Monday and
+            monthly bars by the first of the month.
+        """
+        if level == "daily":
+            return self.columns(symbol)
+        if level not in LEVELS:
+            raise ValueError(f"Unknown bar level: {level!r}")
+
+        def load(meta: Dict[str, Any]) -> Dict[str, np.ndarray]:
+            cached = self._rollups.get((symbol, level))
+            if cached is not None and cached[0] == meta["version"]:
+                return cached[1]
+            vdir = os.path.join(self._symbol_dir(symbol), f"v{meta['version']}")
+            paths = {name: os.path.join(vdir, f"{level}_{name}.npy") for name in COLUMNS}
+            if not os.path.isdir(vdir):
+                raise FileNotFoundError(vdir)
+            if all(os.path.exists(path) for path in paths.values()):
+                bars = {name: np.load(path, mmap_mode="r") for name, path in paths.items()}
+            else:
+                # Written before rollups were stored: derive them once in memory
+                bars = rollup(self.columns(symbol), level)
+            self._rollups[(symbol, level)] = (meta["version"], bars)
+            return bars
+
+        return self._with_meta(symbol, load)
+
+    def read_timeframe(self, symbol: str, timeframe: str) -> List[Dict[str, Any]]:
+        """
+        Returns the precomputed bars of one chart timeframe (see TIMEFRAMES).
+        Args:
+            symbol (str): Symbol to read.
+            timeframe (str): "5D", "1M", "6M", "1Y" or "MAX".
+        Returns:
+            list: {"date", "open", "high", "low", "close", "volume"} dicts, oldest first.
+        """
+        level, months, last = TIMEFRAMES[timeframe]
+        bars = self.bars(symbol, level)
+        if bars is None or not len(bars["date"]):
+            return []
+        dates = bars["date"]
+        lo = 0
+        if months is not None:
+            latest = pd.Timestamp(self.columns(symbol)["date"][-1])
+            since = np.datetime64((latest - pd.DateOffset(months=months)).date(), "D")
+            if level == "weekly":
+                # Keep the week that contains the start date
+                since -= np.timedelta64(int((since.astype(np.int64) + 3) % 7), "D")
+            lo = int(np.searchsorted(dates, since, side="left"))
+        if last is not None:
+            lo = max(lo, len(dates) - last)
+        # Days without a close (holidays, suspensions) are not bars
+        valid = ~np.isnan(np.asarray(bars["close"][lo:]))
+        days = np.asarray(dates[lo:])[valid].astype(str).tolist()
+        fields = {
+            name: [None if np.isnan(v) else v for v in np.asarray(bars[name][lo:])[valid].tolist()]
+            for name in COLUMNS[1:-1]
+        }
+        fields["volume"] = np.nan_to_num(np.asarray(bars["volume"][lo:])[valid]).astype(np.int64).tolist()
+        return [
+            {"date": day, **{name: fields[name][i] for name in COLUMNS[1:]}}
+            for i, day in enumerate(days)
+        ]
+
+    # --- Writes ---
+    def append(self, symbol: str, frame: Optional[pd.DataFrame], start: date_cls, through: date_cls) -> None:
+        """
+        Merges downloaded rows for a symbol and extends its synced range.
+        Rows outside [start, through] are ignored; an empty frame still records
+        that the range was synced (e.g. holidays, or before the symbol listed).
+        Args:
+            symbol (str): Symbol to update.
+            frame (DataFrame): OHLCV frame for the symbol, or None.
+            start (date): First day covered by the download.
+            through (date): Last day covered by the download.
+        """
+        with self._symbol_lock(symbol):
+            self._write(symbol, frame, start, through)
+
+    def _write(self, symbol: str, frame: Optional[pd.DataFrame], start: date_cls, through: date_cls) -> None:
+        """append() for a caller that holds the symbol's lock."""
+        new = _frame_to_columns(frame, start, through)
+        sdir = self._symbol_dir(symbol)
+        # Another process may have written since this one last looked: meta is read under the lock
+        meta = self._read_meta(symbol)
+        old = self.columns(symbol)
+        if old is not None and len(old["date"]):
+            # New rows win where dates overlap
+            keep = ~np.isin(old["date"], new["date"])
+            merged = {name: np.concatenate([np.asarray(old[name])[keep], new[name]]) for name in COLUMNS}
+        else:
+            merged = new
+        order = np.argsort(merged["date"], kind="stable")
+        merged = {name: values[order] for name, values in merged.items()}
+        if meta is not None:
+            start = min(start, _to_day(meta["start"]))
+            through = max(through, _to_day(meta["through"]))
+        version = meta["version"] + 1 if meta is not None else 1
+        vdir = os.path.join(sdir, f"v{version}")
+        os.makedirs(vdir, exist_ok=True)
+        for name, values in merged.items():
+            np.save(os.path.join(vdir, f"{name}.npy"), values)
+        for level in LEVELS[1:]:
+            for name, values in rollup(merged, level).items():
+                np.save(os.path.join(vdir, f"{level}_{name}.npy"), values)
+        meta_path = os.path.join(sdir, "meta.json")
+        with open(meta_path + ".tmp", "w") as f:
+            json.dump({"version": version, "start": _iso(start), "through": _iso(through)}, f)
+        os.replace(meta_path + ".tmp", meta_path)
+        self._mapped.pop(symbol, None)
+        for level in LEVELS[1:]:
+            self._rollups.pop((symbol, level), None)
+        if meta is not None:
+            # Existing memory maps keep working on POSIX; a failed delete is harmless
+            shutil.rmtree(os.path.join(sdir, f"v{meta['version']}"), ignore_errors=True)
+
+    def missing_ranges(self, symbol: str, start: date_cls, through: date_cls) -> List[Tuple[date_cls, date_cls]]:
+        """
+        Returns the date ranges inside [start, through] not yet synced for a symbol.
+        """
+        covered = self.coverage(symbol)
+        if covered is None:
+            return [(start, through)] if start <= through else []
+        gaps = []
+        if start < covered[0]:
+            gaps.append((start, covered[0] - timedelta(days=1)))
+        if through > covered[1]:
+            gaps.append((covered[1] + timedelta(days=1), through))
+        return gaps
+
+    def sync(self, provider: MarketDataProvider, symbols: List[str], start: date_cls, through: date_cls) -> int:
+        """
+        Downloads only the days missing for each symbol, batching symbols that share a gap.
+        Args:
+            provider (MarketDataProvider): Source of OHLCV data.
+            symbols (list): Symbols to sync.
+            start (date): First day that must be covered.
+            through (date): Last day that must be covered.
+        Returns:
+            int: Number of provider downloads made (0 if everything was on disk).
+        """
+        groups: Dict[Tuple[date_cls, date_cls], List[str]] = {}
+        for symbol in symbols:
+            for gap in self.missing_ranges(symbol, start, through):
+                groups.setdefault(gap, []).append(symbol)
+        downloads = 0
+        for (gap_start, gap_end), group in groups.items():
+            # Only this group's symbols are locked during the download, in a fixed order across workers
+            with ExitStack() as locks:
+                for symbol in sorted(group):
+                    locks.enter_context(self._symbol_lock(symbol))
+                # A worker that waited finds the gap already filled
+                pending = [symbol for symbol in group if self.missing_ranges(symbol, gap_start, gap_end)]
+                if not pending:
+                    continue
+                df = provider.download(pending, start=_iso(gap_start), end=_iso(gap_end))
+                downloads += 1
+                frames = split_by_symbol(df, pending)
+                for symbol in pending:
+                    self._write(symbol, frames.get(symbol), gap_start, gap_end)
+        return downloads
+
+    # --- Reads ---
+    def read_range(self, symbol: str, start: date_cls, end: date_cls) -> pd.DataFrame:
+        """
+        Returns the stored daily bars for a symbol within [start, end].
+        Returns:
+            DataFrame: Columns Open/High/Low/Close/Volume indexed by date (empty if none).
+        """
+        columns = self.columns(symbol)
+        if columns is None:
+            return pd.DataFrame(columns=OHLCV_FIELDS)
+        dates = columns["date"]
+        lo = np.searchsorted(dates, np.datetime64(start, "D"), side="left")
+        hi = np.searchsorted(dates, np.datetime64(end, "D"), side="right")
+        data = {field: np.asarray(columns[field.lower()][lo:hi]) for field in OHLCV_FIELDS}
+        return pd.DataFrame(data, index=pd.DatetimeIndex(np.asarray(dates[lo:hi]), name="Date"))
+
+    def read_session(self, symbols: List[str], day: date_cls) -> pd.DataFrame:
+        """
+        Returns one session for many symbols, shaped like yf.download(group_by='ticker').
+        Args:
+            symbols (list): Symbols to read.
+            day (date): Session date.
+        Returns:
+            DataFrame: One row for the date with (symbol, field) columns; empty if no symbol traded.
+        """
+        target = np.datetime64(day, "D")
+        present: List[str] = []
+        row: List[float] = []
+        for symbol in symbols:
+            columns = self.columns(symbol)
+            if columns is None:
+                continue
+            dates = columns["date"]
+            pos = int(np.searchsorted(dates, target))
+            if pos >= len(dates) or dates[pos] != target:
+                continue
+            present.append(symbol)
+            row.extend(float(columns[field.lower()][pos]) for field in OHLCV_FIELDS)
+        if not present:
+            return pd.DataFrame()
+        return pd.DataFrame(
+            [row],
+            index=pd.DatetimeIndex([pd.Timestamp(day)], name="Date"),
+            columns=pd.MultiIndex.from_product([present, OHLCV_FIELDS]),
+        )
+
+
+@contextmanager
+def _flock(path: str, flags: int) -> Iterator[None]:
+    """Holds an exclusive flock on `path` (opened with `flags`), shared by all processes."""
+    if fcntl is None:
+        yield
+        return
+    fd = os.open(path, flags, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        yield
+    finally:
+        os.close(fd)  # releases the lock
+
+
+def rollup(columns: Dict[str, np.ndarray], level: str) -> Dict[str, np.ndarray]:
+    """
+    Aggregates sorted daily bars into weekly or monthly bars in one vectorized pass.
+    Days without a close are skipped. Each bar opens at its first day's open,
+    closes at its last day's close, spans the period's high/low and sums volume.
+    Args:
+        columns (dict): Daily column arrays sorted by date.
+        level (str): "weekly" (Monday-based weeks) or "monthly".
+    Returns:
+        dict: Column arrays dated by the start of each period.
+    """
+    valid = ~np.isnan(np.asarray(columns["close"]))
+    dates = np.asarray(columns["date"])[valid]
+    if level == "weekly":
+        # 1970-01-01 was a Thursday: shift so that weekday 0 is Monday
+        weekday = (dates.astype(np.int64) + 3) % 7
+        periods = dates - weekday.astype("timedelta64[D]")
+    elif level == "monthly":
+        periods = dates.astype("datetime64[M]").astype("datetime64[D]")
+    else:
+        raise ValueError(f"Unknown rollup level: {level!r}")
+    if not len(dates):
+        return {name: np.asarray(columns[name])[valid] for name in COLUMNS}
+    starts = np.flatnonzero(np.r_[True, periods[1:] != periods[:-1]])
+    ends = np.r_[starts[1:], len(dates)] - 1
+    values = {name: np.asarray(columns[name])[valid] for name in COLUMNS[1:]}
+    return {
+        "date": periods[starts],
+        "open": values["open"][starts],
+        "high": np.fmax.reduceat(values["high"], starts),
+        "low": np.fmin.reduceat(values["low"], starts),
+        "close": values["close"][ends],
+        "volume": np.add.reduceat(np.nan_to_num(values["volume"]), starts),
+    }
+
+
+def _frame_to_columns(frame: Optional[pd.DataFrame], start: date_cls, through: date_cls) -> Dict[str, np.ndarray]:
+    """Converts a per-symbol OHLCV frame to sorted column arrays, keeping rows in [start, through]."""
+    if frame is None or frame.empty:
+        return {"date": np.array([], dtype="datetime64[D]"),
+                **{field.lower(): np.array([], dtype=np.float64) for field in OHLCV_FIELDS}}
+    index = pd.DatetimeIndex(frame.index)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    dates = index.values.astype("datetime64[D]")
+    keep = (dates >= np.datetime64(start, "D")) & (dates <= np.datetime64(through, "D"))
+    columns = {"date": dates[keep]}
+    for field in OHLCV_FIELDS:
+        if field in frame.columns:
+            values = pd.to_numeric(frame[field], errors="coerce").to_numpy(dtype=np.float64)
+        else:
+            values = np.full(len(frame), np.nan)
+        columns[field.lower()] = values[keep]
+    return columns
+
+
+def get_history_store(app: Any) -> Optional[HistoryStore]:
+    """
+    Returns the app's history store, or None if HISTORY_DIR is not configured.
+    Args:
+        app (Flask): The Flask application.
+    Returns:
+        HistoryStore: The store for this app, created on first use.
+    """
+    root = app.config.get("HISTORY_DIR")
+    if not root:
+        return None
+    store = app.extensions.get("history_store")
+    if store is None or store.root != root:
+        store = HistoryStore(root)
+        app.extensions["history_store"] = store
+    return store
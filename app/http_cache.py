@@ -0,0 +1,172 @@
+"""
+Module-level docstring:
+HTTP caching for heatmap responses.
+A payload is encoded once, when it enters the response cache: serialized with
+orjson when installed (the app's JSON provider otherwise), compressed with gzip
+and, if their packages are installed, brotli and zstd, and given a
+content-derived ETag and its Last-Modified time. Each request then only picks
+the stored blob matching Accept-Encoding, answers If-None-Match /
+If-Modified-Since with 304 Not Modified, and sets a Cache-Control lifetime that
+depends on the session: past dates never change, live data changes every few
+seconds.
+"""
+import gzip
+import hashlib
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from flask import Response, request
+
+from .wire import MIMETYPES, columnar_payload, encode_msgpack
+
+try:
+    import orjson
+except ImportError:  # optional: faster JSON encoding
+    orjson = None
+try:
+    import brotli
+except ImportError:  # optional: br content encoding
+    brotli = None
+try:
+    import zstandard
+except ImportError:  # optional: zstd content encoding
+    zstandard = None
+
+# Bodies smaller than this are sent uncompressed
+MIN_COMPRESS_SIZE = 512
+
+
+def _compressors() -> List[Tuple[str, str, Callable[[bytes], bytes]]]:
+    """Available (content-coding, ETag suffix, compress) triples, most preferred first."""
+    available = []
+    if brotli is not None:
+        available.append(("br", "br", lambda data: brotli.compress(data, quality=5)))
+    if zstandard is not None:
+        available.append(("zstd", "zst", zstandard.ZstdCompressor(level=3).compress))
+    available.append(("gzip", "gz", lambda data: gzip.compress(data, compresslevel=6, mtime=0)))
+    return available
+
+
+COMPRESSORS = _compressors()
+
+
+@dataclass(frozen=True)
+class PreparedResponse:
+    """
+    An encoded JSON payload ready to be sent.
+    Attributes:
+        body (bytes): JSON body.
+        etag (str): Strong ETag derived from the body.
+        last_modified (datetime): When the data was produced (UTC, whole seconds).
+        encoded (dict): Content-coding (e.g. "gzip") to compressed body.
+        mimetype (str): Body media type; None means the app's JSON mimetype.
+    """
+    body: bytes
+    etag: str
+    last_modified: datetime
+    encoded: Dict[str, bytes] = field(default_factory=dict)
+    mimetype: Optional[str] = None
+
+
+def encode_json(app: Any, payload: Any) -> bytes:
+    """
+    Serializes a payload to JSON bytes with orjson if available, else the app's JSON provider.
+    Args:
+        app (Flask): The Flask application.
+        payload: JSON-serializable object.
+    Returns:
+        bytes: UTF-8 JSON followed by a newline, like jsonify().
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(payload, option=orjson.OPT_APPEND_NEWLINE)
+        except TypeError:
+            pass  # a type orjson does not know; the app's provider may
+    return (app.json.dumps(payload) + "\n").encode("utf-8")
+
+
+def prepare_response(app: Any, payload: Any, last_modified: Optional[datetime] = None,
+                     fmt: str = "json") -> PreparedResponse:
+    """
+    Encodes and compresses a payload once and derives its ETag.
+    Args:
+        app (Flask): The Flask application.
+        payload: JSON-serializable object.
+        last_modified (datetime): When the data was fetched; defaults to now.
+        fmt (str): Wire format of a heatmap payload: "json", "columnar" or "msgpack" (see wire.py).
+    Returns:
+        PreparedResponse: Body, compressed variants, ETag and Last-Modified.
+    """
+    mimetype = MIMETYPES.get(fmt)
+    if fmt == "json":
+        body = encode_json(app, payload)
+    elif fmt == "msgpack":
+        body = encode_msgpack(columnar_payload(payload))
+    else:
+        body = encode_json(app, columnar_payload(payload))
+    etag = hashlib.blake2b(body, digest_size=16).hexdigest()
+    modified = (last_modified or datetime.now(timezone.utc)).astimezone(timezone.utc).replace(microsecond=0)
+    encoded = {}
+    if len(body) >= MIN_COMPRESS_SIZE:
+        encoded = {coding: compress(body) for coding, _, compress in COMPRESSORS}
+    return PreparedResponse(body, etag, modified, encoded, mimetype)
+
+
+def choose_encoding(prepared: PreparedResponse) -> Optional[str]:
+    """
+    Picks the stored content-coding the client accepts with the highest quality.
+    Ties go to the better compressor (br, then zstd, then gzip).
+    Returns:
+        str: Content-coding, or None to send the identity body.
+    """
+    best, best_q = None, 0.0
+    for coding, _, _ in COMPRESSORS:
+        q = request.accept_encodings[coding]
+        if coding in prepared.encoded and q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+def cache_control(app: Any, past_session: bool, market_open: bool) -> str:
+    """
+    Returns the Cache-Control header for a heatmap response.
+    Args:
+        app (Flask): The Flask application (lifetimes come from its config).
+        past_session (bool): The requested date is a completed session.
+        market_open (bool): NSE is trading now, so live data is changing.
+    Returns:
+        str: Cache-Control header value.
+    """
+    if past_session:
+        return f"public, max-age={int(app.config.get('HTTP_MAX_AGE_PAST', 31536000))}, immutable"
+    key = "HTTP_MAX_AGE_LIVE" if market_open else "HTTP_MAX_AGE_CLOSED"
+    return f"public, max-age={int(app.config.get(key, 15 if market_open else 300))}"
+
+
+def send_prepared(app: Any, prepared: PreparedResponse, cache_control_value: str) -> Response:
+    """
+    Builds the response for the current request, or a 304 if the client's copy is current.
+    The body is the stored blob for the negotiated Accept-Encoding; each encoding
+    has its own ETag, since the bytes differ.
+    Args:
+        app (Flask): The Flask application.
+        prepared (PreparedResponse): Cached body and validators.
+        cache_control_value (str): Cache-Control header value.
+    Returns:
+        Response: 200 with the body, or 304 Not Modified without one.
+    """
+    coding = choose_encoding(prepared)
+    mimetype = prepared.mimetype or app.json.mimetype
+    if coding is None:
+        response = Response(prepared.body, status=200, mimetype=mimetype)
+        response.set_etag(prepared.etag)
+    else:
+        suffix = next(suffix for name, suffix, _ in COMPRESSORS if name == coding)
+        response = Response(prepared.encoded[coding], status=200, mimetype=mimetype)
+        response.headers["Content-Encoding"] = coding
+        response.set_etag(f"{prepared.etag}-{suffix}")
+    response.vary.add("Accept-Encoding")
+    response.last_modified = prepared.last_modified
+    response.headers["Cache-Control"] = cache_control_value
+    return response.make_conditional(request)
@@ -0,0 +1,126 @@
+"""
+Module-level docstring:
+Intraday price series downsampled to a point budget.
+A session of 1-minute bars (about 375 for NSE) is reduced with
+Largest-Triangle-Three-Buckets (LTTB), which keeps the points that carry the
+visible shape of the line (peaks, troughs, turns) rather than every n-th bar.
+Bucket means are computed for all buckets in one NumPy pass; the remaining
+loop runs once per output point with vector operations inside each bucket.
+"""
+from __future__ import annotations
+
+from typing import Dict, List, Sequence, Tuple
+
+from .lazy import lazy_import
+from .providers import split_by_symbol
+
+np = lazy_import("numpy", globals())
+pd = lazy_import("pandas", globals())
+
+Series = Tuple["np.ndarray", "np.ndarray"]
+
+
+def lttb(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Selects `threshold` points of a line with Largest-Triangle-Three-Buckets.
+    The first and last points are always kept; every bucket in between
+    contributes the point forming the largest triangle with the previously
+    kept point and the mean of the next bucket.
+    Args:
+        x (ndarray): Increasing x values (e.g. epoch seconds).
+        y (ndarray): Values at x.
+        threshold (int): Number of points to keep.
+    Returns:
+        ndarray: Sorted indices of the kept points (all indices if the line is short enough).
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    buckets = threshold - 2
+    # Bucket boundaries over the interior points 1..n-2; every bucket is non-empty
+    edges = np.linspace(1, n - 1, buckets + 1).astype(np.int64)
+    sizes = np.diff(edges)
+    mean_x = np.add.reduceat(x[:n - 1], edges[:-1]) / sizes
+    mean_y = np.add.reduceat(y[:n - 1], edges[:-1]) / sizes
+    # The point after the last bucket is the final point itself
+    next_x = np.append(mean_x[1:], x[-1])
+    next_y = np.append(mean_y[1:], y[-1])
+
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(buckets):
+        lo, hi = edges[i], edges[i + 1]
+        ax, ay = x[a], y[a]
+        area = np.abs((ax - next_x[i]) * (y[lo:hi] - ay) - (ax - x[lo:hi]) * (next_y[i] - ay))
+        a = lo + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
+
+
+def _epoch_seconds(index: pd.Index) -> np.ndarray:
+    return pd.DatetimeIndex(index).as_unit("s").asi8
+
+
+def symbol_series(frame: pd.DataFrame, symbol: str) -> Series:
+    """
+    Returns (epoch seconds, close) for one symbol's bars, skipping bars without a close.
+    Args:
+        frame (DataFrame): yfinance-shaped intraday frame.
+        symbol (str): Ticker to extract.
+    Returns:
+        tuple: int64 times and float64 closes, in time order.
+    """
+    bars = split_by_symbol(frame, [symbol]).get(symbol)
+    if bars is None or "Close" not in bars.columns:
+        return np.empty(0, dtype=np.int64), np.empty(0)
+    close = pd.to_numeric(bars["Close"], errors="coerce").dropna().sort_index()
+    return _epoch_seconds(close.index), close.to_numpy(dtype=np.float64)
+
+
+def index_series(frame: pd.DataFrame, symbols: Sequence[str], market_caps: Dict[str, float]) -> Series:
+    """
+    Returns an index level series (100 at each constituent's first bar) from its constituents' bars.
+    Each bar is the market-cap-weighted mean of the constituents' price relative
+    to their first bar of the session, using only constituents that have traded
+    so far. Without any market caps the constituents are weighted equally.
+    Args:
+        frame (DataFrame): yfinance-shaped intraday frame of the constituents.
+        symbols (sequence): Constituents of the index.
+        market_caps (dict): Symbol to market capitalisation.
+    Returns:
+        tuple: int64 times and float64 levels, in time order.
+    """
+    closes = {symbol: pd.to_numeric(bars["Close"], errors="coerce")
+              for symbol, bars in split_by_symbol(frame, list(symbols)).items() if "Close" in bars.columns}
+    if not closes:
+        return np.empty(0, dtype=np.int64), np.empty(0)
+    table = pd.DataFrame(closes).sort_index().ffill()
+    values = table.to_numpy(dtype=np.float64)
+    first = table.bfill().iloc[0].to_numpy(dtype=np.float64)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        relative = values / first
+    caps = np.array([market_caps.get(symbol, 0.0) for symbol in table.columns])
+    weights = caps if caps.sum() > 0 else np.ones(len(caps))
+    valid = ~np.isnan(relative)
+    total = (valid * weights).sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        level = np.where(valid, relative, 0.0) @ weights / total * 100
+    keep = total > 0
+    return _epoch_seconds(table.index[keep]), np.round(level[keep], 4)
+
+
+def downsample(series: Series, points: int) -> List[Dict[str, float]]:
+    """
+    Reduces a series to at most `points` points for charting.
+    Args:
+        series (tuple): (epoch seconds, values) from symbol_series() or index_series().
+        points (int): Point budget.
+    Returns:
+        list: {"time": epoch seconds, "price": value} dicts in time order.
+    """
+    times, values = series
+    keep = lttb(times, values, points)
+    return [{"time": t, "price": v} for t, v in zip(times[keep].tolist(), values[keep].tolist())]
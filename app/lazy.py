@@ -0,0 +1,88 @@
+"""
+Module-level docstring:
+Deferred imports of heavy dependencies.
+NumPy, pandas and yfinance together take several hundred milliseconds to
+import. Modules bind them with lazy_import(), so importing the app (and
+create_app()) loads none of them; each is imported on the first attribute
+access, i.e. the first request that computes with it, or warm_up() before
+workers are forked. On that first access the proxy replaces itself with the
+real module in every namespace that bound it, so later accesses cost the same
+as with a plain import.
+"""
+import importlib
+from types import ModuleType
+from typing import Any, Dict, List, Optional, Union
+
+_proxies: Dict[str, "LazyModule"] = {}
+
+
+class LazyModule:
+    """
+    Stand-in for a module that imports it on first attribute access.
+    The proxy defines no public attributes of its own, so none of the module's are shadowed.
+    Args:
+        name (str): Absolute module name.
+    """
+
+    def __init__(self, name: str) -> None:
+        self.__dict__["_name"] = name
+        self.__dict__["_module"] = None
+        # Module globals that bound this proxy; rebound to the real module on load
+        self.__dict__["_namespaces"] = []
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(load(self), attr)
+
+    def __setattr__(self, attr: str, value: Any) -> None:
+        setattr(load(self), attr, value)
+
+    def __repr__(self) -> str:
+        state = "loaded" if is_loaded(self) else "not loaded"
+        return f"<lazy module '{self.__dict__['_name']}' ({state})>"
+
+
+def load(proxy: LazyModule) -> ModuleType:
+    """Imports a proxied module if it is not imported yet, rebinds it where it was bound, and returns it."""
+    module: Optional[ModuleType] = proxy.__dict__["_module"]
+    if module is None:
+        module = proxy.__dict__["_module"] = importlib.import_module(proxy.__dict__["_name"])
+        for namespace in proxy.__dict__["_namespaces"]:
+            for key, value in list(namespace.items()):
+                if value is proxy:
+                    namespace[key] = module
+    return module
+
+
+def is_loaded(proxy: LazyModule) -> bool:
+    return proxy.__dict__["_module"] is not None
+
+
+def lazy_import(name: str, namespace: Optional[Dict[str, Any]] = None) -> Union[LazyModule, ModuleType]:
+    """
+    Returns a deferred proxy for a module (or the module itself once it is loaded).
+    Args:
+        name (str): Absolute module name, e.g. "pandas".
+        namespace (dict): The caller's globals(); names bound to the proxy there
+            are rebound to the real module when it loads.
+    Returns:
+        LazyModule: Shared proxy that imports the module on first use.
+    """
+    proxy = _proxies.get(name)
+    if proxy is None:
+        proxy = _proxies[name] = LazyModule(name)
+    if is_loaded(proxy):
+        return proxy.__dict__["_module"]
+    if namespace is not None:
+        proxy.__dict__["_namespaces"].append(namespace)
+    return proxy
+
+
+def load_all() -> List[str]:
+    """
+    Imports every module requested through lazy_import() so far.
+    Returns:
+        list: Names of the loaded modules.
+    """
+    for proxy in list(_proxies.values()):
+        load(proxy)
+    return list(_proxies)
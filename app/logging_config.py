@@ -0,0 +1,110 @@
+"""
+Module-level docstring:
+Logging configuration for the application.
+Loggers hand records to a queue; a background QueueListener thread formats and
+writes them to the console and the optional log file. Request threads therefore
+never do file I/O or wait on handler locks. Logging is configured once per
+create_app() call, replacing any previous configuration.
+"""
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+from typing import Any, List, Optional
+
+LOG_FORMAT = '%(asctime)s %(levelname)s %(message)s'
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keeps a fixed fraction of high-volume INFO records.
+    Only records logged with extra={'sampled': True} at INFO level or below are
+    sampled; warnings and errors always pass. Sampling is deterministic (every
+    1/rate-th record), so low rates still log at an even cadence.
+    Args:
+        rate (float): Fraction of sampled records to keep, between 0 and 1.
+    """
+
+    def __init__(self, rate: float = 1.0) -> None:
+        super().__init__()
+        self.rate = min(max(rate, 0.0), 1.0)
+        self._seen = 0
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.rate >= 1.0 or record.levelno > logging.INFO or not getattr(record, 'sampled', False):
+            return True
+        with self._lock:
+            self._seen += 1
+            seen = self._seen
+        return int(seen * self.rate) > int((seen - 1) * self.rate)
+
+
+def configure_logging(app: Any) -> logging.handlers.QueueListener:
+    """
+    Routes the root logger and app.logger through a queue to a background listener.
+    Args:
+        app (Flask): The Flask application; reads LOG_FILE and LOG_SAMPLE_RATE from its config.
+    Returns:
+        QueueListener: The running listener.
+    """
+    global _listener
+    stop_logging()
+
+    formatter = logging.Formatter(LOG_FORMAT)
+    handlers: List[logging.Handler] = [logging.StreamHandler()]
+    log_file = app.config.get('LOG_FILE')
+    if log_file:
+        handlers.append(logging.FileHandler(log_file, mode='a'))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+        handler.setLevel(logging.INFO)
+
+    log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.addFilter(SamplingFilter(float(app.config.get('LOG_SAMPLE_RATE', 1.0))))
+
+    # Clear existing handlers to avoid duplicates; everything goes through the queue
+    root_logger = logging.getLogger()
+    root_logger.setLevel(logging.INFO)
+    for handler in list(root_logger.handlers):
+        root_logger.removeHandler(handler)
+    root_logger.addHandler(queue_handler)
+
+    # Flask's app.logger propagates to the root queue handler instead of owning handlers
+    app.logger.setLevel(logging.INFO)
+    for handler in list(app.logger.handlers):
+        app.logger.removeHandler(handler)
+    app.logger.propagate = True
+
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+
+def stop_logging() -> None:
+    """Stops the background listener after draining queued records, and closes its handlers."""
+    global _listener
+    if _listener is None:
+        return
+    _listener.stop()
+    for handler in _listener.handlers:
+        handler.close()
+    _listener = None
+
+
+def _restart_in_child() -> None:
+    """Starts a new listener in a forked worker; the parent's thread does not survive the fork."""
+    global _listener
+    if _listener is not None:
+        _listener = logging.handlers.QueueListener(_listener.queue, *_listener.handlers,
+                                                   respect_handler_level=_listener.respect_handler_level)
+        _listener.start()
+
+
+atexit.register(stop_logging)
+os.register_at_fork(after_in_child=_restart_in_child)
@@ -0,0 +1,169 @@
+"""
+Module-level docstring:
+Top movers (gainers, losers, volume leaders) by partial selection.
+A MoversTable holds the latest quote of every universe symbol as NumPy arrays.
+The top K of a view are found with np.argpartition, which is linear in the
+view size, and only those K are sorted. Tables are built once per market
+snapshot (on publish, so they follow the prefetch scheduler) and every
+index/sector/category view is a cheap selection over the same arrays.
+"""
+from __future__ import annotations
+
+import threading
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence
+
+from .lazy import lazy_import
+from .snapshot import get_snapshot_store
+from .tiles import latest_quotes
+
+np = lazy_import("numpy", globals())
+pd = lazy_import("pandas", globals())
+
+# Guards creation of the per-app tracker so it subscribes to the snapshot store once
+_create_lock = threading.Lock()
+
+
+def top_k(values: np.ndarray, k: int, largest: bool = True) -> np.ndarray:
+    """
+    Returns the positions of the k largest (or smallest) values, best first.
+    Ties keep their original order. Runs in O(n + k log k) instead of a full sort.
+    Args:
+        values (ndarray): 1-D values.
+        k (int): Number of positions to return.
+        largest (bool): Select the largest values (otherwise the smallest).
+    Returns:
+        ndarray: Up to k positions into `values`.
+    """
+    n = len(values)
+    if k <= 0 or n == 0:
+        return np.empty(0, dtype=np.int64)
+    keys = -values if largest else values
+    if n <= 8 * k:
+        # Small views: one stable sort is cheaper than partitioning
+        return np.argsort(keys, kind="stable")[:k]
+    # argpartition may cut a tie at the boundary anywhere; take every tied value, then trim
+    boundary = keys[np.argpartition(keys, k - 1)[k - 1]]
+    chosen = np.flatnonzero(keys <= boundary)
+    return chosen[np.argsort(keys[chosen], kind="stable")][:k]
+
+
+class MoversTable:
+    """
+    Latest quotes of a universe as arrays, with per-view top-K selection.
+    Args:
+        quotes (DataFrame): Output of tiles.latest_quotes(), indexed by symbol.
+        version (hashable): Identity of the data (e.g. the snapshot version).
+    """
+
+    def __init__(self, quotes: pd.DataFrame, version: Hashable = None) -> None:
+        self.version = version
+        self.symbols: List[str] = list(quotes.index)
+        self.price = quotes["price"].to_numpy(dtype=np.float64)
+        self.change = quotes["change"].to_numpy(dtype=np.float64)
+        self.volume = quotes["volume"].to_numpy(dtype=np.int64)
+        self._position = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self._views: Dict[Hashable, np.ndarray] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_frame(cls, frame: pd.DataFrame, universe: Sequence[str], version: Hashable = None) -> "MoversTable":
+        return cls(latest_quotes(frame, list(universe)), version)
+
+    def positions(self, view: Hashable, symbols: Sequence[str]) -> np.ndarray:
+        """Returns (and remembers) the array positions of a view's quoted symbols."""
+        with self._lock:
+            cached = self._views.get(view)
+        if cached is None:
+            cached = np.array([self._position[s] for s in symbols if s in self._position], dtype=np.int64)
+            with self._lock:
+                self._views[view] = cached
+        return cached
+
+    def movers(self, view: Hashable, symbols: Sequence[str], k: int) -> Dict[str, List[int]]:
+        """
+        Selects a view's movers.
+        Args:
+            view (hashable): Key under which the view's positions are remembered.
+            symbols (sequence): Symbols of the view.
+            k (int): Entries per list.
+        Returns:
+            dict: "gainers" (change > 0), "losers" (change < 0) and "volume" as table positions, best first.
+        """
+        pos = self.positions(view, symbols)
+        change = self.change[pos]
+        up = np.flatnonzero(change > 0)
+        down = np.flatnonzero(change < 0)
+        return {
+            "gainers": pos[up[top_k(change[up], k)]].tolist(),
+            "losers": pos[down[top_k(change[down], k, largest=False)]].tolist(),
+            "volume": pos[top_k(self.volume[pos], k)].tolist(),
+        }
+
+    def entries(self, positions: List[int], sector_map: Dict[str, str],
+                name_map: Dict[str, str]) -> List[Dict[str, Any]]:
+        """Returns tiles (same fields as the heatmap) for table positions."""
+        return [
+            {
+                "symbol": self.symbols[i],
+                "name": name_map.get(self.symbols[i], self.symbols[i]),
+                "price": float(self.price[i]),
+                "change": float(self.change[i]),
+                "volume": int(self.volume[i]),
+                "sector": sector_map.get(self.symbols[i], "UNKNOWN"),
+            }
+            for i in positions
+        ]
+
+
+class MoversTracker:
+    """
+    Keeps the movers table of the latest snapshot, rebuilt when a snapshot is published.
+    Args:
+        universe (callable): Returns the symbols to quote.
+    """
+
+    def __init__(self, universe: Callable[[], Sequence[str]]) -> None:
+        self._universe = universe
+        self._table: Optional[MoversTable] = None
+        self._lock = threading.Lock()
+        self._builds = 0
+
+    def publish(self, snapshot: Any) -> None:
+        """Snapshot-store listener: builds the table for the new snapshot."""
+        self._build(snapshot)
+
+    def _build(self, snapshot: Any) -> MoversTable:
+        table = MoversTable.from_frame(snapshot.frame, self._universe(), snapshot.version)
+        with self._lock:
+            if self._table is None or self._table.version <= snapshot.version:
+                self._table = table
+            self._builds += 1
+        return table
+
+    def table(self, snapshot: Any) -> MoversTable:
+        """Returns the table for a snapshot, building it if the listener has not yet."""
+        table = self._table
+        if table is not None and table.version == snapshot.version:
+            return table
+        return self._build(snapshot)
+
+    def stats(self) -> Dict[str, int]:
+        return {"builds": self._builds}
+
+
+def get_movers_tracker(app: Any, universe: Callable[[], Sequence[str]]) -> MoversTracker:
+    """
+    Returns the app's movers tracker, registering it with the snapshot store on first use.
+    Args:
+        app (Flask): The Flask application.
+        universe (callable): Returns the symbols to quote.
+    Returns:
+        MoversTracker: The shared tracker.
+    """
+    with _create_lock:
+        tracker = app.extensions.get("movers_tracker")
+        if tracker is None:
+            tracker = MoversTracker(universe)
+            app.extensions["movers_tracker"] = tracker
+            get_snapshot_store(app).add_listener(tracker.publish)
+    return tracker
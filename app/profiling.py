@@ -0,0 +1,157 @@
+"""
+Module-level docstring:
+Opt-in per-request profiling.
+When PROFILE_DIR is configured, a request carrying the X-Profile header runs
+under cProfile. The stats are written to PROFILE_DIR as <request_id>.prof
+(loadable with pstats, snakeviz or flameprof) plus a readable <request_id>.txt
+summary, and the id is returned in the X-Profile-Id response header. Stored
+profiles are served by /api/profiles/<request_id>. Requests without the header
+are not affected, so profiling can stay enabled on a live worker.
+"""
+import cProfile
+import io
+import logging
+import os
+import pstats
+import re
+import threading
+import uuid
+from typing import Any, List, Optional
+
+from flask import Blueprint, current_app, g, jsonify, request, send_file
+
+PROFILE_HEADER = "X-Profile"
+PROFILE_ID_HEADER = "X-Profile-Id"
+_REQUEST_ID = re.compile(r"^[0-9a-f]{32}$")
+
+# cProfile cannot run two profilers at once on newer Pythons; one profiled request at a time
+_active = threading.Lock()
+
+profiling_bp = Blueprint('profiling', __name__)
+
+
+def wants_profile(app: Any) -> bool:
+    """
+    Returns True if the current request asked for profiling and is allowed to.
+    If PROFILE_TOKEN is set, the header must carry that token; otherwise "1".
+    """
+    value = request.headers.get(PROFILE_HEADER)
+    if not value or not app.config.get("PROFILE_DIR") or request.blueprint == profiling_bp.name:
+        return False
+    token = app.config.get("PROFILE_TOKEN")
+    return value == token if token else value == "1"
+
+
+def start_profile() -> None:
+    """before_request hook: starts cProfile for requests that asked for it."""
+    if not wants_profile(current_app) or not _active.acquire(blocking=False):
+        return
+    profiler = cProfile.Profile()
+    g.profiler = profiler
+    g.profile_id = uuid.uuid4().hex
+    profiler.enable()
+
+
+def finish_profile(response: Any) -> Any:
+    """after_request hook: stops the profiler and stores its stats."""
+    profiler: Optional[cProfile.Profile] = g.pop("profiler", None)
+    if profiler is None:
+        return response
+    profiler.disable()
+    _active.release()
+    request_id = g.pop("profile_id")
+    try:
+        save_profile(profiler, current_app.config["PROFILE_DIR"], request_id,
+                     f"{request.method} {request.full_path}")
+        response.headers[PROFILE_ID_HEADER] = request_id
+    except OSError as e:
+        logging.getLogger().error(f"Could not store profile {request_id}: {e}")
+    return response
+
+
+def abort_profile(exc: Optional[BaseException] = None) -> None:
+    """teardown_request hook: releases the profiler if after_request never ran (unhandled error)."""
+    profiler: Optional[cProfile.Profile] = g.pop("profiler", None)
+    if profiler is not None:
+        profiler.disable()
+        _active.release()
+
+
+def save_profile(profiler: cProfile.Profile, directory: str, request_id: str, title: str) -> str:
+    """
+    Writes <request_id>.prof and a cumulative-time text summary <request_id>.txt.
+    Returns:
+        str: Path of the .prof file.
+    """
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{request_id}.prof")
+    profiler.dump_stats(path)
+    summary = io.StringIO()
+    summary.write(f"{title}\n\n")
+    pstats.Stats(profiler, stream=summary).sort_stats("cumulative").print_stats(40)
+    with open(os.path.join(directory, f"{request_id}.txt"), "w") as f:
+        f.write(summary.getvalue())
+    return path
+
+
+def list_profiles(directory: str) -> List[str]:
+    """Returns stored profile ids, newest first."""
+    if not os.path.isdir(directory):
+        return []
+    paths = [os.path.join(directory, name) for name in os.listdir(directory) if name.endswith(".prof")]
+    paths.sort(key=os.path.getmtime, reverse=True)
+    return [os.path.basename(path)[:-len(".prof")] for path in paths]
+
+
+@profiling_bp.before_request
+def require_token() -> Any:
+    """Stored profiles are only served to callers presenting PROFILE_TOKEN, when one is set."""
+    token = current_app.config.get("PROFILE_TOKEN")
+    if token and request.headers.get(PROFILE_HEADER) != token:
+        return jsonify(error={"code": "FORBIDDEN", "message": "Profile token required"}), 403
+    return None
+
+
+@profiling_bp.route('/api/profiles', methods=['GET'])
+def profiles() -> Any:
+    """
+    API endpoint listing stored profile ids, newest first.
+    Returns:
+        Response: JSON object {"profiles": [...]}.
+    """
+    return jsonify(profiles=list_profiles(current_app.config["PROFILE_DIR"])), 200
+
+
+@profiling_bp.route('/api/profiles/<request_id>', methods=['GET'])
+def profile(request_id: str) -> Any:
+    """
+    API endpoint returning one stored profile.
+    Query Parameters:
+        format (str): Optional. "text" (default) for the summary, "pstats" for the raw .prof file.
+    Returns:
+        Response: Text summary, binary stats, or a JSON error.
+    """
+    fmt = request.args.get("format", "text")
+    if not _REQUEST_ID.match(request_id) or fmt not in ("text", "pstats"):
+        return jsonify(error={"code": "INVALID_PARAM", "message": "Invalid profile request"}), 400
+    directory = os.path.abspath(current_app.config["PROFILE_DIR"])
+    path = os.path.join(directory, f"{request_id}.{'txt' if fmt == 'text' else 'prof'}")
+    if not os.path.exists(path):
+        return jsonify(error={"code": "NOT_FOUND", "message": f"Unknown profile: {request_id}"}), 404
+    if fmt == "text":
+        return send_file(path, mimetype="text/plain")
+    return send_file(path, mimetype="application/octet-stream", as_attachment=True,
+                     download_name=f"{request_id}.prof")
+
+
+def init_profiling(app: Any) -> None:
+    """
+    Registers the profiling hooks and endpoints when PROFILE_DIR is configured.
+    The hooks are app-level, so they wrap all blueprint hooks and the view.
+    """
+    if not app.config.get("PROFILE_DIR"):
+        return
+    app.before_request(start_profile)
+    app.after_request(finish_profile)
+    app.teardown_request(abort_profile)
+    app.register_blueprint(profiling_bp)
@@ -0,0 +1,278 @@
+"""
+Module-level docstring:
+Market-data provider layer for the API.
+A provider returns a yfinance-shaped OHLCV DataFrame (columns grouped by ticker)
+for a list of symbols. The API downloads the union of all configured index
+constituents through a single provider call and serves every index/sector view
+from that one result.
+"""
+from __future__ import annotations
+
+import os
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Iterable, List, Optional
+
+from .lazy import lazy_import
+from .upstream import UpstreamClient, UpstreamError
+
+pd = lazy_import("pandas", globals())
+yf = lazy_import("yfinance", globals())
+
+
+OHLCV_FIELDS: List[str] = ["Open", "High", "Low", "Close", "Volume"]
+
+
+class MarketDataProvider(ABC):
+    """
+    Base class for market-data providers.
+    Subclasses implement download() and download_intraday() and return DataFrames
+    shaped like yf.download(symbols, group_by='ticker').
+    Date ranges are sessions and include `end`; a provider whose backend treats the
+    end date as exclusive (yfinance) adds the extra day itself.
+    `thread_safe` tells the fetch engine whether download() may run in several threads at once.
+    """
+    name: str = "base"
+    thread_safe: bool = False
+
+    @abstractmethod
+    def download(self, symbols: List[str], start: str, end: str) -> pd.DataFrame:
+        """
+        Download OHLCV rows for the given symbols.
+        Args:
+            symbols (list): Symbols to download in one batch.
+            start (str): First session date (YYYY-MM-DD).
+            end (str): Last session date (YYYY-MM-DD), inclusive; start == end is one session.
+        Returns:
+            DataFrame: OHLCV frame grouped by ticker.
+        """
+
+    @abstractmethod
+    def download_intraday(self, symbols: List[str], date: str, interval: str = "1m") -> pd.DataFrame:
+        """
+        Download the intraday bars of one session.
+        Args:
+            symbols (list): Symbols to download in one batch.
+            date (str): Session date (YYYY-MM-DD).
+            interval (str): Bar size, e.g. "1m".
+        Returns:
+            DataFrame: OHLCV frame grouped by ticker, indexed by bar time.
+        """
+
+
+class YFinanceProvider(MarketDataProvider):
+    """
+    Provider backed by Yahoo Finance via yfinance.
+    All symbols are downloaded in one batched yf.download call. yf.download keeps
+    its results in module-level state, so concurrent calls are not safe.
+    yf.download does not raise when a ticker fails; it records the error per
+    ticker and leaves the ticker out of the frame. Throttling, and failures that
+    leave nothing to return (every ticker errored, or an empty frame because of
+    connection errors and timeouts), are raised as retryable UpstreamErrors so
+    that the client's retries and circuit breaker see them. Tickers for which
+    Yahoo has no data (e.g. no session on that date) are not failures.
+    Args:
+        session: Optional HTTP session shared by all downloads (connection reuse).
+        client (UpstreamClient): Optional resilient client every download goes through;
+            its pooled session is used when no session is given.
+        timeout (float): Per-request timeout passed to yf.download; defaults to the client's.
+    """
+    name = "yfinance"
+
+    def __init__(self, session: Any = None, client: Optional[UpstreamClient] = None,
+                 timeout: Optional[float] = None) -> None:
+        self.client = client
+        self.session = session if session is not None or client is None else client.session
+        self.timeout = timeout if timeout is not None or client is None else client.timeout
+
+    def _call(self, key: Any, **kwargs: Any) -> pd.DataFrame:
+        if self.session is not None:
+            kwargs["session"] = self.session
+        if self.timeout is not None:
+            kwargs["timeout"] = self.timeout
+        if self.client is None:
+            return self._download(**kwargs)
+        return self.client.call(self._download, key=key, **kwargs)
+
+    @staticmethod
+    def _download(**kwargs: Any) -> pd.DataFrame:
+        previous = yf.shared._ERRORS
+        frame = yf.download(group_by='ticker', progress=False, **kwargs)
+        # yf.download starts each call with a fresh error dict; an unchanged one belongs to an earlier call
+        errors = yf.shared._ERRORS if yf.shared._ERRORS is not previous else {}
+        throttled = [ticker for ticker, error in errors.items() if is_rate_limit_error(error)]
+        if throttled:
+            raise UpstreamError(f"Yahoo Finance rate limit hit for {len(throttled)} ticker(s)", status=429,
+                                retryable=True)
+        failed = [error for error in errors.values() if not is_missing_data_error(error)]
+        requested = {ticker.upper() for ticker in kwargs.get("tickers") or []}
+        if failed and (frame.empty or len(errors) >= len(requested)):
+            raise UpstreamError(f"Yahoo Finance download failed for {len(failed)} ticker(s): {failed[0]}",
+                                retryable=True)
+        return frame
+
+    def download(self, symbols: List[str], start: str, end: str) -> pd.DataFrame:
+        return self._call(("daily", tuple(symbols), start, end), tickers=symbols, start=start,
+                          end=next_day(end))
+
+    def download_intraday(self, symbols: List[str], date: str, interval: str = "1m") -> pd.DataFrame:
+        return self._call(("intraday", tuple(symbols), date, interval), tickers=symbols, start=date,
+                          end=next_day(date), interval=interval)
+
+
+def next_day(date: str) -> str:
+    """Returns the day after a YYYY-MM-DD date: yfinance's exclusive `end` for a range ending on `date`."""
+    return (pd.Timestamp(date) + pd.Timedelta(days=1)).strftime("%Y-%m-%d")
+
+
+def is_rate_limit_error(error: str) -> bool:
+    """Returns True if a yfinance per-ticker error message (repr of the exception) is a throttling error."""
+    return "YFRateLimitError" in error or "Too Many Requests" in error
+
+
+# yfinance errors meaning Yahoo answered but has no prices for the ticker (e.g. no session in range).
+# YFTzMissingError is not one: yfinance also raises it when the timezone lookup request fails.
+# Neither is YFInvalidPeriodError, which means the request itself asked for a bad range.
+MISSING_DATA_ERRORS = ("YFPricesMissingError",)
+
+
+def is_missing_data_error(error: str) -> bool:
+    """Returns True if a yfinance per-ticker error message reports missing data rather than a failed request."""
+    return error.startswith(MISSING_DATA_ERRORS)
+
+
+class FrameProvider(MarketDataProvider):
+    """
+    Provider that always returns a fixed DataFrame.
+    Intended for tests and benchmarks that need no network access.
+    """
+    name = "frame"
+    thread_safe = True
+
+    def __init__(self, frame: pd.DataFrame) -> None:
+        self.frame = frame
+        self.calls: List[Dict[str, Any]] = []
+
+    def download(self, symbols: List[str], start: str, end: str) -> pd.DataFrame:
+        self.calls.append({"symbols": list(symbols), "start": start, "end": end})
+        return self.frame
+
+    def download_intraday(self, symbols: List[str], date: str, interval: str = "1m") -> pd.DataFrame:
+        self.calls.append({"symbols": list(symbols), "date": date, "interval": interval})
+        return self.frame
+
+
+class FileProvider(MarketDataProvider):
+    """
+    Provider that reads OHLCV rows from a local CSV file for offline runs.
+    The file is in long format with the columns Date, Symbol, Open, High, Low,
+    Close and Volume.
+    Rows whose Date carries a time of day are intraday bars.
+    """
+    name = "file"
+    thread_safe = True
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._rows: Optional[pd.DataFrame] = None
+
+    def _load(self) -> pd.DataFrame:
+        if self._rows is None:
+            rows = pd.read_csv(self.path, parse_dates=["Date"])
+            self._rows = rows.sort_values(["Date", "Symbol"])
+        return self._rows
+
+    def download(self, symbols: List[str], start: str, end: str) -> pd.DataFrame:
+        rows = self._load()
+        mask = (
+            rows["Symbol"].isin(symbols)
+            & (rows["Date"] >= pd.Timestamp(start))
+            & (rows["Date"] <= pd.Timestamp(end))
+        )
+        return self._pivot(rows.loc[mask], symbols)
+
+    def download_intraday(self, symbols: List[str], date: str, interval: str = "1m") -> pd.DataFrame:
+        # The file's bar size is used as is; `interval` is not resampled
+        rows = self._load()
+        mask = rows["Symbol"].isin(symbols) & (rows["Date"].dt.normalize() == pd.Timestamp(date))
+        return self._pivot(rows.loc[mask], symbols)
+
+    @staticmethod
+    def _pivot(selected: pd.DataFrame, symbols: List[str]) -> pd.DataFrame:
+        if selected.empty:
+            return pd.DataFrame()
+        frame = selected.pivot(index="Date", columns="Symbol", values=OHLCV_FIELDS)
+        # pivot puts the field first; yfinance's group_by='ticker' puts the symbol first
+        frame = frame.swaplevel(0, 1, axis=1)
+        present = [s for s in symbols if s in frame.columns.levels[0]]
+        return frame.reindex(columns=pd.MultiIndex.from_product([present, OHLCV_FIELDS]))
+
+
+def split_by_symbol(df: pd.DataFrame, symbols: List[str]) -> Dict[str, pd.DataFrame]:
+    """
+    Splits a yfinance-shaped frame into one OHLCV frame per symbol.
+    A flat (single-level) frame is what yfinance returns for a single ticker, so it
+    is attributed to every requested symbol, as heatmap_data does.
+    Args:
+        df (DataFrame): Frame returned by a provider.
+        symbols (list): Symbols that were requested.
+    Returns:
+        dict: Symbol to its OHLCV frame; symbols absent from the frame are omitted.
+    """
+    if df.empty:
+        return {}
+    if isinstance(df.columns, pd.MultiIndex):
+        present = set(df.columns.get_level_values(0))
+        return {symbol: df[symbol] for symbol in symbols if symbol in present}
+    return {symbol: df for symbol in symbols}
+
+
+def union_symbols(groups: Iterable[List[str]]) -> List[str]:
+    """
+    Returns the ordered union of several symbol lists, without duplicates.
+    Args:
+        groups (iterable): Symbol lists, e.g. the constituents of every index.
+    Returns:
+        list: Each symbol once, in first-seen order.
+    """
+    seen: Dict[str, None] = {}
+    for symbols in groups:
+        for symbol in symbols:
+            seen.setdefault(symbol, None)
+    return list(seen)
+
+
+def create_provider(config: Dict[str, Any]) -> MarketDataProvider:
+    """
+    Builds the provider selected by MARKET_DATA_PROVIDER in the app config.
+    Args:
+        config (dict): Flask app config.
+    Returns:
+        MarketDataProvider: The configured provider.
+    Raises:
+        ValueError: If the provider name is unknown or the file provider has no file.
+    """
+    name = config.get("MARKET_DATA_PROVIDER") or "yfinance"
+    if name == "yfinance":
+        return YFinanceProvider(client=UpstreamClient.from_config(config))
+    if name == "file":
+        path = config.get("MARKET_DATA_FILE")
+        if not path or not os.path.exists(path):
+            raise ValueError(f"MARKET_DATA_FILE not found: {path}")
+        return FileProvider(path)
+    raise ValueError(f"Unknown market data provider: {name}")
+
+
+def get_provider(app: Any) -> MarketDataProvider:
+    """
+    Returns the app's provider, creating it from config on first use.
+    Tests may install their own provider in app.extensions['market_data_provider'].
+    Args:
+        app (Flask): The Flask application.
+    Returns:
+        MarketDataProvider: The provider for this app.
+    """
+    provider = app.extensions.get("market_data_provider")
+    if provider is None:
+        provider = create_provider(app.config)
+        app.extensions["market_data_provider"] = provider
+    return provider
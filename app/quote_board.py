@@ -0,0 +1,376 @@
+"""
+Module-level docstring:
+Shared-memory quote board for multi-process deployments.
+One refresher process writes the latest quote of every universe symbol into a
+memory-mapped file (e.g. under /dev/shm) as a NumPy structured array; every
+worker maps the same file and builds heatmap tiles straight from it, so quote
+memory does not grow with the worker count and all workers serve the same
+data under the same version.
+
+Layout (little-endian):
+    header   HEADER_SIZE bytes: magic, seq, epoch, version, count, capacity,
+             symbols_version, as_of, date
+    symbols  capacity x SYMBOL_DTYPE: symbol table; a symbol's id is its position
+    records  capacity x RECORD_DTYPE: row i holds the quote of symbol id i
+             (price NaN when the symbol has no quote)
+
+Writes follow a seqlock: the writer makes `seq` odd, updates the table and
+header, then makes `seq` even again. Readers work on the mapped arrays without
+copying and retry if `seq` was odd or changed while they read. The writer is
+elected with an exclusive flock on "<path>.lock", so only one process refreshes
+the board at a time; another takes over once the holder exits.
+"""
+from __future__ import annotations
+
+import mmap
+import os
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, Hashable, List, NamedTuple, Optional, Sequence, Tuple, TypeVar
+
+from .lazy import lazy_import
+from .tiles import latest_quotes
+
+try:
+    import fcntl
+except ImportError:  # not POSIX: no writer election, every process may write
+    fcntl = None
+
+np = lazy_import("numpy", globals())
+pd = lazy_import("pandas", globals())
+
+T = TypeVar("T")
+
+MAGIC = b"NSEVIZQ1"
+HEADER_SIZE = 128
+SYMBOL_DTYPE = "S24"
+SEQ_OFFSET = 8
+# Attempts before a reader gives up on a board that is being rewritten continuously
+READ_ATTEMPTS = 1000
+
+
+def header_dtype() -> Any:
+    return np.dtype([("magic", "S8"), ("seq", "<u8"), ("epoch", "S8"), ("version", "<u8"), ("count", "<u4"),
+                     ("capacity", "<u4"), ("symbols_version", "<u8"), ("as_of", "<f8"), ("date", "S10")])
+
+
+def record_dtype() -> Any:
+    """One quote: symbol id, price, open, % change, volume and bar time (epoch seconds)."""
+    return np.dtype([("symbol_id", "<u4"), ("price", "<f8"), ("open", "<f8"), ("change", "<f8"),
+                     ("volume", "<i8"), ("timestamp", "<i8")], align=True)
+
+
+class BoardInfo(NamedTuple):
+    """Header fields of one consistent read."""
+    epoch: str
+    version: int
+    date: str
+    as_of: float
+    count: int
+    symbols_version: int
+
+
+class QuoteBoard:
+    """
+    A memory-mapped quote table shared by every process that opens the same path.
+    The file is created on first open. If it exists with another layout, a new file
+    replaces it; processes that mapped the old file keep reading that one.
+    Args:
+        path (str): Board file; use a tmpfs path such as /dev/shm/nseviz-quotes.
+        capacity (int): Most symbols the board holds.
+    """
+
+    def __init__(self, path: str, capacity: int = 4096) -> None:
+        self.path = path
+        self.capacity = capacity
+        self._records_offset = HEADER_SIZE + capacity * np.dtype(SYMBOL_DTYPE).itemsize
+        size = self._records_offset + capacity * record_dtype().itemsize
+        fd = self._open_locked()
+        try:
+            current = os.fstat(fd).st_size
+            if current == 0:
+                # A new file: nobody can have mapped it yet
+                os.ftruncate(fd, size)
+                self._map = self._initialize(fd, size)
+            elif current != size or os.pread(fd, len(MAGIC), 0) != MAGIC:
+                # Another layout, possibly mapped by live processes: shrinking it in place would
+                # crash them (SIGBUS), so a new file replaces it; they keep the old one until restarted
+                tmp = f"{path}.{os.getpid()}.tmp"
+                tmp_fd = os.open(tmp, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o644)
+                try:
+                    os.ftruncate(tmp_fd, size)
+                    self._map = self._initialize(tmp_fd, size)
+                finally:
+                    os.close(tmp_fd)
+                os.replace(tmp, path)
+            else:
+                self._map = mmap.mmap(fd, size)
+        finally:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
+        self._header = np.frombuffer(self._map, dtype=header_dtype(), count=1)
+        self._seq = np.frombuffer(self._map, dtype="<u8", count=1, offset=SEQ_OFFSET)
+        self._symbols = np.frombuffer(self._map, dtype=SYMBOL_DTYPE, count=capacity, offset=HEADER_SIZE)
+        self._records = np.frombuffer(self._map, dtype=record_dtype(), count=capacity, offset=self._records_offset)
+        self.epoch = bytes(self._header["epoch"][0]).decode()
+        # Reader caches, valid for one symbols_version: (symbols_version, symbol -> id, view -> (ids, names)).
+        # Replaced as a whole under _lock, so a reader never pairs an index with another version's views.
+        self._index_state: Tuple[int, Dict[str, int], Dict[Hashable, Any]] = (-1, {}, {})
+        self._lock = threading.Lock()
+        # Writer state
+        self._written_symbols: Optional[List[str]] = None
+        self._writer_fd: Optional[int] = None
+        self._writer_pid: Optional[int] = None
+        self._stats = {"reads": 0, "retries": 0, "publishes": 0}
+
+    def _open_locked(self) -> int:
+        """Opens the board file and takes its lock, retrying if another process replaced the file meanwhile."""
+        while True:
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            if fcntl is None:
+                return fd
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            try:
+                if os.stat(self.path).st_ino == os.fstat(fd).st_ino:
+                    return fd
+            except FileNotFoundError:
+                pass
+            fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
+
+    def _initialize(self, fd: int, size: int) -> mmap.mmap:
+        """Maps a zero-filled board file and writes its header."""
+        mapped = mmap.mmap(fd, size)
+        header = np.frombuffer(mapped, dtype=header_dtype(), count=1)
+        header["epoch"] = uuid.uuid4().hex[:8].encode()
+        header["capacity"] = self.capacity
+        header["magic"] = MAGIC
+        return mapped
+
+    # --- Reading ---
+
+    def read(self, fn: Callable[[Any, BoardInfo], T]) -> T:
+        """
+        Runs fn(records, info) on a consistent view of the board and returns its result.
+        `records` is a zero-copy view of the first `count` rows; fn must not keep it
+        or anything derived from it without copying, because fn is re-run (and its
+        earlier result discarded) if the writer published meanwhile.
+        Raises:
+            RuntimeError: If no consistent read was possible after READ_ATTEMPTS tries.
+        """
+        for _ in range(READ_ATTEMPTS):
+            seq = int(self._seq[0])
+            if seq & 1:
+                self._count("retries")
+                time.sleep(0)
+                continue
+            try:
+                header = self._header[0]
+                info = BoardInfo(self.epoch, int(header["version"]), bytes(header["date"]).decode(),
+                                 float(header["as_of"]), int(header["count"]), int(header["symbols_version"]))
+                result = fn(self._records[:info.count], info)
+            except Exception:
+                # A torn read can fail anywhere; it is only an error if nothing was written meanwhile
+                if int(self._seq[0]) == seq:
+                    raise
+                self._count("retries")
+                continue
+            if int(self._seq[0]) == seq:
+                self._count("reads")
+                return result
+            self._count("retries")
+        raise RuntimeError("Quote board is being rewritten continuously; no consistent read")
+
+    def info(self) -> Optional[BoardInfo]:
+        """Returns the header of the current board, or None if nothing was published yet."""
+        info = self.read(lambda records, info: info)
+        return info if info.version > 0 else None
+
+    def _symbol_index(self, info: BoardInfo) -> Tuple[Dict[str, int], Dict[Hashable, Any]]:
+        """
+        Symbol -> id for the board's symbol table (decoded once per symbols_version, inside a read),
+        with the cached views of that table (a new, empty dict when the table changed).
+        """
+        with self._lock:
+            version, index, views = self._index_state
+        if version == info.symbols_version:
+            return index, views
+        return {symbol.decode(): i for i, symbol in enumerate(self._symbols[:info.count].tolist())}, {}
+
+    def tiles(self, view: Hashable, symbols: Sequence[str], sector_map: Dict[str, str],
+              name_map: Dict[str, str]) -> Tuple[BoardInfo, List[Dict[str, Any]]]:
+        """
+        Builds the tiles of one view from the board.
+        Args:
+            view (hashable): Key under which the view's symbol ids are remembered.
+            symbols (sequence): Symbols of the view, in output order.
+            sector_map (dict): Symbol to sector.
+            name_map (dict): Symbol to company name.
+        Returns:
+            tuple: (BoardInfo of the data used, tile dicts for symbols that have a quote).
+        """
+        def build(records: Any, info: BoardInfo) -> Tuple[BoardInfo, List[Dict[str, Any]], Any, Any, Any]:
+            index, views = self._symbol_index(info)
+            with self._lock:
+                cached = views.get(view)
+            if cached is None:
+                names = [symbol for symbol in symbols if symbol in index]
+                cached = (np.array([index[symbol] for symbol in names], dtype=np.int64), names)
+            ids, names = cached
+            rows = records[ids]
+            quoted = (~np.isnan(rows["price"])).tolist()
+            tiles = [
+                {
+                    "symbol": symbol,
+                    "name": name_map.get(symbol, symbol),
+                    "price": price,
+                    "change": change,
+                    "volume": volume,
+                    "sector": sector_map.get(symbol, "UNKNOWN"),
+                }
+                for symbol, ok, price, change, volume in zip(
+                    names, quoted, rows["price"].tolist(), rows["change"].tolist(), rows["volume"].tolist()
+                )
+                if ok
+            ]
+            return info, tiles, index, views, cached
+
+        info, tiles, index, views, cached = self.read(build)
+        # Cached only after the read was validated
+        with self._lock:
+            version, current, _ = self._index_state
+            if current is not index and version < info.symbols_version:
+                self._index_state = (info.symbols_version, index, views)
+            if self._index_state[1] is index:
+                views[view] = cached
+        return info, tiles
+
+    def frame(self) -> Tuple[BoardInfo, Any]:
+        """
+        Copies the board into a yfinance-shaped frame for code that works on snapshot frames.
+        Each quoted symbol gets Open, Close (its price) and Volume on the row of its bar
+        time, so latest_quotes() of the frame gives back the board's quotes.
+        Returns:
+            tuple: (BoardInfo of the data copied, DataFrame grouped by ticker).
+        """
+        info, records, symbols = self.read(
+            lambda records, info: (info, records.copy(), self._symbols[:info.count].copy()))
+        quoted = ~np.isnan(records["price"])
+        records = records[quoted]
+        names = [symbol.decode() for symbol in symbols[quoted].tolist()]
+        times, rows = np.unique(records["timestamp"], return_inverse=True)
+        values = np.full((len(times), len(names), 3), np.nan)
+        cols = np.arange(len(names))
+        values[rows, cols, 0] = records["open"]
+        values[rows, cols, 1] = records["price"]
+        values[rows, cols, 2] = records["volume"]
+        columns = pd.MultiIndex.from_product([names, ["Open", "Close", "Volume"]])
+        frame = pd.DataFrame(values.reshape(len(times), -1), index=pd.to_datetime(times, unit="s"), columns=columns)
+        return info, frame
+
+    # --- Writing ---
+
+    def is_writer(self) -> bool:
+        """Returns True if this process holds the writer lock."""
+        return fcntl is None or self._writer_pid == os.getpid()
+
+    def acquire_writer(self) -> bool:
+        """
+        Makes this process the board's writer if no other process is.
+        Returns:
+            bool: True if this process holds (or just took) the writer lock.
+        """
+        pid = os.getpid()
+        if self._writer_pid == pid or fcntl is None:
+            return True
+        # A lock inherited across fork belongs to the parent; a child opens its own
+        fd = os.open(self.path + ".lock", os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        self._writer_fd, self._writer_pid = fd, pid
+        return True
+
+    def publish(self, date: str, quotes: Any, symbols: Sequence[str], as_of: float) -> int:
+        """
+        Writes a new board version.
+        Args:
+            date (str): Session date (YYYY-MM-DD).
+            quotes (DataFrame): latest_quotes(..., detail=True) output, indexed by symbol.
+            symbols (sequence): Symbol table; row i is symbols[i] (unquoted symbols get a NaN price).
+            as_of (float): Fetch time, epoch seconds.
+        Returns:
+            int: The published version.
+        Raises:
+            ValueError: If there are more symbols than the board's capacity.
+        """
+        symbols = list(symbols)
+        n = len(symbols)
+        if n > self.capacity:
+            raise ValueError(f"Quote board holds {self.capacity} symbols, got {n}")
+        aligned = quotes.reindex(symbols)
+        rows = np.zeros(n, dtype=record_dtype())
+        rows["symbol_id"] = np.arange(n)
+        rows["price"] = aligned["price"].to_numpy(dtype=np.float64)
+        rows["open"] = aligned["open"].to_numpy(dtype=np.float64)
+        rows["change"] = aligned["change"].to_numpy(dtype=np.float64)
+        rows["volume"] = aligned["volume"].fillna(0).to_numpy(dtype=np.int64)
+        rows["timestamp"] = aligned["timestamp"].fillna(0).to_numpy(dtype=np.int64)
+        table_changed = symbols != self._written_symbols
+
+        # Seqlock write: odd while the board is inconsistent
+        self._seq[0] += 1
+        if table_changed:
+            self._symbols[:n] = [symbol.encode() for symbol in symbols]
+            self._header["symbols_version"] += 1
+        self._records[:n] = rows
+        header = self._header
+        header["count"] = n
+        header["date"] = date.encode()
+        header["as_of"] = as_of
+        header["version"] += 1
+        version = int(header["version"][0])
+        self._seq[0] += 1
+
+        self._written_symbols = symbols
+        self._count("publishes")
+        return version
+
+    def publish_snapshot(self, snapshot: Any, symbols: Sequence[str]) -> int:
+        """Snapshot-store listener body: publishes a MarketSnapshot's latest quotes."""
+        quotes = latest_quotes(snapshot.frame, list(symbols), detail=True)
+        return self.publish(snapshot.date, quotes, symbols, snapshot.as_of.timestamp())
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._stats[name] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats: Dict[str, Any] = dict(self._stats)
+        info = self.info()
+        stats.update(writer=self.is_writer(), version=info.version if info else 0,
+                     date=info.date if info else None)
+        return stats
+
+
+def get_quote_board(app: Any) -> Optional[QuoteBoard]:
+    """
+    Returns the app's quote board, opening it on first use, or None if SHARED_QUOTES_FILE is not set.
+    Args:
+        app (Flask): The Flask application.
+    Returns:
+        QuoteBoard: The mapped board, or None.
+    """
+    path = app.config.get("SHARED_QUOTES_FILE")
+    if not path:
+        return None
+    board = app.extensions.get("quote_board")
+    if board is None:
+        board = app.extensions.setdefault(
+            "quote_board", QuoteBoard(path, int(app.config.get("SHARED_QUOTES_CAPACITY", 4096))))
+    return board
@@ -0,0 +1,159 @@
+"""
+Module-level docstring:
+Index constituent registry loaded from a JSON data file.
+The file maps index -> symbols and symbol -> name/sector/market-cap category
+(and optionally market capitalisation).
+Each load builds immutable lookup tables, including the symbol list of every
+index x sector x category view, so request-time filtering is a dict lookup.
+The file is re-read when its modification time changes; a reload swaps one
+reference, so workers pick up new membership without a restart.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .providers import union_symbols
+
+DEFAULT_PATH = os.path.join(os.path.dirname(__file__), "data", "constituents.json")
+
+
+class RegistryTables:
+    """
+    Immutable lookup tables for one version of the constituents file.
+    Attributes:
+        version (int): Load counter; changes whenever the file is reloaded.
+        indices (dict): Index name to its symbols, in file order.
+        universe (tuple): Every constituent symbol once, in index order.
+        sector_of (dict): Symbol to sector.
+        name_of (dict): Symbol to company name.
+        category_of (dict): Symbol to market-cap category.
+        market_cap_of (dict): Symbol to market capitalisation (INR crore), where the file gives one.
+        categories (frozenset): Known categories; others are not used for filtering.
+    """
+
+    def __init__(self, data: Dict[str, Any], version: int) -> None:
+        indices = data.get("indices")
+        symbols = data.get("symbols", {})
+        if not isinstance(indices, dict) or not isinstance(symbols, dict):
+            raise ValueError("Constituents file needs an 'indices' object and a 'symbols' object")
+        self.version = version
+        self.indices: Dict[str, Tuple[str, ...]] = {name: tuple(members) for name, members in indices.items()}
+        self.universe: Tuple[str, ...] = tuple(union_symbols(self.indices.values()))
+        self.sector_of: Dict[str, str] = {s: info["sector"] for s, info in symbols.items() if info.get("sector")}
+        self.name_of: Dict[str, str] = {s: info["name"] for s, info in symbols.items() if info.get("name")}
+        self.category_of: Dict[str, str] = {s: info["category"] for s, info in symbols.items() if info.get("category")}
+        self.market_cap_of: Dict[str, float] = {
+            s: float(info["market_cap"]) for s, info in symbols.items() if info.get("market_cap")}
+        self.categories = frozenset(data.get("categories", ())) | frozenset(self.category_of.values())
+
+        # Every (index, sector, category) view; None stands for "no filter"
+        sectors: List[Optional[str]] = [None, *sorted(set(self.sector_of.values()))]
+        categories: List[Optional[str]] = [None, *sorted(self.categories)]
+        self._views: Dict[Tuple[str, Optional[str], Optional[str]], Tuple[str, ...]] = {}
+        for index, members in self.indices.items():
+            for sector in sectors:
+                for category in categories:
+                    self._views[(index, sector, category)] = tuple(
+                        s for s in members
+                        if (sector is None or self.sector_of.get(s) == sector)
+                        and (category is None or self.category_of.get(s) == category)
+                    )
+
+    def has_index(self, index: str) -> bool:
+        return index in self.indices
+
+    def select(self, index: str, sector: Optional[str] = None, category: Optional[str] = None) -> Tuple[str, ...]:
+        """
+        Returns the symbols of an index view, in index order.
+        Args:
+            index (str): Index name.
+            sector (str): Optional sector filter; an unknown sector selects nothing.
+            category (str): Optional market-cap category; unknown values (e.g. "ALL") do not filter.
+        Returns:
+            tuple: Matching symbols.
+        """
+        if category not in self.categories:
+            category = None
+        return self._views.get((index, sector or None, category), ())
+
+
+class ConstituentRegistry:
+    """
+    Loads a constituents file and reloads it when it changes on disk.
+    Args:
+        path (str): JSON constituents file.
+        check_interval (float): Minimum seconds between modification-time checks.
+        clock (callable): Monotonic time source (injectable for tests).
+    """
+
+    def __init__(self, path: str, check_interval: float = 5.0,
+                 clock: Optional[Callable[[], float]] = None) -> None:
+        self.path = path
+        self.check_interval = check_interval
+        self._clock = clock or time.monotonic
+        self._lock = threading.Lock()
+        self._loads = 0
+        self._reload_errors = 0
+        self._stamp = self._file_stamp()
+        self._tables = self._load()
+        self._checked_at = self._clock()
+
+    def _file_stamp(self) -> Tuple[int, int]:
+        stat = os.stat(self.path)
+        return stat.st_mtime_ns, stat.st_size
+
+    def _load(self) -> RegistryTables:
+        with open(self.path) as f:
+            data = json.load(f)
+        self._loads += 1
+        return RegistryTables(data, self._loads)
+
+    def current(self) -> RegistryTables:
+        """
+        Returns the current tables, reloading first if the file changed.
+        A file that fails to load is logged and the previous tables stay in use.
+        """
+        now = self._clock()
+        if now - self._checked_at < self.check_interval or not self._lock.acquire(blocking=False):
+            return self._tables
+        try:
+            self._checked_at = now
+            stamp = self._file_stamp()
+            if stamp != self._stamp:
+                self._tables = self._load()
+                self._stamp = stamp
+                logging.getLogger().info(f"Reloaded constituents from {self.path} (version {self._tables.version})")
+        except (OSError, ValueError, KeyError, TypeError, AttributeError) as e:
+            self._reload_errors += 1
+            logging.getLogger().error(f"Could not reload constituents from {self.path}: {e}")
+        finally:
+            self._lock.release()
+        return self._tables
+
+    def stats(self) -> Dict[str, int]:
+        tables = self._tables
+        return {
+            "version": tables.version,
+            "indices": len(tables.indices),
+            "symbols": len(tables.universe),
+            "reload_errors": self._reload_errors,
+        }
+
+
+def get_registry(app: Any) -> ConstituentRegistry:
+    """
+    Returns the app's constituent registry, loading it on first use.
+    Args:
+        app (Flask): The Flask application.
+    Returns:
+        ConstituentRegistry: Registry for CONSTITUENTS_FILE (the bundled file by default).
+    """
+    path = app.config.get("CONSTITUENTS_FILE") or DEFAULT_PATH
+    registry = app.extensions.get("constituent_registry")
+    if registry is None or registry.path != path:
+        registry = ConstituentRegistry(path, float(app.config.get("CONSTITUENTS_RELOAD_INTERVAL", 5.0)))
+        app.extensions["constituent_registry"] = registry
+    return registry
@@ -1,11 +1,30 @@
-from flask import Blueprint, jsonify, request, current_app
+from flask import Blueprint, Response, jsonify, request, current_app, g, has_request_context
 from flask_cors import CORS
-import yfinance as yf
-from datetime import datetime
+from datetime import datetime, timedelta
 import logging
-import os
-from typing import Dict, Any, List, Optional
-import numpy as np
+import re
+import time
+from typing import Callable, Dict, Any, List, Optional, Sequence, Tuple
+
+from .cache import DEFAULT_TTL, get_cache
+from .delta import delta_payload, get_view_history
+from .fetch_engine import download_universe
+from .history import TIMEFRAMES, get_history_store
+from .http_cache import cache_control, prepare_response, send_prepared
+from .intraday import downsample, index_series, symbol_series
+from .metrics import CONTENT_TYPE, REGISTRY, REQUEST_SECONDS, RESPONSE_BYTES, STAGE_SECONDS, UPSTREAM_ERRORS
+from .movers import MoversTable, get_movers_tracker
+from .providers import get_provider
+from .quote_board import get_quote_board
+from .registry import get_registry
+from .scheduler import IST, is_market_open, market_today
+from .singleflight import get_singleflight
+from .snapshot import get_snapshot_store
+from .streaming import get_tile_publisher, parse_event_id
+from .tiles import build_tiles, latest_quotes
+from .treemap import get_treemap_builder
+from .upstream import STATE_VALUES
+from .wire import available_formats
 
 """
 Module-level docstring:
@@ -30,35 +49,311 @@ def handle_internal_error(e: Exception) -> Any:
     logger.error(f"Internal error: {e}")
     return jsonify(error={"code": "INTERNAL_ERROR", "message": "Server error"}), 500
 
+# --- Request logging ---
+@api_bp.before_request
+def start_request_timer() -> None:
+    """
+    Records the request start time and resets the upstream time accumulator.
+    """
+    g.request_start = time.perf_counter()
+    g.upstream_ms = 0.0
+
+@api_bp.after_request
+def log_request(response: Any) -> Any:
+    """
+    Logs one structured line per request: params, status, upstream ms and total ms.
+    Successful requests are marked for sampling; errors are always logged.
+    Args:
+        response (Response): The outgoing response.
+    Returns:
+        Response: The response, unchanged.
+    """
+    elapsed = time.perf_counter() - g.get("request_start", time.perf_counter())
+    total_ms = elapsed * 1000
+    endpoint = request.endpoint or "unknown"
+    REQUEST_SECONDS.observe(elapsed, endpoint, str(response.status_code))
+    if response.content_length is not None:
+        RESPONSE_BYTES.observe(response.content_length, endpoint)
+    logging.getLogger().info(
+        f"Request: {request.method} {request.path} params={dict(request.args)} "
+        f"status={response.status_code} upstream_ms={g.get('upstream_ms', 0.0):.1f} total_ms={total_ms:.1f}",
+        extra={"sampled": response.status_code < 400},
+    )
+    return response
+
+# --- Index constituents ---
+# Loaded from the constituents data file (see registry.py); every index view is
+# served from one download of the union of all constituents.
+def get_universe(app: Any = None) -> List[str]:
+    """
+    Returns the union of all configured index constituents.
+    Args:
+        app (Flask): The Flask application; defaults to current_app.
+    Returns:
+        list: Every constituent symbol once, in index order.
+    """
+    return list(get_registry(app or current_app).current().universe)
+
 # --- Sector mapping helper ---
 def get_sector_mapping() -> Dict[str, str]:
     """
-    Returns a static mapping of stock symbols to sectors.
-    In production, this would be dynamic or loaded from a database or file.
+    Returns the mapping of stock symbols to sectors from the constituent registry.
+    The returned dict is shared; do not modify it.
     Returns:
         dict: Mapping of symbol to sector.
     """
-    return {
-        "HDFCBANK": "FINANCE",
-        "INFY": "IT",
-        # Add more mappings as needed
-    }
+    return get_registry(current_app).current().sector_of
 
 # --- Name mapping helper ---
 def get_name_mapping() -> Dict[str, str]:
     """
-    Returns a static mapping of stock symbols to company names.
-    In production, fetch from a DB or yfinance.Ticker().info.
+    Returns the mapping of stock symbols to company names from the constituent registry.
+    The returned dict is shared; do not modify it.
     Returns:
         dict: Mapping of symbol to name.
     """
-    return {
-        "HDFCBANK": "HDFC Bank",
-        "INFY": "Infosys Ltd",
-        # Add more mappings as needed
+    return get_registry(current_app).current().name_of
+
+# --- Heatmap snapshot builder ---
+def is_past_session(date: str) -> bool:
+    """
+    Returns True if the date (YYYY-MM-DD) is before today, i.e. its data can no longer change.
+    Args:
+        date (str): Date in YYYY-MM-DD format.
+    Returns:
+        bool: Whether the date is a completed past session.
+    """
+    return date < market_today().strftime("%Y-%m-%d")
+
+def load_universe(app: Any, date: str) -> Any:
+    """
+    Loads the whole index universe for a date.
+    Past sessions are read from the local history store when one is configured
+    (downloading only days it has not synced yet); otherwise the provider is
+    called once for all constituents. Concurrent loads of the same date share
+    one upstream fetch.
+    Args:
+        app (Flask): The Flask application (used to look up the data provider).
+        date (str): Date in YYYY-MM-DD format.
+    Returns:
+        DataFrame: yfinance-shaped OHLCV frame for every constituent.
+    Raises:
+        Exception: Any provider download error is propagated to the caller.
+    """
+    def fetch() -> Any:
+        try:
+            store = get_history_store(app)
+            universe = get_universe(app)
+            if store is not None and is_past_session(date):
+                day = datetime.strptime(date, "%Y-%m-%d").date()
+                yesterday = market_today() - timedelta(days=1)
+                store.sync(get_provider(app), universe, day, yesterday)
+                return store.read_session(universe, day)
+            return download_universe(app, universe, date, date)
+        except Exception:
+            UPSTREAM_ERRORS.inc()
+            raise
+
+    started = time.perf_counter()
+    try:
+        return get_singleflight(app).do(("universe", date), fetch)
+    finally:
+        # Time spent on (or waiting for) the upstream fetch, reported in metrics and the request log line
+        elapsed = time.perf_counter() - started
+        STAGE_SECONDS.observe(elapsed, "upstream")
+        if has_request_context():
+            g.upstream_ms = g.get("upstream_ms", 0.0) + elapsed * 1000
+
+def heatmap_payload(index: str, sector: Optional[str], date: str, tiles: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Wraps one view's tiles in the heatmap response payload.
+    Args:
+        index (str): Validated index name.
+        sector (str): Optional sector filter.
+        date (str): Date in YYYY-MM-DD format.
+        tiles (list): Tile dicts of the view.
+    Returns:
+        dict: JSON-serializable response payload with a note.
+    """
+    # Always include date in response
+    response: Dict[str, Any] = {
+        "index": index,
+        "sector": sector,
+        "date": date,
+        "data": tiles
     }
 
+    # Add note/message for clarity
+    if not tiles:
+        response["note"] = "No data available for the given parameters."
+    else:
+        response["note"] = f"Records returned: {len(tiles)}"
+    return response
+
+def build_heatmap_response(df: Any, index: str, sector: Optional[str], date: str, symbols: Sequence[str],
+                           sector_map: Dict[str, str], name_map: Dict[str, str]) -> Dict[str, Any]:
+    """
+    Builds the heatmap payload for one index/sector view of a universe frame.
+    Args:
+        df (DataFrame): Universe OHLCV frame from load_universe() or a prefetched snapshot.
+        index (str): Validated index name.
+        sector (str): Optional sector filter.
+        date (str): Date in YYYY-MM-DD format.
+        symbols (sequence): Symbols of the view, already filtered by sector and category.
+        sector_map (dict): Symbol to sector.
+        name_map (dict): Symbol to company name.
+    Returns:
+        dict: JSON-serializable response payload.
+    """
+    started = time.perf_counter()
+    result: List[Dict[str, Any]] = []
+    if not df.empty and symbols:
+        # The universe is fetched in one batch; one vectorized pass over the view's symbols
+        quotes = latest_quotes(df, list(symbols))
+        result = build_tiles(quotes, list(symbols), sector_map, name_map)
+    response = heatmap_payload(index, sector, date, result)
+    STAGE_SECONDS.observe(time.perf_counter() - started, "build")
+    return response
+
+# --- Heatmap views ---
+def versioned_view(app: Any, view: tuple, variant: tuple, epoch: str, version: int, as_of: datetime,
+                   build_versioned: Callable[[], Dict[str, Any]], since: Optional[str],
+                   fmt: str) -> Tuple[tuple, Any, Callable[[], Any]]:
+    """
+    Resolves a view of versioned data (a prefetched snapshot or the shared quote board) to its cache entry.
+    A `since` token of the same epoch and an earlier version gets a delta against that version.
+    Args:
+        app (Flask): The Flask application.
+        view (tuple): (index, sector, category, date, constituents version).
+        variant (tuple): Cache key suffix of the wire format.
+        epoch (str): Epoch of the data's version numbers.
+        version (int): Current version number.
+        as_of (datetime): Fetch time of the data (Last-Modified).
+        build_versioned (callable): Builds the full payload with "version" and records it in the view history.
+        since (str): Optional version token ("<epoch>-<n>") the client already has.
+        fmt (str): Wire format.
+    Returns:
+        tuple: (cache key, TTL, loader returning a PreparedResponse).
+    """
+    given_epoch, _, number = (since or "").partition("-")
+    if given_epoch != epoch or int(number) > version:
+        # No usable version (none given, another process, or a restart): full response
+        return (view + (epoch, version) + variant, None,
+                lambda: prepare_response(app, build_versioned(), as_of, fmt))
+    since_version = int(number)
+    history = get_view_history(app)
+
+    def build_delta() -> Dict[str, Any]:
+        payload = build_versioned()
+        previous = history.get(view, since_version)
+        return payload if previous is None else delta_payload(payload, previous, since)
+
+    key = view + (epoch, version, "since", since_version) + variant
+    return key, None, lambda: prepare_response(app, build_delta(), as_of, fmt)
+
+def heatmap_view(app: Any, constituents: Any, index: str, sector: Optional[str], category: Optional[str],
+                 date: str, load_frame: Callable[[str], Any],
+                 since: Optional[str] = None, fmt: str = "json") -> Tuple[tuple, Any, Callable[[], Any]]:
+    """
+    Resolves one validated index/sector/category/date query to its response-cache entry.
+    Must be called in a request context; the loader may later run on a background refresh thread.
+    Args:
+        app (Flask): The Flask application.
+        constituents (RegistryTables): Current constituent tables.
+        index (str): Validated index name.
+        sector (str): Optional sector filter.
+        category (str): Optional category filter.
+        date (str): Validated date in YYYY-MM-DD format.
+        load_frame (callable): Returns the universe frame for a date (used when no snapshot applies).
+        since (str): Optional snapshot version token ("<epoch>-<n>") the client already has.
+        fmt (str): Wire format ("json", "columnar" or "msgpack"); each format is cached separately.
+    Returns:
+        tuple: (cache key, TTL, loader returning a PreparedResponse).
+    """
+    # Resolved here, in the request context, so background cache refreshes can reuse them
+    symbols = constituents.select(index, sector, category)
+    sector_map: Dict[str, str] = get_sector_mapping()
+    name_map: Dict[str, str] = get_name_mapping()
+    build = lambda df: build_heatmap_response(df, index, sector, date, symbols, sector_map, name_map)
+    # JSON keeps the plain keys, which the batch endpoint shares with this one
+    variant = () if fmt == "json" else ("format", fmt)
+
+    view = (index, sector, category, date, constituents.version)
+    history = get_view_history(app)
+    board = get_quote_board(app)
+    info = board.info() if board is not None else None
+    if info is not None and info.date == date:
+        # Shared quote board: tiles are read from the mapped table written by the refresher process
+        def build_from_board() -> Dict[str, Any]:
+            started = time.perf_counter()
+            used, tiles = board.tiles(view, symbols, sector_map, name_map)
+            payload = dict(heatmap_payload(index, sector, date, tiles),
+                           version=f"{used.epoch}-{used.version}", full=True)
+            history.record(view, used.version, payload["data"])
+            STAGE_SECONDS.observe(time.perf_counter() - started, "build")
+            return payload
+
+        return versioned_view(app, view, variant, info.epoch, info.version, datetime.fromtimestamp(info.as_of),
+                              build_from_board, since, fmt)
+
+    store = get_snapshot_store(app)
+    snapshot = store.latest()
+    if snapshot is not None and snapshot.date == date:
+        # Prefetched snapshot: no upstream call; each snapshot version is built once per query
+        def build_versioned() -> Dict[str, Any]:
+            payload = dict(build(snapshot.frame), version=f"{store.epoch}-{snapshot.version}", full=True)
+            history.record(view, snapshot.version, payload["data"])
+            return payload
+
+        return versioned_view(app, view, variant, store.epoch, snapshot.version, snapshot.as_of,
+                              build_versioned, since, fmt)
+    # Serve from the snapshot cache; past sessions never change, so they never expire.
+    # The registry version is part of the key so membership changes take effect at once.
+    key = (index, sector, category, date, constituents.version) + variant
+    ttl = None if is_past_session(date) else DEFAULT_TTL
+    if not symbols:
+        # Nothing to quote (e.g. an unknown sector): no market data is needed
+        return key, ttl, lambda: prepare_response(app, heatmap_payload(index, sector, date, []), fmt=fmt)
+    return key, ttl, lambda: prepare_response(app, build(load_frame(date)), fmt=fmt)
+
 # --- Endpoint ---
+# Snapshot version tokens as returned in "version": <store epoch>-<version number>
+SINCE_PATTERN = re.compile(r"^[0-9a-f]{1,32}-[0-9]{1,18}$")
+
+def repeated_param(params: Sequence[str]) -> Optional[str]:
+    """
+    Checks that none of the given query parameters appears more than once.
+    Returns:
+        str: Error message for the first repeated parameter, or None.
+    """
+    for param in params:
+        if len(request.args.getlist(param)) > 1:
+            return f"Repeated query parameter: {param}"
+    return None
+
+def parse_date(date: Optional[str]) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Validates an optional YYYY-MM-DD date; an empty value means today's session.
+    Returns:
+        tuple: (date, None) or (None, error message).
+    """
+    date = date or market_today().strftime("%Y-%m-%d")
+    try:
+        datetime.strptime(date, "%Y-%m-%d")
+    except ValueError:
+        return None, f"Invalid date format: {date}"
+    return date, None
+
+def send_view(app: Any, prepared: Any, date: Optional[str] = None) -> Any:
+    """
+    Sends a cached response body with the Cache-Control for its session.
+    Past sessions never change; anything else is revalidated while the market is open.
+    Args:
+        date (str): Session date of the view; None for data not tied to one session.
+    """
+    past = date is not None and is_past_session(date)
+    return send_prepared(app, prepared, cache_control(app, past, not past and is_market_open(datetime.now(IST))))
+
 @api_bp.route('/api/heatmap-data', methods=['GET', 'OPTIONS'])
 def heatmap_data() -> Any:
     """
@@ -68,6 +363,8 @@ def heatmap_data() -> Any:
         sector (str): Optional. Sector name (e.g., FINANCE).
         category (str): Optional. Category for filtering.
         date (str): Optional. Date in YYYY-MM-DD format. Defaults to today.
+        since (str): Optional. A "version" from an earlier response; returns only the changes since then.
+        format (str): Optional. "json" (default), "columnar" (struct-of-arrays JSON) or "msgpack".
     Returns:
         Response: JSON response with heatmap data or error message.
     """
@@ -76,44 +373,11 @@ def heatmap_data() -> Any:
     if request.method == 'OPTIONS':
         return '', 200
     try:
-        # Attach file handler directly if env var is set (for test robustness)
-        log_file = os.environ.get('NSEVIZ_LOG_FILE')
-        if log_file:
-            # Remove any existing FileHandlers for this log file to avoid duplicates
-            handlers_to_remove = []
-            for h in logger.handlers:
-                if isinstance(h, logging.FileHandler) and getattr(h, 'baseFilename', None) == log_file:
-                    handlers_to_remove.append(h)
-            for h in handlers_to_remove:
-                logger.removeHandler(h)
-                h.close()
-            fh = logging.FileHandler(log_file, mode='a')
-            fh.setLevel(logging.INFO)
-            fh.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(message)s'))
-            logger.addHandler(fh)
-            logger.setLevel(logging.INFO)
-            print(f'LOGGER HANDLERS in endpoint: {logger.handlers}')
-        # Debug log the logger name and handlers for diagnosis
-        logger.debug(f"Logger name in use: {logger.name}")
-        logger.debug(f"Logger handlers: {logger.handlers}")
-        print(f'LOGGER DIAG: name={logger.name}, handlers={logger.handlers}')
-        # Log every request with timestamp and params
-        logger.info(f"Request: {request.method} {request.path} params={dict(request.args)}")
-        logger.error(f"[DIAG] After INFO log: logger.level={logger.level}, effective={logger.getEffectiveLevel()}, handlers=[{', '.join(str((type(h), getattr(h, 'baseFilename', None), h.level)) for h in logger.handlers)}]")
-        print(f'[DIAG] After INFO log: logger.level={logger.level}, effective={logger.getEffectiveLevel()}, handlers=[{", ".join(str((type(h), getattr(h, "baseFilename", None), h.level)) for h in logger.handlers)}]')
-        # Flush all handlers to ensure log is written
-        for h in logger.handlers:
-            if hasattr(h, 'flush'):
-                h.flush()
-        # Direct root logger log
-        import logging as pylogging
-        pylogging.info(f"[DIRECT] Request: {request.method} {request.path} params={dict(request.args)}")
         # Check for repeated critical query parameters
-        critical_params = ["index", "sector", "category", "date"]
-        for param in critical_params:
-            if len(request.args.getlist(param)) > 1:
-                logger.error(f"Repeated query parameter: {param}")
-                return jsonify(error={"code": "INVALID_PARAM", "message": f"Repeated query parameter: {param}"}), 400
+        message = repeated_param(["index", "sector", "category", "date", "since", "format"])
+        if message:
+            logger.error(message)
+            return jsonify(error={"code": "INVALID_PARAM", "message": message}), 400
         # Validate required params
         index: Optional[str] = request.args.get("index")
         if not index:
@@ -121,106 +385,633 @@ def heatmap_data() -> Any:
             return jsonify(error={"code": "INVALID_PARAM", "message": "Missing required parameter: index"}), 400
         sector: Optional[str] = request.args.get("sector")
         category: Optional[str] = request.args.get("category")
-        date: Optional[str] = request.args.get("date")
+        since: Optional[str] = request.args.get("since")
+        if since is not None and not SINCE_PATTERN.match(since):
+            logger.error(f"Invalid since version: {since}")
+            return jsonify(error={"code": "INVALID_PARAM", "message": f"Invalid since version: {since}"}), 400
+        fmt: str = request.args.get("format") or "json"
+        if fmt not in available_formats():
+            logger.error(f"Unsupported format: {fmt}")
+            return jsonify(error={"code": "INVALID_PARAM", "message": f"Unsupported format: {fmt}"}), 400
         # Default date to today if not provided
-        if not date:
-            date = datetime.now().strftime("%Y-%m-%d")
-        else:
-            try:
-                # Validate date format
-                datetime.strptime(date, "%Y-%m-%d")
-            except ValueError:
-                logger.error(f"Invalid date format: {date}")
-                return jsonify(error={"code": "INVALID_PARAM", "message": f"Invalid date format: {date}"}), 400
+        date, message = parse_date(request.args.get("date"))
+        if message:
+            logger.error(message)
+            return jsonify(error={"code": "INVALID_PARAM", "message": message}), 400
         # Validate sector/category only if provided (do not reject unknown sector/category, just return empty)
-        valid_indices: Dict[str, List[str]] = {"NIFTY50": ["HDFCBANK", "INFY"], "NIFTYBANK": ["HDFCBANK"]}  # Example mapping
-        valid_sectors: set = {"FINANCE", "IT", "AUTO"}  # Example, extend as needed
-        if index not in valid_indices:
+        app = current_app._get_current_object()
+        constituents = get_registry(app).current()
+        if not constituents.has_index(index):
             logger.error(f"Invalid index: {index}")
             return jsonify(error={"code": "INVALID_PARAM", "message": f"Invalid index: {index}"}), 400
-        
-        # Fetch data (mocked or real)
-        tickers: List[str] = valid_indices[index]
-        yf_kwargs: Dict[str, Any] = {}
-        yf_kwargs['start'] = date
-        yf_kwargs['end'] = date
-        
+
+        STAGE_SECONDS.observe(time.perf_counter() - g.request_start, "validate")
+        key, ttl, loader = heatmap_view(app, constituents, index, sector, category, date,
+                                        lambda day: load_universe(app, day), since, fmt)
         try:
-            df = yf.download(tickers, group_by='ticker', **yf_kwargs)
+            prepared = get_cache(app).get(key, loader, ttl=ttl)
         except Exception as yf_error:
             logger.error(f"yfinance download error: {yf_error}")
             return jsonify(error={"code": "YFINANCE_ERROR", "message": str(yf_error)}), 500
-            
-        # Check if dataframe is empty
-        if df.empty:
-            return jsonify({
-                "index": index,
-                "sector": sector,
-                "date": date,
-                "data": [],
-                "note": "No data available for the given parameters."
-            }), 200
-            
-        sector_map: Dict[str, str] = get_sector_mapping()
-        name_map: Dict[str, str] = get_name_mapping()
-        result: List[Dict[str, Any]] = []
+        # The body was encoded once when cached; answer conditional polls with 304
+        started = time.perf_counter()
+        body = send_view(app, prepared, date)
+        STAGE_SECONDS.observe(time.perf_counter() - started, "serialize")
+        return body
         
-        for symbol in tickers:
-            if sector and sector_map.get(symbol) != sector:
-                continue
+    except Exception as e:
+        logger.error(f"yfinance error: {e}")
+        return jsonify(error={"code": "YFINANCE_ERROR", "message": str(e)}), 500
+
+# --- Batch endpoint ---
+MAX_BATCH_QUERIES = 50
+
+def validate_batch_query(query: Any, constituents: Any) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """
+    Validates one batch query object with the same rules as /api/heatmap-data.
+    Args:
+        query: Decoded JSON value for one query.
+        constituents (RegistryTables): Current constituent tables.
+    Returns:
+        tuple: (normalized query with index/sector/category/date, None) or (None, error message).
+    """
+    if not isinstance(query, dict):
+        return None, "Each query must be an object"
+    for param in ("index", "sector", "category", "date"):
+        if query.get(param) is not None and not isinstance(query[param], str):
+            return None, f"Invalid parameter type: {param}"
+    index = query.get("index")
+    if not index:
+        return None, "Missing required parameter: index"
+    date, message = parse_date(query.get("date"))
+    if message:
+        return None, message
+    if not constituents.has_index(index):
+        return None, f"Invalid index: {index}"
+    return {"index": index, "sector": query.get("sector"), "category": query.get("category"), "date": date}, None
+
+@api_bp.route('/api/heatmap-data/batch', methods=['POST', 'OPTIONS'])
+def heatmap_data_batch() -> Any:
+    """
+    API endpoint returning several heatmap views in one response.
+    Request Body (JSON):
+        queries (list): Up to MAX_BATCH_QUERIES objects with index (required), sector, category and date.
+    Returns:
+        Response: {"results": [...]} in query order. Each result is the /api/heatmap-data
+        payload for that query, or {"error": {...}} if that query failed.
+    Every view is computed from one universe load per distinct date and shares the
+    response cache with /api/heatmap-data.
+    """
+    logger = logging.getLogger()
+    if request.method == 'OPTIONS':
+        return '', 200
+    body = request.get_json(silent=True)
+    queries = body.get("queries") if isinstance(body, dict) else None
+    if not isinstance(queries, list) or not queries:
+        logger.error("Batch request without a non-empty 'queries' list")
+        return jsonify(error={"code": "INVALID_PARAM", "message": "Request body must be {\"queries\": [...]}"}), 400
+    if len(queries) > MAX_BATCH_QUERIES:
+        logger.error(f"Batch request with {len(queries)} queries")
+        return jsonify(error={"code": "INVALID_PARAM",
+                              "message": f"At most {MAX_BATCH_QUERIES} queries per batch"}), 400
+
+    app = current_app._get_current_object()
+    constituents = get_registry(app).current()
+    frames: Dict[str, Any] = {}
+
+    def load_frame(day: str) -> Any:
+        # One universe load per date for the whole batch; failures are remembered too
+        if day not in frames:
             try:
-                # Handle both single and multi-index DataFrame
-                if hasattr(df, 'columns') and hasattr(df.columns, 'levels') and symbol in df.columns.levels[0]:
-                    stock_df = df[symbol]
-                elif symbol in df.columns:
-                    stock_df = df[[col for col in df.columns if col == symbol or (isinstance(col, tuple) and col[0] == symbol)]]
-                elif symbol in df:
-                    stock_df = df[symbol]
-                else:
-                    stock_df = df
-                if stock_df.empty:
-                    continue
-                latest = stock_df.iloc[-1]
-                if 'Close' not in latest or np.isnan(latest['Close']):
-                    continue
-                price = float(latest['Close'])
-                if 'Open' in latest and not np.isnan(latest['Open']) and latest['Open'] > 0:
-                    change = float(latest['Close'] - latest['Open']) / float(latest['Open']) * 100
-                else:
-                    change = 0.0
-                if 'Volume' in latest and not np.isnan(latest['Volume']):
-                    volume = int(latest['Volume'])
-                else:
-                    volume = 0
-                name = name_map.get(symbol, symbol)
-                result.append({
-                    "symbol": symbol,
-                    "name": name,
-                    "price": price,
-                    "change": round(change, 2),
-                    "volume": volume,
-                    "sector": sector_map.get(symbol, "UNKNOWN")
-                })
-            except Exception as symbol_error:
-                logger.error(f"Error processing symbol {symbol}: {symbol_error}")
-                continue
-                
-        # Always include date in response
-        response: Dict[str, Any] = {
-            "index": index,
-            "sector": sector,
-            "date": date,
-            "data": result
-        }
-        
-        # Add note/message for clarity
-        if not result:
-            response["note"] = "No data available for the given parameters."
-        else:
-            response["note"] = f"Records returned: {len(result)}"
-            
-        return jsonify(response), 200
-        
+                frames[day] = load_universe(app, day)
+            except Exception as e:
+                frames[day] = e
+        if isinstance(frames[day], Exception):
+            raise frames[day]
+        return frames[day]
+
+    parts: List[bytes] = []
+    for query in queries:
+        params, message = validate_batch_query(query, constituents)
+        if params is None:
+            parts.append(app.json.dumps({"error": {"code": "INVALID_PARAM", "message": message}}).encode("utf-8"))
+            continue
+        key, ttl, loader = heatmap_view(app, constituents, params["index"], params["sector"],
+                                        params["category"], params["date"], load_frame)
+        try:
+            # Cached bodies are already encoded; splice them in without re-serializing
+            parts.append(get_cache(app).get(key, loader, ttl=ttl).body.rstrip(b"\n"))
+        except Exception as yf_error:
+            logger.error(f"yfinance download error: {yf_error}")
+            parts.append(app.json.dumps({"error": {"code": "YFINANCE_ERROR", "message": str(yf_error)}}).encode("utf-8"))
+    return Response(b'{"results":[' + b",".join(parts) + b"]}\n", status=200, mimetype=app.json.mimetype)
+
+# --- Streaming endpoint ---
+def view_tiles(app: Any, frame: Any, view: Tuple[str, Optional[str], Optional[str]]) -> List[Dict[str, Any]]:
+    """
+    Computes the tiles of one (index, sector, category) view of a universe frame.
+    Runs on the snapshot publishing thread, so it opens its own app context.
+    """
+    index, sector, category = view
+    with app.app_context():
+        symbols = list(get_registry(app).current().select(index, sector, category))
+        if frame.empty or not symbols:
+            return []
+        return build_tiles(latest_quotes(frame, symbols), symbols, get_sector_mapping(), get_name_mapping())
+
+@api_bp.route('/api/heatmap-stream', methods=['GET'])
+def heatmap_stream() -> Any:
+    """
+    Server-Sent Events stream of tile updates for one index/sector/category view.
+    Query Parameters:
+        index (str): Required. Index name (e.g., NIFTY50).
+        sector (str): Optional. Sector name.
+        category (str): Optional. Category for filtering.
+    Returns:
+        Response: text/event-stream. Each "tiles" event carries {"version", "full", "tiles", "removed"};
+        the first event has the full view, later ones only changed tiles and removed symbols.
+        Updates are pushed when a new market snapshot is published (see scheduler.py), so the
+        stream answers 503 while the prefetch scheduler is off or has not published one yet.
+    """
+    logger = logging.getLogger()
+    try:
+        message = repeated_param(["index", "sector", "category"])
+        if message:
+            logger.error(message)
+            return jsonify(error={"code": "INVALID_PARAM", "message": message}), 400
+        index: Optional[str] = request.args.get("index")
+        if not index:
+            logger.error("Missing required parameter: index")
+            return jsonify(error={"code": "INVALID_PARAM", "message": "Missing required parameter: index"}), 400
+        app = current_app._get_current_object()
+        if not get_registry(app).current().has_index(index):
+            logger.error(f"Invalid index: {index}")
+            return jsonify(error={"code": "INVALID_PARAM", "message": f"Invalid index: {index}"}), 400
+        # Updates only come from published snapshots; without them a stream would idle forever
+        if not app.config.get("PREFETCH_ENABLED"):
+            logger.error("Tile stream requested with prefetch disabled")
+            return jsonify(error={"code": "UNAVAILABLE", "message": "Streaming requires NSEVIZ_PREFETCH"}), 503
+        snapshot = get_snapshot_store(app).latest()
+        if snapshot is None:
+            logger.error("Tile stream requested before the first snapshot")
+            return jsonify(error={"code": "UNAVAILABLE", "message": "No market snapshot published yet"}), 503
+
+        publisher = get_tile_publisher(app, lambda frame, view: view_tiles(app, frame, view))
+        view = (index, request.args.get("sector") or None, request.args.get("category"))
+        subscriber = publisher.subscribe(view, snapshot,
+                                         parse_event_id(request.headers.get("Last-Event-ID", ""), publisher.epoch))
+        if subscriber is None:
+            logger.error("Stream subscriber limit reached")
+            return jsonify(error={"code": "UNAVAILABLE", "message": "Too many open streams"}), 503
+        heartbeat = float(app.config.get("STREAM_HEARTBEAT", 15.0))
+
+    except Exception as e:
+        logger.error(f"yfinance error: {e}")
+        return jsonify(error={"code": "YFINANCE_ERROR", "message": str(e)}), 500
+
+    def events() -> Any:
+        try:
+            yield b"retry: 5000\n\n"
+            yield from subscriber.events(heartbeat)
+        finally:
+            # Runs when the client disconnects and the server closes the generator
+            publisher.unsubscribe(subscriber)
+
+    return Response(events(), status=200, mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+# --- Treemap endpoint ---
+def treemap_view(app: Any, constituents: Any, index: str, category: Optional[str], date: str,
+                 load_frame: Callable[[str], Any]) -> Tuple[tuple, Any, Callable[[], Any]]:
+    """
+    Resolves one validated treemap query to its response-cache entry, like heatmap_view().
+    Returns:
+        tuple: (cache key, TTL, loader returning a PreparedResponse).
+    """
+    symbols = list(constituents.select(index, None, category))
+    sector_map: Dict[str, str] = get_sector_mapping()
+    name_map: Dict[str, str] = get_name_mapping()
+    market_caps = constituents.market_cap_of
+    builder = get_treemap_builder(app)
+    view = (index, category if category in constituents.categories else None, constituents.version)
+
+    def build(df: Any, data_key: Any, extra: Dict[str, Any]) -> Dict[str, Any]:
+        started = time.perf_counter()
+
+        def make_tiles(members: List[str]) -> List[Dict[str, Any]]:
+            return build_tiles(latest_quotes(df, members), members, sector_map, name_map) if not df.empty else []
+
+        # Sectors already built from the same data and members are reused without computing their tiles
+        tree = builder.build(data_key, index, symbols, sector_map, name_map, market_caps, make_tiles)
+        STAGE_SECONDS.observe(time.perf_counter() - started, "build")
+        count = tree["count"]
+        note = f"Records returned: {count}" if count else "No data available for the given parameters."
+        return dict({"index": index, "category": category, "date": date}, **extra, tree=tree, note=note)
+
+    store = get_snapshot_store(app)
+    snapshot = store.latest()
+    if snapshot is not None and snapshot.date == date:
+        key = ("treemap",) + view + (date, snapshot.version)
+        version = {"version": f"{store.epoch}-{snapshot.version}"}
+        data_key = ("snapshot", store.epoch, snapshot.version)
+        return key, None, lambda: prepare_response(app, build(snapshot.frame, data_key, version), snapshot.as_of)
+    key = ("treemap",) + view + (date,)
+    past = is_past_session(date)
+    ttl = None if past else DEFAULT_TTL
+    # A past session's quotes never change; today's are downloaded again when the entry expires
+    data_key = ("session", date) if past else None
+    return key, ttl, lambda: prepare_response(app, build(load_frame(date), data_key, {}))
+
+@api_bp.route('/api/treemap', methods=['GET', 'OPTIONS'])
+def treemap() -> Any:
+    """
+    API endpoint returning the index -> sector -> stock hierarchy for the treemap.
+    Query Parameters:
+        index (str): Required. Index name (e.g., NIFTY50).
+        category (str): Optional. Category for filtering.
+        date (str): Optional. Date in YYYY-MM-DD format. Defaults to today.
+    Returns:
+        Response: JSON with a "tree" whose root and sector nodes carry count, volume,
+        market_cap, market-cap-weighted change, advances, declines and unchanged.
+    """
+    logger = logging.getLogger()
+    if request.method == 'OPTIONS':
+        return '', 200
+    try:
+        message = repeated_param(["index", "category", "date"])
+        if message:
+            logger.error(message)
+            return jsonify(error={"code": "INVALID_PARAM", "message": message}), 400
+        index: Optional[str] = request.args.get("index")
+        if not index:
+            logger.error("Missing required parameter: index")
+            return jsonify(error={"code": "INVALID_PARAM", "message": "Missing required parameter: index"}), 400
+        category: Optional[str] = request.args.get("category")
+        date, message = parse_date(request.args.get("date"))
+        if message:
+            logger.error(message)
+            return jsonify(error={"code": "INVALID_PARAM", "message": message}), 400
+        app = current_app._get_current_object()
+        constituents = get_registry(app).current()
+        if not constituents.has_index(index):
+            logger.error(f"Invalid index: {index}")
+            return jsonify(error={"code": "INVALID_PARAM", "message": f"Invalid index: {index}"}), 400
+
+        STAGE_SECONDS.observe(time.perf_counter() - g.request_start, "validate")
+        key, ttl, loader = treemap_view(app, constituents, index, category, date, lambda day: load_universe(app, day))
+        try:
+            prepared = get_cache(app).get(key, loader, ttl=ttl)
+        except Exception as yf_error:
+            logger.error(f"yfinance download error: {yf_error}")
+            return jsonify(error={"code": "YFINANCE_ERROR", "message": str(yf_error)}), 500
+        return send_view(app, prepared, date)
+
+    except Exception as e:
+        logger.error(f"yfinance error: {e}")
+        return jsonify(error={"code": "YFINANCE_ERROR", "message": str(e)}), 500
+
+# --- Intraday endpoint ---
+DEFAULT_INTRADAY_POINTS = 300
+MAX_INTRADAY_POINTS = 2000
+INTRADAY_INTERVAL = "1m"
+
+def intraday_view(app: Any, constituents: Any, kind: str, name: str, date: str,
+                  points: int) -> Tuple[tuple, Any, Callable[[], Any]]:
+    """
+    Resolves one validated intraday query to its response-cache entry.
+    The full-resolution series of a (symbol or index, session) is cached once and
+    shared by every point budget; each budget's downsampled body is cached on its own.
+    Args:
+        app (Flask): The Flask application.
+        constituents (RegistryTables): Current constituent tables.
+        kind (str): "symbol" or "index".
+        name (str): Validated symbol or index name.
+        date (str): Validated session date in YYYY-MM-DD format.
+        points (int): Validated point budget.
+    Returns:
+        tuple: (cache key, TTL, loader returning a PreparedResponse).
+    """
+    symbols = [name] if kind == "symbol" else list(constituents.select(name))
+    market_caps = constituents.market_cap_of
+    provider = get_provider(app)
+    cache = get_cache(app)
+    ttl = None if is_past_session(date) else DEFAULT_TTL
+    view = (kind, name, date, constituents.version)
+
+    def load_series() -> Any:
+        def fetch() -> Any:
+            try:
+                return provider.download_intraday(symbols, date, INTRADAY_INTERVAL)
+            except Exception:
+                UPSTREAM_ERRORS.inc()
+                raise
+
+        frame = get_singleflight(app).do(("intraday", tuple(symbols), date), fetch)
+        return symbol_series(frame, name) if kind == "symbol" else index_series(frame, symbols, market_caps)
+
+    def build() -> Any:
+        series = cache.get(("intraday-series",) + view, load_series, ttl=ttl)
+        started = time.perf_counter()
+        data = downsample(series, points)
+        STAGE_SECONDS.observe(time.perf_counter() - started, "build")
+        note = (f"Records returned: {len(data)} of {len(series[0])}" if data
+                else "No data available for the given parameters.")
+        payload = {kind: name, "date": date, "interval": INTRADAY_INTERVAL, "points": points,
+                   "raw_points": len(series[0]), "data": data, "note": note}
+        return prepare_response(app, payload)
+
+    return ("intraday",) + view + (points,), ttl, build
+
+@api_bp.route('/api/intraday', methods=['GET', 'OPTIONS'])
+def intraday() -> Any:
+    """
+    API endpoint returning one session's intraday price line for a symbol or an index,
+    downsampled server-side (LTTB) to a point budget.
+    Query Parameters:
+        symbol (str): A constituent symbol (e.g., INFY). Exactly one of symbol/index is required.
+        index (str): An index name (e.g., NIFTY50); its level is derived from the constituents.
+        date (str): Optional. Session date in YYYY-MM-DD format. Defaults to today.
+        points (int): Optional. Maximum points returned (3-2000, default 300).
+    Returns:
+        Response: JSON with "data": [{"time": epoch seconds, "price": value}, ...].
+    """
+    logger = logging.getLogger()
+    if request.method == 'OPTIONS':
+        return '', 200
+    try:
+        message = repeated_param(["symbol", "index", "date", "points"])
+        if message:
+            logger.error(message)
+            return jsonify(error={"code": "INVALID_PARAM", "message": message}), 400
+        symbol: Optional[str] = request.args.get("symbol")
+        index: Optional[str] = request.args.get("index")
+        if bool(symbol) == bool(index):
+            logger.error("Exactly one of symbol or index is required")
+            return jsonify(error={"code": "INVALID_PARAM", "message": "Exactly one of symbol or index is required"}), 400
+        date, message = parse_date(request.args.get("date"))
+        if message:
+            logger.error(message)
+            return jsonify(error={"code": "INVALID_PARAM", "message": message}), 400
+        raw_points = request.args.get("points", str(DEFAULT_INTRADAY_POINTS))
+        if not raw_points.isdigit() or not 3 <= int(raw_points) <= MAX_INTRADAY_POINTS:
+            logger.error(f"Invalid points: {raw_points}")
+            return jsonify(error={"code": "INVALID_PARAM", "message": f"Invalid points: {raw_points}"}), 400
+        app = current_app._get_current_object()
+        constituents = get_registry(app).current()
+        if symbol and symbol not in constituents.universe:
+            logger.error(f"Invalid symbol: {symbol}")
+            return jsonify(error={"code": "INVALID_PARAM", "message": f"Invalid symbol: {symbol}"}), 400
+        if index and not constituents.has_index(index):
+            logger.error(f"Invalid index: {index}")
+            return jsonify(error={"code": "INVALID_PARAM", "message": f"Invalid index: {index}"}), 400
+
+        STAGE_SECONDS.observe(time.perf_counter() - g.request_start, "validate")
+        kind, name = ("symbol", symbol) if symbol else ("index", index)
+        key, ttl, loader = intraday_view(app, constituents, kind, name, date, int(raw_points))
+        try:
+            prepared = get_cache(app).get(key, loader, ttl=ttl)
+        except Exception as yf_error:
+            logger.error(f"yfinance download error: {yf_error}")
+            return jsonify(error={"code": "YFINANCE_ERROR", "message": str(yf_error)}), 500
+        return send_view(app, prepared, date)
+
     except Exception as e:
         logger.error(f"yfinance error: {e}")
-        return jsonify(error={"code": "YFINANCE_ERROR", "message": str(e)}), 500
\ No newline at end of file
+        return jsonify(error={"code": "YFINANCE_ERROR", "message": str(e)}), 500
+
+# --- Stock history endpoint ---
+@api_bp.route('/api/history', methods=['GET', 'OPTIONS'])
+def stock_history() -> Any:
+    """
+    API endpoint returning a symbol's OHLCV bars for one chart timeframe.
+    Every timeframe is read from the history store's precomputed daily/weekly/monthly
+    bars; only days the store has not synced yet are downloaded (once).
+    Query Parameters:
+        symbol (str): Required. A constituent symbol (e.g., INFY).
+        timeframe (str): Required. One of 5D, 1M, 6M, 1Y, MAX.
+    Returns:
+        Response: JSON with "interval" ("1d", "1wk" or "1mo") and "data": [{date, open, high, low, close, volume}].
+    """
+    logger = logging.getLogger()
+    if request.method == 'OPTIONS':
+        return '', 200
+    try:
+        message = repeated_param(["symbol", "timeframe"])
+        if message:
+            logger.error(message)
+            return jsonify(error={"code": "INVALID_PARAM", "message": message}), 400
+        for param in ["symbol", "timeframe"]:
+            if not request.args.get(param):
+                logger.error(f"Missing required parameter: {param}")
+                return jsonify(error={"code": "INVALID_PARAM", "message": f"Missing required parameter: {param}"}), 400
+        symbol: str = request.args["symbol"]
+        timeframe: str = request.args["timeframe"].upper()
+        if timeframe not in TIMEFRAMES:
+            logger.error(f"Invalid timeframe: {timeframe}")
+            return jsonify(error={"code": "INVALID_PARAM", "message": f"Invalid timeframe: {timeframe}"}), 400
+        app = current_app._get_current_object()
+        if symbol not in get_registry(app).current().universe:
+            logger.error(f"Invalid symbol: {symbol}")
+            return jsonify(error={"code": "INVALID_PARAM", "message": f"Invalid symbol: {symbol}"}), 400
+        store = get_history_store(app)
+        if store is None:
+            logger.error("History store is not configured")
+            return jsonify(error={"code": "UNAVAILABLE", "message": "History store is not configured"}), 503
+
+        STAGE_SECONDS.observe(time.perf_counter() - g.request_start, "validate")
+        yesterday = market_today() - timedelta(days=1)
+        first = yesterday - timedelta(days=int(365.25 * float(app.config.get("HISTORY_BACKFILL_YEARS", 10))))
+
+        def sync() -> Any:
+            try:
+                return store.sync(get_provider(app), [symbol], first, yesterday)
+            except Exception:
+                UPSTREAM_ERRORS.inc()
+                raise
+
+        try:
+            # A no-op (no network) once the store covers every day through yesterday
+            started = time.perf_counter()
+            get_singleflight(app).do(("history", symbol, yesterday), sync)
+            STAGE_SECONDS.observe(time.perf_counter() - started, "upstream")
+        except Exception as yf_error:
+            logger.error(f"yfinance download error: {yf_error}")
+            return jsonify(error={"code": "YFINANCE_ERROR", "message": str(yf_error)}), 500
+
+        def build() -> Any:
+            started = time.perf_counter()
+            data = store.read_timeframe(symbol, timeframe)
+            STAGE_SECONDS.observe(time.perf_counter() - started, "build")
+            note = f"Records returned: {len(data)}" if data else "No data available for the given parameters."
+            interval = {"daily": "1d", "weekly": "1wk", "monthly": "1mo"}[TIMEFRAMES[timeframe][0]]
+            return prepare_response(app, {"symbol": symbol, "timeframe": timeframe, "interval": interval,
+                                          "data": data, "note": note})
+
+        # The store version changes on every write, so cached bodies never go stale
+        prepared = get_cache(app).get(("history", symbol, timeframe, store.version(symbol)), build, ttl=None)
+        return send_view(app, prepared)
+
+    except Exception as e:
+        logger.error(f"yfinance error: {e}")
+        return jsonify(error={"code": "YFINANCE_ERROR", "message": str(e)}), 500
+
+# --- Movers endpoint ---
+DEFAULT_MOVERS_K = 10
+MAX_MOVERS_K = 50
+
+def movers_view(app: Any, constituents: Any, index: str, sector: Optional[str], category: Optional[str],
+                date: str, k: int, load_frame: Callable[[str], Any]) -> Tuple[tuple, Any, Callable[[], Any]]:
+    """
+    Resolves one validated movers query to its response-cache entry.
+    The universe quote arrays are built once per snapshot (or per date without one)
+    and shared by every view and K.
+    Returns:
+        tuple: (cache key, TTL, loader returning a PreparedResponse).
+    """
+    symbols = constituents.select(index, sector, category)
+    sector_map: Dict[str, str] = get_sector_mapping()
+    name_map: Dict[str, str] = get_name_mapping()
+    view = (index, sector or None, category if category in constituents.categories else None, constituents.version)
+
+    def build(table: MoversTable, extra: Dict[str, Any]) -> Any:
+        started = time.perf_counter()
+        selected = table.movers(view, symbols, k)
+        lists = {name: table.entries(positions, sector_map, name_map) for name, positions in selected.items()}
+        STAGE_SECONDS.observe(time.perf_counter() - started, "build")
+        count = len(table.positions(view, symbols))
+        note = f"Symbols ranked: {count}" if count else "No data available for the given parameters."
+        return dict({"index": index, "sector": sector, "date": date, "k": k}, **extra, **lists, note=note)
+
+    store = get_snapshot_store(app)
+    snapshot = store.latest()
+    if snapshot is not None and snapshot.date == date:
+        tracker = get_movers_tracker(app, lambda: get_universe(app))
+        version = {"version": f"{store.epoch}-{snapshot.version}"}
+        loader = lambda: prepare_response(app, build(tracker.table(snapshot), version), snapshot.as_of)
+        return ("movers",) + view + (date, k, snapshot.version), None, loader
+    ttl = None if is_past_session(date) else DEFAULT_TTL
+    cache = get_cache(app)
+    universe = get_universe(app)
+
+    def load_table() -> MoversTable:
+        return MoversTable.from_frame(load_frame(date), universe)
+
+    def loader() -> Any:
+        table = cache.get(("movers-table", date, constituents.version), load_table, ttl=ttl)
+        return prepare_response(app, build(table, {}))
+
+    return ("movers",) + view + (date, k), ttl, loader
+
+@api_bp.route('/api/movers', methods=['GET', 'OPTIONS'])
+def movers() -> Any:
+    """
+    API endpoint returning the top gainers, losers and volume leaders of an index view.
+    Query Parameters:
+        index (str): Required. Index name (e.g., NIFTY50).
+        sector (str): Optional. Sector name (e.g., FINANCE).
+        category (str): Optional. Category for filtering.
+        date (str): Optional. Date in YYYY-MM-DD format. Defaults to today.
+        k (int): Optional. Entries per list (1-50, default 10).
+    Returns:
+        Response: JSON with "gainers" (change > 0, highest first), "losers" (change < 0, lowest first)
+        and "volume" (highest volume first), each a list of heatmap tiles.
+    """
+    logger = logging.getLogger()
+    if request.method == 'OPTIONS':
+        return '', 200
+    try:
+        message = repeated_param(["index", "sector", "category", "date", "k"])
+        if message:
+            logger.error(message)
+            return jsonify(error={"code": "INVALID_PARAM", "message": message}), 400
+        index: Optional[str] = request.args.get("index")
+        if not index:
+            logger.error("Missing required parameter: index")
+            return jsonify(error={"code": "INVALID_PARAM", "message": "Missing required parameter: index"}), 400
+        sector: Optional[str] = request.args.get("sector")
+        category: Optional[str] = request.args.get("category")
+        date, message = parse_date(request.args.get("date"))
+        if message:
+            logger.error(message)
+            return jsonify(error={"code": "INVALID_PARAM", "message": message}), 400
+        raw_k = request.args.get("k", str(DEFAULT_MOVERS_K))
+        if not raw_k.isdigit() or not 1 <= int(raw_k) <= MAX_MOVERS_K:
+            logger.error(f"Invalid k: {raw_k}")
+            return jsonify(error={"code": "INVALID_PARAM", "message": f"Invalid k: {raw_k}"}), 400
+        app = current_app._get_current_object()
+        constituents = get_registry(app).current()
+        if not constituents.has_index(index):
+            logger.error(f"Invalid index: {index}")
+            return jsonify(error={"code": "INVALID_PARAM", "message": f"Invalid index: {index}"}), 400
+
+        STAGE_SECONDS.observe(time.perf_counter() - g.request_start, "validate")
+        key, ttl, loader = movers_view(app, constituents, index, sector, category, date, int(raw_k),
+                                       lambda day: load_universe(app, day))
+        try:
+            prepared = get_cache(app).get(key, loader, ttl=ttl)
+        except Exception as yf_error:
+            logger.error(f"yfinance download error: {yf_error}")
+            return jsonify(error={"code": "YFINANCE_ERROR", "message": str(yf_error)}), 500
+        return send_view(app, prepared, date)
+
+    except Exception as e:
+        logger.error(f"yfinance error: {e}")
+        return jsonify(error={"code": "YFINANCE_ERROR", "message": str(e)}), 500
+
+@api_bp.route('/api/cache-stats', methods=['GET'])
+def cache_stats() -> Any:
+    """
+    API endpoint exposing heatmap snapshot cache counters for monitoring.
+    Returns:
+        Response: JSON object with hits, stale_hits, misses, evictions, refreshes and size,
+        plus single-flight counters for upstream fetches under "singleflight",
+        treemap sector reuse counters under "treemap" and, for providers with a
+        resilient client, call/retry counters and breaker/rate-limiter state under "upstream".
+    """
+    stats: Dict[str, Any] = get_cache(current_app).stats()
+    stats["singleflight"] = get_singleflight(current_app).stats()
+    stats["treemap"] = get_treemap_builder(current_app).stats()
+    client = getattr(get_provider(current_app), "client", None)
+    if client is not None:
+        stats["upstream"] = client.stats()
+    return jsonify(stats), 200
+
+@api_bp.route('/api/metrics', methods=['GET'])
+def metrics() -> Any:
+    """
+    API endpoint exposing in-process metrics in Prometheus text format.
+    Includes per-stage latency histograms, request latency and payload sizes,
+    upstream error counts, the app's cache and single-flight counters, the
+    upstream client's circuit breaker state and counters, and the loaded
+    constituents version.
+    Returns:
+        Response: text/plain Prometheus exposition.
+    """
+    cache = get_cache(current_app).stats()
+    flights = get_singleflight(current_app).stats()
+    constituents = get_registry(current_app).stats()
+    extra = [
+        ("nseviz_cache_hits_total", "counter", "Fresh heatmap cache hits.", cache["hits"]),
+        ("nseviz_cache_stale_hits_total", "counter", "Stale heatmap cache hits served while refreshing.", cache["stale_hits"]),
+        ("nseviz_cache_misses_total", "counter", "Heatmap cache misses.", cache["misses"]),
+        ("nseviz_cache_evictions_total", "counter", "Heatmap cache LRU evictions.", cache["evictions"]),
+        ("nseviz_cache_entries", "gauge", "Heatmap cache entries.", cache["size"]),
+        ("nseviz_upstream_fetches_total", "counter", "Upstream fetches executed.", flights["executions"]),
+        ("nseviz_upstream_coalesced_total", "counter", "Requests that shared an in-flight upstream fetch.", flights["coalesced"]),
+        ("nseviz_constituents_version", "gauge", "Loads of the constituents file.", constituents["version"]),
+        ("nseviz_constituents_symbols", "gauge", "Symbols across all configured indices.", constituents["symbols"]),
+        ("nseviz_constituents_reload_errors_total", "counter", "Constituents reloads that failed.", constituents["reload_errors"]),
+    ]
+    client = getattr(get_provider(current_app), "client", None)
+    if client is not None:
+        upstream = client.stats()
+        breaker = upstream["breaker"]
+        extra += [
+            ("nseviz_upstream_breaker_state", "gauge", "Upstream circuit breaker: 0 closed, 1 half-open, 2 open.",
+             STATE_VALUES[breaker["state"]]),
+            ("nseviz_upstream_breaker_trips_total", "counter", "Times the upstream circuit breaker opened.", breaker["trips"]),
+            ("nseviz_upstream_rejected_total", "counter", "Upstream calls rejected while the breaker was open.", breaker["rejected"]),
+            ("nseviz_upstream_retries_total", "counter", "Upstream calls retried after a transient failure.", upstream["retries"]),
+            ("nseviz_upstream_served_stale_total", "counter", "Last-known-good results served while the breaker was open.", upstream["served_stale"]),
+        ]
+    return Response(REGISTRY.render(extra), status=200, content_type=CONTENT_TYPE)
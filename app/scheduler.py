@@ -0,0 +1,205 @@
+"""
+Module-level docstring:
+Background prefetch scheduler for market data.
+During NSE trading hours the scheduler downloads the whole universe on a fixed
+cadence and publishes it as an immutable snapshot; after the close it refreshes
+once more and then idles until the next session. Requests read the snapshot and
+never wait on the upstream download, and upstream load stays constant no matter
+how many clients are polling.
+"""
+import logging
+import threading
+from datetime import date as date_cls, datetime, time, timedelta, timezone
+from typing import Any, Callable, List, Optional, Tuple
+
+from .fetch_engine import download_universe
+from .quote_board import get_quote_board
+from .snapshot import MarketSnapshot, get_snapshot_store
+
+# NSE trades 09:15-15:30 IST, Monday to Friday (exchange holidays are not modelled)
+IST = timezone(timedelta(hours=5, minutes=30))
+MARKET_OPEN = time(9, 15)
+MARKET_CLOSE = time(15, 30)
+
+
+def market_today() -> date_cls:
+    """Returns today's date on the exchange calendar (IST), whatever the host's timezone."""
+    return datetime.now(IST).date()
+
+
+def is_market_open(now: datetime) -> bool:
+    """
+    Returns True if the given IST time falls inside an NSE trading session.
+    Args:
+        now (datetime): Time in IST.
+    Returns:
+        bool: Whether the market is open.
+    """
+    return now.weekday() < 5 and MARKET_OPEN <= now.time() <= MARKET_CLOSE
+
+
+def refresh_snapshot(app: Any, symbols: List[str]) -> MarketSnapshot:
+    """
+    Downloads today's session for the symbols in one batch and publishes it.
+    Provider ranges include their end date, so the range is today..today.
+    Args:
+        app (Flask): The Flask application (provider and snapshot store owner).
+        symbols (list): Universe symbols to download.
+    Returns:
+        MarketSnapshot: The published snapshot.
+    """
+    today = market_today().strftime("%Y-%m-%d")
+    frame = download_universe(app, symbols, today, today)
+    return get_snapshot_store(app).publish(today, frame)
+
+
+class PrefetchScheduler:
+    """
+    Calls refresh() on a fixed cadence while the market is open, once after the
+    close, and once at startup so the first request already has a snapshot.
+    Args:
+        refresh (callable): Fetches and publishes a snapshot; exceptions are logged.
+        interval (float): Seconds between ticks.
+        clock (callable): Returns the current IST time; replaceable in tests.
+        follow (callable): Optional; called first on every tick, at any hour. While it
+            returns True another process is refreshing and this tick does nothing else.
+    """
+
+    def __init__(self, refresh: Callable[[], Any], interval: float = 60.0,
+                 clock: Optional[Callable[[], datetime]] = None,
+                 follow: Optional[Callable[[], bool]] = None) -> None:
+        self.refresh = refresh
+        self.interval = interval
+        self.clock = clock or (lambda: datetime.now(IST))
+        self.follow = follow
+        self.refresh_count = 0
+        self.error_count = 0
+        self._last_refresh: Optional[datetime] = None
+        self._closed_on: Optional[date_cls] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def is_due(self, now: datetime) -> bool:
+        """
+        Returns True if a refresh should run at the given IST time.
+        """
+        if self._last_refresh is None or is_market_open(now):
+            return True
+        # One closing refresh per trading day, after the session ends
+        return now.weekday() < 5 and now.time() > MARKET_CLOSE and self._closed_on != now.date()
+
+    def tick(self) -> bool:
+        """
+        Runs one scheduling step.
+        Returns:
+            bool: True if a refresh ran successfully.
+        """
+        now = self.clock()
+        try:
+            if self.follow is not None and self.follow():
+                return False
+            if not self.is_due(now):
+                return False
+            self.refresh()
+        except Exception as e:
+            self.error_count += 1
+            logging.getLogger().error(f"Prefetch refresh failed: {e}")
+            return False
+        self.refresh_count += 1
+        self._last_refresh = now
+        if now.time() > MARKET_CLOSE:
+            self._closed_on = now.date()
+        return True
+
+    def _run(self) -> None:
+        self.tick()
+        while not self._stop.wait(self.interval):
+            self.tick()
+
+    @property
+    def running(self) -> bool:
+        """True while the scheduler thread runs in this process (threads do not survive a fork)."""
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        """Starts the scheduler on a daemon thread (no-op if already running)."""
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True, name="nseviz-prefetch")
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Signals the scheduler thread to exit and waits for it."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+
+def start_prefetch(app: Any, symbols_fn: Callable[[], List[str]]) -> PrefetchScheduler:
+    """
+    Creates and starts the app's prefetch scheduler.
+    With a shared quote board, the process that holds the board's writer lock
+    refreshes and publishes each snapshot to the board. The others download
+    nothing: on every tick they copy a new board version into their own snapshot
+    store (so streams, treemap and movers follow it too), and take over if the
+    writer exits.
+    Args:
+        app (Flask): The Flask application.
+        symbols_fn (callable): Returns the universe symbols at each refresh.
+    Returns:
+        PrefetchScheduler: The running scheduler.
+    """
+    board = get_quote_board(app)
+    store = get_snapshot_store(app)
+    follow = None
+    if board is not None:
+        mirrored: Optional[Tuple[str, int]] = None
+
+        def follow() -> bool:
+            nonlocal mirrored
+            if board.acquire_writer():
+                return False
+            info = board.info()
+            if info is not None and (info.epoch, info.version) != mirrored:
+                info, frame = board.frame()
+                mirrored = (info.epoch, info.version)
+                store.publish(info.date, frame, datetime.fromtimestamp(info.as_of))
+            return True
+
+        def publish_to_board(snapshot: MarketSnapshot) -> None:
+            # Mirrored snapshots come from the board; only the writer's own downloads go back to it
+            if board.is_writer():
+                board.publish_snapshot(snapshot, symbols_fn())
+
+        store.add_listener(publish_to_board)
+    scheduler = PrefetchScheduler(lambda: refresh_snapshot(app, symbols_fn()),
+                                  interval=float(app.config.get("PREFETCH_INTERVAL", 60.0)), follow=follow)
+    app.extensions["prefetch_scheduler"] = scheduler
+    scheduler.start()
+    return scheduler
+
+
+_start_lock = threading.Lock()
+
+
+def ensure_prefetch(app: Any, symbols_fn: Callable[[], List[str]]) -> PrefetchScheduler:
+    """
+    Starts the app's prefetch scheduler in this process unless it is already running here.
+    Called on every request when the app was warmed up before forking, so that each
+    worker (and only a process that serves requests) runs its own scheduler.
+    Args:
+        app (Flask): The Flask application.
+        symbols_fn (callable): Returns the universe symbols at each refresh.
+    Returns:
+        PrefetchScheduler: The running scheduler.
+    """
+    scheduler = app.extensions.get("prefetch_scheduler")
+    if scheduler is not None and scheduler.running:
+        return scheduler
+    with _start_lock:
+        scheduler = app.extensions.get("prefetch_scheduler")
+        if scheduler is None:
+            return start_prefetch(app, symbols_fn)
+        scheduler.start()
+        return scheduler
@@ -0,0 +1,91 @@
+"""
+Module-level docstring:
+Single-flight request coalescing.
+Concurrent callers asking for the same key share one in-flight execution:
+the first caller runs the function, the others wait for it and receive the
+same result (or the same exception). Used in front of upstream downloads so a
+burst of identical requests at market open costs one yfinance call.
+"""
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+class _Call:
+    """State of one in-flight execution shared by its waiters."""
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key across threads.
+    """
+
+    def __init__(self) -> None:
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+        self._stats: Dict[str, int] = {"calls": 0, "executions": 0, "coalesced": 0}
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """
+        Runs fn once per key among concurrent callers and returns its result.
+        Args:
+            key (hashable): Identity of the work, e.g. ("universe", date).
+            fn (callable): The work; its exception is re-raised in every waiter.
+        Returns:
+            Any: The result of the shared execution.
+        """
+        with self._lock:
+            self._stats["calls"] += 1
+            call = self._calls.get(key)
+            if call is not None:
+                self._stats["coalesced"] += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                self._stats["executions"] += 1
+                leader = True
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            # Forget the key first so later callers start a fresh execution
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+        return call.result
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Returns counters: calls, executions and coalesced (calls that shared another's execution).
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["in_flight"] = len(self._calls)
+        return stats
+
+
+def get_singleflight(app: Any) -> SingleFlight:
+    """
+    Returns the app's single-flight group for upstream fetches, creating it on first use.
+    Args:
+        app (Flask): The Flask application.
+    Returns:
+        SingleFlight: The group for this app.
+    """
+    group = app.extensions.get("upstream_singleflight")
+    if group is None:
+        group = app.extensions.setdefault("upstream_singleflight", SingleFlight())
+    return group
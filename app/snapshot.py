@@ -0,0 +1,95 @@
+"""
+Module-level docstring:
+Immutable market snapshots and the per-app store that publishes them.
+A snapshot holds the universe OHLCV frame for one session date. Writers publish
+a new snapshot object; readers only ever see a complete, unchanging snapshot.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+import uuid
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, List, Optional
+
+from .lazy import lazy_import
+
+pd = lazy_import("pandas", globals())
+
+
+@dataclass(frozen=True)
+class MarketSnapshot:
+    """
+    Universe data for one session date.
+    Attributes:
+        version (int): Monotonically increasing publish counter.
+        date (str): Session date (YYYY-MM-DD).
+        as_of (datetime): When the data was fetched.
+        frame (DataFrame): yfinance-shaped OHLCV frame; treat as read-only.
+    """
+    version: int
+    date: str
+    as_of: datetime
+    frame: pd.DataFrame
+
+
+class SnapshotStore:
+    """
+    Holds the latest published MarketSnapshot.
+    Publishing swaps a single reference, so readers need no lock. Listeners are
+    called with each new snapshot on the publishing thread. `epoch` is random per
+    store, so version numbers from another process or a restart can be told apart.
+    """
+
+    def __init__(self) -> None:
+        self.epoch = uuid.uuid4().hex[:8]
+        self._latest: Optional[MarketSnapshot] = None
+        self._version = 0
+        self._lock = threading.Lock()
+        self._listeners: List[Callable[[MarketSnapshot], None]] = []
+
+    def add_listener(self, listener: Callable[[MarketSnapshot], None]) -> None:
+        """Registers a callable invoked with every snapshot published from now on."""
+        self._listeners.append(listener)
+
+    def publish(self, date: str, frame: pd.DataFrame, as_of: Optional[datetime] = None) -> MarketSnapshot:
+        """
+        Publishes a new snapshot for a session date.
+        Args:
+            date (str): Session date (YYYY-MM-DD).
+            frame (DataFrame): Universe OHLCV frame; must not be mutated afterwards.
+            as_of (datetime): Fetch time; defaults to now.
+        Returns:
+            MarketSnapshot: The published snapshot.
+        """
+        with self._lock:
+            self._version += 1
+            snapshot = MarketSnapshot(self._version, date, as_of or datetime.now(), frame)
+            self._latest = snapshot
+        for listener in list(self._listeners):
+            try:
+                listener(snapshot)
+            except Exception as e:
+                logging.getLogger().error(f"Snapshot listener failed: {e}")
+        return snapshot
+
+    def latest(self) -> Optional[MarketSnapshot]:
+        """
+        Returns the most recently published snapshot, or None if nothing was published yet.
+        """
+        return self._latest
+
+
+def get_snapshot_store(app: Any) -> SnapshotStore:
+    """
+    Returns the app's snapshot store, creating it on first use.
+    Args:
+        app (Flask): The Flask application.
+    Returns:
+        SnapshotStore: The store for this app.
+    """
+    store = app.extensions.get("snapshot_store")
+    if store is None:
+        store = app.extensions.setdefault("snapshot_store", SnapshotStore())
+    return store
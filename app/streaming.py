@@ -0,0 +1,232 @@
+"""
+Module-level docstring:
+Server-Sent Events fan-out of heatmap tile updates.
+One channel exists per subscribed (index, sector, category) view. When a new
+market snapshot is published, each channel computes its tiles once, diffs them
+against the previous snapshot and encodes a single SSE event holding only the
+changed tiles and removed symbols; that same byte string is queued to every
+subscriber, so N subscribers cost one computation. Each open stream occupies
+one server thread while it waits on its queue. This is deliberate: the app runs
+on threaded WSGI servers and ships no async server, so there is no fan-out
+without a thread per client. Open streams are capped by STREAM_MAX_CLIENTS,
+which should fit the server's thread budget.
+"""
+import json
+import logging
+import queue
+import threading
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from .snapshot import get_snapshot_store
+
+View = Tuple[str, Optional[str], Optional[str]]
+TILE_FIELDS = ("price", "change", "volume")
+KEEPALIVE = b": keepalive\n\n"
+
+_create_lock = threading.Lock()
+
+
+def encode_event(epoch: str, version: int, full: bool, tiles: List[Dict[str, Any]], removed: List[str]) -> bytes:
+    """
+    Encodes one "tiles" SSE event; its id is "<store epoch>-<snapshot version>".
+    Returns:
+        bytes: Event text, terminated by a blank line.
+    """
+    data = json.dumps({"version": version, "full": full, "tiles": tiles, "removed": removed},
+                      separators=(",", ":"))
+    return f"event: tiles\nid: {epoch}-{version}\ndata: {data}\n\n".encode("utf-8")
+
+
+def parse_event_id(event_id: str, epoch: str) -> Optional[int]:
+    """
+    Returns the snapshot version of a Last-Event-ID, or None if it is malformed or
+    from another store epoch (another process or a restart), whose versions mean nothing here.
+    """
+    given_epoch, _, number = event_id.partition("-")
+    return int(number) if given_epoch == epoch and number.isdigit() else None
+
+
+def diff_tiles(previous: Dict[str, Dict[str, Any]],
+               current: Dict[str, Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """
+    Returns (changed tiles, removed symbols) between two symbol -> tile maps.
+    Only price, change and volume are compared and sent.
+    """
+    changed = [
+        {"symbol": symbol, **{field: tile[field] for field in TILE_FIELDS}}
+        for symbol, tile in current.items()
+        if symbol not in previous or any(previous[symbol][field] != tile[field] for field in TILE_FIELDS)
+    ]
+    removed = [symbol for symbol in previous if symbol not in current]
+    return changed, removed
+
+
+class Subscriber:
+    """
+    One open stream: a bounded queue of encoded events.
+    A subscriber that falls behind by more than `max_pending` events is closed;
+    its client reconnects and receives the full state again.
+    """
+
+    def __init__(self, view: View, max_pending: int = 64) -> None:
+        self.view = view
+        self._queue: "queue.Queue[Optional[bytes]]" = queue.Queue(max_pending)
+        self.closed = False
+
+    def put(self, event: bytes) -> bool:
+        try:
+            self._queue.put_nowait(event)
+            return True
+        except queue.Full:
+            self.close()
+            return False
+
+    def close(self) -> None:
+        self.closed = True
+        try:
+            self._queue.put_nowait(None)
+        except queue.Full:
+            pass  # the reader checks `closed` after its next wake-up
+
+    def events(self, heartbeat: float) -> Iterator[bytes]:
+        """Yields queued events, or a keepalive comment every `heartbeat` seconds of silence."""
+        while not self.closed:
+            try:
+                event = self._queue.get(timeout=heartbeat)
+            except queue.Empty:
+                yield KEEPALIVE
+                continue
+            if event is None:
+                return
+            yield event
+
+
+class _Channel:
+    """Subscribers of one view and the tiles they were last sent."""
+
+    def __init__(self) -> None:
+        self.subscribers: set = set()
+        self.version = 0
+        self.tiles: Dict[str, Dict[str, Any]] = {}
+        self.full_event: Optional[bytes] = None
+
+
+class TilePublisher:
+    """
+    Per-view fan-out of tile diffs.
+    Args:
+        build (callable): (frame, view) -> list of tile dicts for that view.
+        max_subscribers (int): Total open streams allowed.
+        epoch (str): Epoch of the snapshot store whose versions are published (see SnapshotStore).
+    """
+
+    def __init__(self, build: Callable[[Any, View], List[Dict[str, Any]]], max_subscribers: int = 100,
+                 epoch: str = "") -> None:
+        self._build = build
+        self.max_subscribers = max_subscribers
+        self.epoch = epoch
+        self._channels: Dict[View, _Channel] = {}
+        self._lock = threading.Lock()
+        # Serializes tile computation (publishing thread vs. a subscriber seeding a new channel)
+        self._update_lock = threading.Lock()
+        self._count = 0
+        self._stats = {"published": 0, "events": 0, "dropped": 0}
+
+    def subscribe(self, view: View, snapshot: Any = None, last_version: Optional[int] = None) -> Optional[Subscriber]:
+        """
+        Opens a stream for a view; returns None if the subscriber limit is reached.
+        The new subscriber first receives the view's full state, unless it already
+        has the current version (`last_version`, from Last-Event-ID).
+        Args:
+            view (tuple): (index, sector, category).
+            snapshot (MarketSnapshot): Latest snapshot, used to seed a new channel.
+            last_version (int): Snapshot version the client saw last (see parse_event_id).
+        """
+        subscriber = Subscriber(view)
+        # Holding the update lock means no diff can reach this subscriber before its full state
+        with self._update_lock:
+            with self._lock:
+                if self._count >= self.max_subscribers:
+                    return None
+                channel = self._channels.get(view)
+                if channel is None:
+                    channel = self._channels[view] = _Channel()
+                channel.subscribers.add(subscriber)
+                self._count += 1
+            if channel.full_event is None and snapshot is not None:
+                self._update(view, channel, snapshot)
+            if channel.full_event is not None and last_version != channel.version:
+                subscriber.put(channel.full_event)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        with self._lock:
+            channel = self._channels.get(subscriber.view)
+            if channel is None or subscriber not in channel.subscribers:
+                return
+            channel.subscribers.discard(subscriber)
+            self._count -= 1
+            if not channel.subscribers:
+                del self._channels[subscriber.view]
+        subscriber.close()
+
+    def _update(self, view: View, channel: _Channel, snapshot: Any) -> Optional[bytes]:
+        """
+        Recomputes a channel's tiles for a snapshot (caller holds the update lock).
+        Returns:
+            bytes: The diff event, or None if nothing changed.
+        """
+        if snapshot.version <= channel.version:
+            return None
+        tiles = {tile["symbol"]: tile for tile in self._build(snapshot.frame, view)}
+        changed, removed = diff_tiles(channel.tiles, tiles)
+        full = [{"symbol": s, **{f: t[f] for f in TILE_FIELDS}} for s, t in tiles.items()]
+        channel.tiles = tiles
+        channel.version = snapshot.version
+        channel.full_event = encode_event(self.epoch, snapshot.version, True, full, [])
+        if not changed and not removed:
+            return None
+        return encode_event(self.epoch, snapshot.version, False, changed, removed)
+
+    def publish(self, snapshot: Any) -> None:
+        """Snapshot listener: computes each subscribed view once and queues its diff to all subscribers."""
+        with self._lock:
+            channels = list(self._channels.items())
+        with self._update_lock:
+            for view, channel in channels:
+                try:
+                    event = self._update(view, channel, snapshot)
+                except Exception as e:
+                    logging.getLogger().error(f"Could not build stream update for {view}: {e}")
+                    continue
+                if event is None:
+                    continue
+                self._stats["events"] += 1
+                for subscriber in list(channel.subscribers):
+                    if not subscriber.put(event):
+                        self._stats["dropped"] += 1
+                        self.unsubscribe(subscriber)
+            self._stats["published"] += 1
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._stats, subscribers=self._count, channels=len(self._channels))
+
+
+def get_tile_publisher(app: Any, build: Callable[[Any, View], List[Dict[str, Any]]]) -> TilePublisher:
+    """
+    Returns the app's tile publisher, creating it and subscribing it to snapshot publishes on first use.
+    Args:
+        app (Flask): The Flask application.
+        build (callable): (frame, view) -> tiles; called on the publishing thread.
+    Returns:
+        TilePublisher: The publisher for this app.
+    """
+    with _create_lock:
+        publisher = app.extensions.get("tile_publisher")
+        if publisher is None:
+            store = get_snapshot_store(app)
+            publisher = TilePublisher(build, int(app.config.get("STREAM_MAX_CLIENTS", 100)), store.epoch)
+            app.extensions["tile_publisher"] = publisher
+            store.add_listener(publisher.publish)
+    return publisher
@@ -0,0 +1,125 @@
+"""
+Module-level docstring:
+Vectorized heatmap tile computation.
+Turns a yfinance-shaped OHLCV frame into per-symbol quotes (price, % change,
+volume) in one NumPy pass over the whole frame instead of a Python loop per
+ticker, then joins names and sectors to produce the API tiles.
+"""
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional
+
+from .lazy import lazy_import
+
+np = lazy_import("numpy", globals())
+pd = lazy_import("pandas", globals())
+
+QUOTE_FIELDS: List[str] = ["Open", "Close", "Volume"]
+
+
+def _to_float(frame: pd.DataFrame) -> np.ndarray:
+    """Returns the frame as a float matrix, coercing non-numeric cells to NaN."""
+    try:
+        return frame.to_numpy(dtype=np.float64, na_value=np.nan)
+    except (TypeError, ValueError):
+        return frame.apply(pd.to_numeric, errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+def _quote_cube(df: pd.DataFrame, symbols: List[str]) -> np.ndarray:
+    """Returns a (rows, symbols, QUOTE_FIELDS) float array; missing columns are NaN."""
+    columns = pd.MultiIndex.from_product([symbols, QUOTE_FIELDS])
+    values = _to_float(df.reindex(columns=columns))
+    return values.reshape(len(df), len(symbols), len(QUOTE_FIELDS))
+
+
+def latest_quotes(df: pd.DataFrame, symbols: List[str], detail: bool = False) -> pd.DataFrame:
+    """
+    Computes the latest quote for every symbol in one vectorized pass.
+    For each symbol the last row with a valid Close is used. The % change is
+    Close vs Open of that row (0.0 when Open is missing or not positive) and
+    a missing Volume becomes 0. Symbols without any valid Close are dropped.
+    A flat (single-ticker) frame is attributed to every symbol.
+    Args:
+        df (DataFrame): yfinance-shaped frame (group_by='ticker').
+        symbols (list): Symbols to quote, in output order.
+        detail (bool): Also return float 'open' and int 'timestamp' (epoch seconds of the
+            quoted bar; 0 when the frame is not indexed by time).
+    Returns:
+        DataFrame: Indexed by symbol with float 'price', float 'change' and int 'volume'.
+    """
+    empty = pd.DataFrame({"price": pd.Series(dtype=np.float64), "change": pd.Series(dtype=np.float64),
+                          "volume": pd.Series(dtype=np.int64)})
+    if detail:
+        empty = empty.assign(open=pd.Series(dtype=np.float64), timestamp=pd.Series(dtype=np.int64))
+    if df.empty or not symbols:
+        return empty
+    if isinstance(df.columns, pd.MultiIndex):
+        present = set(df.columns.get_level_values(0))
+        quoted = [symbol for symbol in symbols if symbol in present]
+        if not quoted:
+            return empty
+        cube = _quote_cube(df, quoted)
+    else:
+        if "Close" not in df.columns:
+            return empty
+        quoted = list(symbols)
+        flat = _to_float(df.reindex(columns=QUOTE_FIELDS))
+        cube = np.repeat(flat[:, None, :], len(quoted), axis=1)
+    open_, close, volume = cube[:, :, 0], cube[:, :, 1], cube[:, :, 2]
+
+    # Position of the last valid Close in every column
+    valid = ~np.isnan(close)
+    has_close = valid.any(axis=0)
+    last = close.shape[0] - 1 - np.argmax(valid[::-1], axis=0)
+    cols = np.arange(close.shape[1])
+    price = close[last, cols]
+    opened = open_[last, cols]
+    traded = volume[last, cols]
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        change = np.where(opened > 0, (price - opened) / opened * 100, 0.0)
+    change = np.round(np.nan_to_num(change, nan=0.0), 2)
+    traded = np.where(np.isnan(traded), 0, traded).astype(np.int64)
+
+    quotes = pd.DataFrame({"price": price, "change": change, "volume": traded}, index=pd.Index(quoted))
+    if detail:
+        quotes["open"] = opened
+        if isinstance(df.index, pd.DatetimeIndex):
+            quotes["timestamp"] = df.index.as_unit("s").asi8[last]
+        else:
+            quotes["timestamp"] = 0
+    return quotes[has_close]
+
+
+def build_tiles(quotes: pd.DataFrame, symbols: List[str], sector_map: Dict[str, str],
+                name_map: Dict[str, str], sector: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Joins quotes with names and sectors and returns the API tiles.
+    Args:
+        quotes (DataFrame): Output of latest_quotes().
+        symbols (list): Symbols of the requested view, in output order.
+        sector_map (dict): Symbol to sector.
+        name_map (dict): Symbol to company name.
+        sector (str): Optional sector filter.
+    Returns:
+        list: Tile dicts with symbol, name, price, change, volume and sector.
+    """
+    if sector:
+        symbols = [symbol for symbol in symbols if sector_map.get(symbol) == sector]
+    symbols = [symbol for symbol in symbols if symbol in quotes.index]
+    if not symbols:
+        return []
+    view = quotes.loc[symbols]
+    return [
+        {
+            "symbol": symbol,
+            "name": name_map.get(symbol, symbol),
+            "price": price,
+            "change": change,
+            "volume": volume,
+            "sector": sector_map.get(symbol, "UNKNOWN"),
+        }
+        for symbol, price, change, volume in zip(
+            symbols, view["price"].tolist(), view["change"].tolist(), view["volume"].tolist()
+        )
+    ]
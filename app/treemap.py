@@ -0,0 +1,170 @@
+"""
+Module-level docstring:
+Server-side treemap hierarchy: index -> sector -> stock.
+Each sector node carries precomputed totals (volume, market-cap-weighted %
+change, advance/decline counts) so clients only lay out the tree. Sector nodes
+are cached by the data they were built from (snapshot version or past session)
+and the sector's members with their names and market caps. A view, category or
+constituents reload that shares a sector with an earlier build reuses its node
+without computing its tiles; only the other sectors' tiles are computed, in one pass.
+"""
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+Tiles = List[Dict[str, Any]]
+# A sector node and the unrounded sums its change was computed from: (node, sum of change * cap, sum of change)
+Entry = Tuple[Dict[str, Any], float, float]
+
+
+def _change_sums(tiles: Tiles, market_caps: Dict[str, float]) -> Tuple[float, float, float]:
+    """Returns (market cap, sum of change * market cap, sum of change) over the tiles."""
+    caps = [market_caps.get(tile["symbol"], 0.0) for tile in tiles]
+    return (sum(caps), sum(tile["change"] * cap for tile, cap in zip(tiles, caps)),
+            sum(tile["change"] for tile in tiles))
+
+
+def _weighted_change(weight: float, weighted: float, plain: float, count: int) -> float:
+    # Market-cap weighted where any cap is known, otherwise the plain mean
+    if weight > 0:
+        return weighted / weight
+    return plain / count if count else 0.0
+
+
+def sector_totals(tiles: Tiles, market_caps: Dict[str, float]) -> Dict[str, Any]:
+    """
+    Aggregates a group of tiles.
+    The % change is weighted by market capitalisation over the tiles that have
+    one; a group without any market caps uses the plain mean.
+    Args:
+        tiles (list): Heatmap tiles of the group.
+        market_caps (dict): Symbol to market capitalisation.
+    Returns:
+        dict: count, volume, market_cap, change, advances, declines and unchanged.
+    """
+    weight, weighted, plain = _change_sums(tiles, market_caps)
+    return {
+        "count": len(tiles),
+        "volume": sum(tile["volume"] for tile in tiles),
+        "market_cap": weight,
+        "change": round(_weighted_change(weight, weighted, plain, len(tiles)), 2),
+        "advances": sum(1 for tile in tiles if tile["change"] > 0),
+        "declines": sum(1 for tile in tiles if tile["change"] < 0),
+        "unchanged": sum(1 for tile in tiles if tile["change"] == 0),
+    }
+
+
+def combine_totals(entries: List[Entry]) -> Dict[str, Any]:
+    """Rolls sector totals up to the index level from their unrounded sums (no per-tile pass)."""
+    nodes = [node for node, _, _ in entries]
+    weight = sum(node["market_cap"] for node in nodes)
+    count = sum(node["count"] for node in nodes)
+    change = _weighted_change(weight, sum(weighted for _, weighted, _ in entries),
+                              sum(plain for _, _, plain in entries), count)
+    totals = {"count": count, "volume": sum(node["volume"] for node in nodes), "market_cap": weight,
+              "change": round(change, 2)}
+    for field in ("advances", "declines", "unchanged"):
+        totals[field] = sum(node[field] for node in nodes)
+    return totals
+
+
+def _sector_node(sector: str, tiles: Tiles, market_caps: Dict[str, float]) -> Entry:
+    leaves = [
+        {
+            "name": tile["symbol"],
+            "label": tile["name"],
+            "price": tile["price"],
+            "change": tile["change"],
+            "volume": tile["volume"],
+            "market_cap": market_caps.get(tile["symbol"]),
+        }
+        for tile in tiles
+    ]
+    _, weighted, plain = _change_sums(tiles, market_caps)
+    return dict(name=sector, **sector_totals(tiles, market_caps), children=leaves), weighted, plain
+
+
+class TreemapBuilder:
+    """
+    Builds treemap hierarchies, reusing sector nodes already built from the same data and members.
+    Args:
+        max_sectors (int): Sector nodes remembered; the least recently used is dropped first.
+    """
+
+    def __init__(self, max_sectors: int = 1024) -> None:
+        self.max_sectors = max_sectors
+        self._sectors: "OrderedDict[Hashable, Optional[Entry]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"builds": 0, "sectors_computed": 0, "sectors_reused": 0}
+
+    def build(self, data_key: Optional[Hashable], name: str, symbols: List[str], sector_map: Dict[str, str],
+              name_map: Dict[str, str], market_caps: Dict[str, float],
+              make_tiles: Callable[[List[str]], Tiles]) -> Dict[str, Any]:
+        """
+        Returns the hierarchy for a view.
+        Args:
+            data_key (hashable): Identity of the quotes the tiles come from (e.g. a snapshot
+                version); None if they may change, which disables reuse.
+            name (str): Root node name (the index).
+            symbols (list): Symbols of the view, in index order.
+            sector_map (dict): Symbol to sector.
+            name_map (dict): Symbol to company name.
+            market_caps (dict): Symbol to market capitalisation.
+            make_tiles (callable): Symbols -> their heatmap tiles, in the given order; called
+                once, with the members of every sector not reused.
+        Returns:
+            dict: Root node with totals and sector children, each with its stock leaves.
+        """
+        members: Dict[str, List[str]] = {}
+        for symbol in symbols:
+            members.setdefault(sector_map.get(symbol, "UNKNOWN"), []).append(symbol)
+        sectors = sorted(members)
+        keys = {
+            sector: None if data_key is None else
+            (data_key, sector, tuple((s, name_map.get(s, s), market_caps.get(s)) for s in members[sector]))
+            for sector in sectors
+        }
+        entries: Dict[str, Optional[Entry]] = {}
+        with self._lock:
+            for sector in sectors:
+                if keys[sector] in self._sectors:
+                    self._sectors.move_to_end(keys[sector])
+                    entries[sector] = self._sectors[keys[sector]]
+        missing = [sector for sector in sectors if sector not in entries]
+        if missing:
+            grouped: Dict[str, Tiles] = {}
+            for tile in make_tiles([symbol for sector in missing for symbol in members[sector]]):
+                grouped.setdefault(tile["sector"], []).append(tile)
+            for sector in missing:
+                # A sector without any quoted member has no node
+                tiles = grouped.get(sector)
+                entries[sector] = _sector_node(sector, tiles, market_caps) if tiles else None
+        with self._lock:
+            for sector in missing:
+                if keys[sector] is not None:
+                    self._sectors[keys[sector]] = entries[sector]
+            while len(self._sectors) > self.max_sectors:
+                self._sectors.popitem(last=False)
+            self._stats["builds"] += 1
+            self._stats["sectors_computed"] += len(missing)
+            self._stats["sectors_reused"] += len(sectors) - len(missing)
+        built = [entries[sector] for sector in sectors if entries[sector] is not None]
+        return dict(name=name, **combine_totals(built), children=[node for node, _, _ in built])
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._stats, sectors=len(self._sectors))
+
+
+def get_treemap_builder(app: Any) -> TreemapBuilder:
+    """
+    Returns the app's treemap builder, creating it on first use.
+    Args:
+        app (Flask): The Flask application.
+    Returns:
+        TreemapBuilder: The shared builder.
+    """
+    builder = app.extensions.get("treemap_builder")
+    if builder is None:
+        builder = app.extensions.setdefault("treemap_builder", TreemapBuilder())
+    return builder
@@ -0,0 +1,353 @@
+"""
+Module-level docstring:
+Resilient client for upstream market-data calls.
+Every upstream call goes through one UpstreamClient, which owns the pooled HTTP
+session and applies, in order: a circuit breaker (fail fast while upstream is
+down), a token bucket (a ceiling on calls per second across all threads) and
+bounded retries with full-jitter exponential backoff for transient failures
+(connection errors, timeouts, HTTP 429 and 5xx). While the breaker is open, a
+call made with a `key` is answered with the last result that key returned
+successfully, if there is one.
+"""
+import random
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+# Breaker states, with the gauge value each is exported as
+CLOSED, HALF_OPEN, OPEN = "closed", "half_open", "open"
+STATE_VALUES: Dict[str, int] = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class UpstreamError(Exception):
+    """
+    An upstream call failed.
+    Args:
+        message (str): Description of the failure.
+        status (int): HTTP status, if the upstream answered.
+        retryable (bool): Whether the same call may succeed if repeated.
+        retry_after (float): Seconds the upstream asked us to wait, if it did.
+    """
+
+    def __init__(self, message: str, status: Optional[int] = None, retryable: bool = False,
+                 retry_after: Optional[float] = None) -> None:
+        super().__init__(message)
+        self.status = status
+        self.retryable = retryable
+        self.retry_after = retry_after
+
+
+class CircuitOpenError(UpstreamError):
+    """The circuit breaker is open and no last-known-good result was available."""
+
+
+def make_session(pool_size: int) -> Any:
+    """Returns a requests session whose connection pool fits `pool_size` concurrent downloads."""
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Returns True for transient failures: retryable UpstreamErrors, connection errors and timeouts."""
+    if isinstance(error, UpstreamError):
+        return error.retryable
+    import requests
+
+    return isinstance(error, (requests.ConnectionError, requests.Timeout, ConnectionError, TimeoutError))
+
+
+def is_empty(result: Any) -> bool:
+    """Returns True for results without data, such as an empty DataFrame."""
+    return getattr(result, "empty", False) is True
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket: `rate` tokens per second, at most `burst` saved up.
+    Args:
+        rate (float): Tokens added per second; 0 or less disables limiting.
+        burst (float): Bucket capacity (the largest back-to-back burst).
+        clock (callable): Monotonic time source (tests pass a fake one).
+        sleep (callable): Used to wait for a token.
+    """
+
+    def __init__(self, rate: float, burst: float = 1.0, clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep) -> None:
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = self.burst
+        self._updated = clock()
+        self._lock = threading.Lock()
+        self._waits = 0
+        self._waited = 0.0
+
+    def _reserve(self) -> float:
+        """Takes a token, returning how long the caller must wait until it is due."""
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            wait = -self._tokens / self.rate
+            self._waits += 1
+            self._waited += wait
+            return wait
+
+    def acquire(self, max_wait: Optional[float] = None) -> float:
+        """
+        Takes one token, sleeping until one is available.
+        Args:
+            max_wait (float): Longest acceptable wait; None waits as long as needed.
+        Returns:
+            float: Seconds waited.
+        Raises:
+            UpstreamError: If the wait would exceed max_wait (the token is not taken).
+        """
+        if self.rate <= 0:
+            return 0.0
+        wait = self._reserve()
+        if max_wait is not None and wait > max_wait:
+            with self._lock:
+                self._tokens += 1
+                self._waits -= 1
+                self._waited -= wait
+            raise UpstreamError(f"Upstream rate limit: next call allowed in {wait:.2f}s")
+        if wait > 0:
+            self._sleep(wait)
+        return wait
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            return {"rate": self.rate, "burst": self.burst, "waits": self._waits,
+                    "waited_seconds": round(self._waited, 3)}
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+    Closed: calls pass. After `failure_threshold` failures in a row it trips to
+    open and rejects calls for `reset_timeout` seconds, then lets one trial call
+    through (half-open): success closes it, failure opens it again.
+    Args:
+        failure_threshold (int): Consecutive failures that trip the breaker.
+        reset_timeout (float): Seconds to stay open before a trial call.
+        clock (callable): Monotonic time source.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_running = False
+        self._trips = 0
+        self._rejected = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self) -> str:
+        if self._state == OPEN and self._clock() - self._opened_at >= self.reset_timeout:
+            self._state = HALF_OPEN
+            self._trial_running = False
+        return self._state
+
+    def allow(self) -> bool:
+        """Returns True if a call may proceed now (in half-open, only one trial call at a time)."""
+        with self._lock:
+            state = self._current_state()
+            if state == CLOSED:
+                return True
+            if state == HALF_OPEN and not self._trial_running:
+                self._trial_running = True
+                return True
+            self._rejected += 1
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._state = CLOSED
+            self._failures = 0
+            self._trial_running = False
+
+    def release(self) -> None:
+        """Ends a call that says nothing about upstream health (e.g. a client error) without changing state."""
+        with self._lock:
+            self._trial_running = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != OPEN:
+                    self._trips += 1
+                self._state = OPEN
+                self._opened_at = self._clock()
+                self._trial_running = False
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"state": self._current_state(), "consecutive_failures": self._failures,
+                    "trips": self._trips, "rejected": self._rejected}
+
+
+class UpstreamClient:
+    """
+    Rate-limited, retrying, circuit-broken calls to one upstream.
+    Args:
+        session: HTTP session shared by all calls; a pooled requests session is created if None.
+        pool_size (int): Connection pool size of the created session.
+        bucket (TokenBucket): Rate limiter; None disables limiting.
+        breaker (CircuitBreaker): Circuit breaker; a default one is created if None.
+        retries (int): Extra attempts after a transient failure.
+        backoff (float): Base delay in seconds; attempt n waits uniform(0, min(backoff_max, backoff * 2**n)).
+        backoff_max (float): Cap on a single delay.
+        timeout (float): Per-request timeout for get(), also the longest wait for a rate-limit token.
+        keep (int): Last-known-good results kept (least recently stored dropped first).
+        sleep (callable): Used between attempts.
+        rng (random.Random): Jitter source.
+    """
+
+    def __init__(self, session: Any = None, pool_size: int = 4, bucket: Optional[TokenBucket] = None,
+                 breaker: Optional[CircuitBreaker] = None, retries: int = 2, backoff: float = 0.5,
+                 backoff_max: float = 8.0, timeout: float = 10.0, keep: int = 32,
+                 sleep: Callable[[float], None] = time.sleep, rng: Optional[random.Random] = None) -> None:
+        self.session = session if session is not None else make_session(pool_size)
+        self.bucket = bucket
+        self.breaker = breaker if breaker is not None else CircuitBreaker()
+        self.retries = max(0, retries)
+        self.backoff = backoff
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+        self.keep = keep
+        self._sleep = sleep
+        self._rng = rng or random.Random()
+        self._last_good: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"calls": 0, "failures": 0, "retries": 0, "served_stale": 0}
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any], **kwargs: Any) -> "UpstreamClient":
+        """Builds a client from the UPSTREAM_* and FETCH_CONCURRENCY app config keys."""
+        bucket = TokenBucket(float(config.get("UPSTREAM_RATE", 2.0)), float(config.get("UPSTREAM_BURST", 4)))
+        breaker = CircuitBreaker(int(config.get("UPSTREAM_BREAKER_THRESHOLD", 5)),
+                                 float(config.get("UPSTREAM_BREAKER_RESET", 30.0)))
+        return cls(pool_size=max(4, int(config.get("FETCH_CONCURRENCY", 1))), bucket=bucket, breaker=breaker,
+                   retries=int(config.get("UPSTREAM_RETRIES", 2)), backoff=float(config.get("UPSTREAM_BACKOFF", 0.5)),
+                   timeout=float(config.get("UPSTREAM_TIMEOUT", 10.0)), **kwargs)
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._stats[name] += 1
+
+    def delay(self, attempt: int, error: BaseException) -> float:
+        """Full-jitter backoff before retry `attempt` (0-based), at least the upstream's Retry-After."""
+        delay = self._rng.uniform(0, min(self.backoff_max, self.backoff * 2 ** attempt))
+        retry_after = getattr(error, "retry_after", None)
+        if retry_after:
+            delay = max(delay, min(self.backoff_max, retry_after))
+        return delay
+
+    def call(self, fn: Callable[..., Any], *args: Any, key: Hashable = None, **kwargs: Any) -> Any:
+        """
+        Calls fn(*args, **kwargs) through the breaker, rate limiter and retry policy.
+        Args:
+            fn (callable): The upstream call.
+            key (hashable): Identity of the request; its last successful result is
+                returned instead of failing while the breaker is open.
+        Empty results (see is_empty) are returned but neither close the breaker
+        nor replace the last-known-good result.
+        Returns:
+            Any: fn's result (or the last-known-good result for `key` while open).
+        Raises:
+            CircuitOpenError: If the breaker is open and there is no result for `key`.
+            Exception: fn's last error once retries are exhausted, or its first non-transient error.
+        """
+        self._count("calls")
+        if not self.breaker.allow():
+            with self._lock:
+                found = key is not None and key in self._last_good
+                if found:
+                    self._stats["served_stale"] += 1
+                    return self._last_good[key]
+            raise CircuitOpenError("Upstream circuit breaker is open; failing fast")
+        attempt = 0
+        while True:
+            try:
+                if self.bucket is not None:
+                    self.bucket.acquire(self.timeout)
+                result = fn(*args, **kwargs)
+            except Exception as error:
+                if attempt < self.retries and is_retryable(error):
+                    self._count("retries")
+                    self._sleep(self.delay(attempt, error))
+                    attempt += 1
+                    continue
+                self._count("failures")
+                if isinstance(error, UpstreamError) and not error.retryable:
+                    # Client errors and local throttling are not upstream outages
+                    self.breaker.release()
+                else:
+                    self.breaker.record_failure()
+                raise
+            if is_empty(result):
+                # An empty answer says nothing about upstream health and must not replace real data
+                self.breaker.release()
+                return result
+            self.breaker.record_success()
+            if key is not None:
+                with self._lock:
+                    self._last_good[key] = result
+                    self._last_good.move_to_end(key)
+                    while len(self._last_good) > self.keep:
+                        self._last_good.popitem(last=False)
+            return result
+
+    def get(self, url: str, key: Hashable = None, **kwargs: Any) -> Any:
+        """
+        GETs a URL through call(), treating HTTP 429 and 5xx answers as transient failures.
+        Returns:
+            Response: The successful response.
+        Raises:
+            UpstreamError: For error statuses (after retries for 429/5xx).
+        """
+        kwargs.setdefault("timeout", self.timeout)
+
+        def fetch() -> Any:
+            response = self.session.get(url, **kwargs)
+            if response.status_code >= 400:
+                retry_after = response.headers.get("Retry-After")
+                raise UpstreamError(
+                    f"Upstream answered HTTP {response.status_code}",
+                    status=response.status_code,
+                    retryable=response.status_code == 429 or response.status_code >= 500,
+                    retry_after=float(retry_after) if retry_after and retry_after.isdigit() else None,
+                )
+            return response
+
+        return self.call(fetch, key=key)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats: Dict[str, Any] = dict(self._stats, last_good=len(self._last_good))
+        stats["breaker"] = self.breaker.stats()
+        if self.bucket is not None:
+            stats["bucket"] = self.bucket.stats()
+        return stats
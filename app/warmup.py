@@ -0,0 +1,64 @@
+"""
+Module-level docstring:
+Pre-fork warm-up.
+With a pre-forking server that loads the app in the master (e.g.
+`gunicorn --preload 'app:create_app()'`), warm_up() runs once in the master:
+it imports the deferred heavy modules, loads the constituent tables and,
+when the prefetch scheduler is enabled, publishes the latest market snapshot.
+Forked workers inherit all of it copy-on-write and serve their first request
+without importing (or, with prefetch, downloading).
+Objects created so far are frozen out of the garbage collector so that
+collections in the workers do not write to (and so copy) the shared pages.
+State that does not survive a fork (pooled sockets, executor threads) is
+dropped before returning and recreated by each worker on first use.
+"""
+import gc
+import logging
+import time
+from typing import Any, Dict
+
+from .lazy import load_all
+
+logger = logging.getLogger(__name__)
+
+
+def warm_up(app: Any) -> Dict[str, Any]:
+    """
+    Loads heavy modules, constituents and (with PREFETCH_ENABLED) the latest snapshot into the current process.
+    Without prefetch no snapshot is published: nothing would replace it, and snapshot-backed
+    views never expire. A failed snapshot download is logged and skipped; workers then download on demand.
+    Args:
+        app (Flask): The Flask application.
+    Returns:
+        dict: "modules" loaded, "symbols" in the universe, snapshot "version" (or None) and "seconds" taken.
+    """
+    from .registry import get_registry
+    from .scheduler import refresh_snapshot
+
+    started = time.perf_counter()
+    modules = load_all()
+    symbols = list(get_registry(app).current().universe)
+    version = None
+    if app.config.get("PREFETCH_ENABLED"):
+        try:
+            version = refresh_snapshot(app, symbols).version
+        except Exception as e:
+            logger.warning(f"Warm-up: snapshot download failed, workers will fetch on demand: {e}")
+    _drop_fork_unsafe_state(app)
+    gc.collect()
+    gc.freeze()
+    summary = {"modules": modules, "symbols": len(symbols), "version": version,
+               "seconds": round(time.perf_counter() - started, 3)}
+    logger.info(f"Warm-up: {summary}")
+    return summary
+
+
+def _drop_fork_unsafe_state(app: Any) -> None:
+    """Closes pooled connections and the fetch engine's threads, which forked workers must not share."""
+    engine = app.extensions.pop("fetch_engine", None)
+    if engine is not None:
+        engine.close()
+    session = getattr(app.extensions.get("market_data_provider"), "session", None)
+    if session is not None and hasattr(session, "close"):
+        # The session stays usable; its pools reconnect on the next request
+        session.close()
@@ -0,0 +1,83 @@
+"""
+Module-level docstring:
+Compact wire formats for heatmap payloads.
+The default JSON body repeats every tile key on every row. The columnar
+format ships each field once as a column (struct of arrays), with names and
+sectors dictionary-encoded as indexes into a list of distinct values. The
+msgpack format carries the same columnar payload in MessagePack, with the
+numeric columns as little-endian typed-array bytes (float64 price/change,
+int64 volume, uint32 codes) that a client can wrap in a Float64Array,
+BigInt64Array or Uint32Array without parsing. msgpack is optional.
+"""
+from typing import Any, Dict, List, Tuple
+
+from .lazy import lazy_import
+
+try:
+    import msgpack
+except ImportError:  # optional: binary wire format
+    msgpack = None
+
+np = lazy_import("numpy", globals())
+
+FORMATS: Tuple[str, ...] = ("json", "columnar", "msgpack")
+MIMETYPES: Dict[str, str] = {"msgpack": "application/x-msgpack"}
+
+# Tile field -> column dtype in the binary format
+TYPED_COLUMNS: Dict[str, str] = {"price": "<f8", "change": "<f8", "volume": "<i8", "name": "<u4", "sector": "<u4"}
+DICTIONARY_FIELDS: Tuple[str, ...] = ("name", "sector")
+
+
+def available_formats() -> Tuple[str, ...]:
+    """Returns the formats this process can produce (msgpack needs its package)."""
+    return FORMATS if msgpack is not None else FORMATS[:2]
+
+
+def _dictionary_encode(values: List[str]) -> Tuple[List[int], List[str]]:
+    """Returns (codes, distinct values in first-seen order)."""
+    index: Dict[str, int] = {}
+    codes = [index.setdefault(value, len(index)) for value in values]
+    return codes, list(index)
+
+
+def columnar_payload(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Converts a heatmap payload's "data" tiles to columns.
+    Other keys (index, sector, date, note, version, removed, ...) are kept as they are.
+    Args:
+        payload (dict): Payload with a "data" list of tiles.
+    Returns:
+        dict: Payload with format="columnar", "count", "columns" and "dictionaries" instead of "data".
+    """
+    tiles = payload["data"]
+    columns: Dict[str, List[Any]] = {
+        "symbol": [tile["symbol"] for tile in tiles],
+        "price": [tile["price"] for tile in tiles],
+        "change": [tile["change"] for tile in tiles],
+        "volume": [tile["volume"] for tile in tiles],
+    }
+    dictionaries: Dict[str, List[str]] = {}
+    for name in DICTIONARY_FIELDS:
+        columns[name], dictionaries[name] = _dictionary_encode([tile[name] for tile in tiles])
+    result = {key: value for key, value in payload.items() if key != "data"}
+    result.update(format="columnar", count=len(tiles), columns=columns, dictionaries=dictionaries)
+    return result
+
+
+def encode_msgpack(payload: Dict[str, Any]) -> bytes:
+    """
+    Serializes a columnar payload to MessagePack with typed-array numeric columns.
+    Args:
+        payload (dict): Output of columnar_payload().
+    Returns:
+        bytes: MessagePack body; "types" maps each binary column to its NumPy dtype string.
+    Raises:
+        RuntimeError: If msgpack is not installed.
+    """
+    if msgpack is None:
+        raise RuntimeError("msgpack is not installed")
+    columns = dict(payload["columns"])
+    for name, dtype in TYPED_COLUMNS.items():
+        columns[name] = np.asarray(columns[name], dtype=dtype).tobytes()
+    body = dict(payload, format="msgpack", columns=columns, types=TYPED_COLUMNS)
+    return msgpack.packb(body, use_bin_type=True)
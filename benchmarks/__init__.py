@@ -0,0 +1,4 @@
+"""
+Offline benchmarks for the NSEViz backend.
+Run from the repository root, e.g. `python -m benchmarks.bench_tiles`.
+"""
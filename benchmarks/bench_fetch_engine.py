@@ -0,0 +1,60 @@
+"""
+Module-level docstring:
+Benchmark: chunked concurrent downloads vs one provider call.
+For 50, 500 and 2000 symbols, a thread-safe provider that simulates upstream
+latency (fixed per call plus per symbol) is downloaded once whole and then
+through app.fetch_engine at several chunk sizes and concurrency limits.
+No network is used, so the numbers show the engine's scheduling, not yfinance.
+
+Usage:
+    python -m benchmarks.bench_fetch_engine [--latency S] [--per-symbol S]
+"""
+import argparse
+import time
+
+from app.fetch_engine import FetchEngine
+from app.providers import FrameProvider
+from benchmarks.synthetic import make_frame, make_symbols
+
+
+class LatencyProvider(FrameProvider):
+    """Frame provider that sleeps like an upstream round trip."""
+
+    def __init__(self, frame, latency: float, per_symbol: float) -> None:
+        super().__init__(frame)
+        self.latency = latency
+        self.per_symbol = per_symbol
+
+    def download(self, symbols, start, end):
+        time.sleep(self.latency + self.per_symbol * len(symbols))
+        super().download(symbols, start, end)
+        return self.frame[symbols]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[2])
+    parser.add_argument("--latency", type=float, default=0.2, help="simulated seconds per provider call")
+    parser.add_argument("--per-symbol", type=float, default=0.001, help="simulated seconds per symbol")
+    args = parser.parse_args()
+
+    print(f"{'symbols':>8} {'chunk':>6} {'conc':>5} {'seconds':>8} {'speedup':>8}")
+    for count in (50, 500, 2000):
+        symbols = make_symbols(count)
+        provider = LatencyProvider(make_frame(symbols, rows=2), args.latency, args.per_symbol)
+        started = time.perf_counter()
+        provider.download(symbols, "2024-04-01", "2024-04-02")
+        single = time.perf_counter() - started
+        print(f"{count:>8} {'-':>6} {1:>5} {single:>8.3f} {1.0:>8.2f}")
+        for chunk_size, concurrency in ((100, 4), (100, 8), (250, 4)):
+            if chunk_size >= count:
+                continue
+            engine = FetchEngine(provider, chunk_size, concurrency)
+            started = time.perf_counter()
+            engine.fetch_blocking(symbols, "2024-04-01", "2024-04-02")
+            seconds = time.perf_counter() - started
+            engine.close()
+            print(f"{count:>8} {chunk_size:>6} {concurrency:>5} {seconds:>8.3f} {single / seconds:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
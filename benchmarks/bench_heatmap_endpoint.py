@@ -0,0 +1,138 @@
+"""
+Module-level docstring:
+Benchmark: /api/heatmap-data end to end through create_app().
+Drives the endpoint with synthetic yfinance-shaped frames of 50, 500 and 2000
+tickers (multi-index and flat single-ticker layouts, clean and NaN-heavy rows)
+served by an in-memory provider, so it runs fully offline. Reports latency
+percentiles, throughput and peak traced memory per scenario, and compares the
+p50 latency with benchmarks/baseline.json: a scenario slower than the baseline
+by more than the tolerance makes the run exit with status 1.
+
+Usage:
+    python -m benchmarks.bench_heatmap_endpoint [--requests N] [--tolerance 0.5] [--update-baseline]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Dict, List
+
+import numpy as np
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+SIZES = (50, 500, 2000)
+LAYOUTS = (("multi", True, 0.0), ("multi-nan", True, 0.5), ("flat", False, 0.0))
+
+
+def make_app(symbols: List[str], frame: Any, workdir: str) -> Any:
+    """
+    Creates an app with the response cache off, a constituents file holding one
+    BENCH<n> index of `symbols`, and an in-memory provider serving `frame`.
+    """
+    from app import create_app
+    from app.providers import FrameProvider
+    from benchmarks.synthetic import make_mappings
+
+    sectors, names = make_mappings(symbols)
+    path = os.path.join(workdir, f"constituents_{len(symbols)}.json")
+    with open(path, "w") as f:
+        json.dump({
+            "indices": {f"BENCH{len(symbols)}": symbols},
+            "symbols": {s: {"name": names[s], "sector": sectors[s]} for s in symbols},
+        }, f)
+    # Quiet per-request log lines; must be set before create_app() configures logging
+    os.environ["NSEVIZ_LOG_SAMPLE_RATE"] = "0"
+    os.environ["NSEVIZ_CONSTITUENTS_FILE"] = path
+    app = create_app()
+    app.config["HEATMAP_CACHE_SIZE"] = 0
+    app.extensions["market_data_provider"] = FrameProvider(frame)
+    return app
+
+
+def run_scenario(app: Any, index: str, requests: int) -> Dict[str, float]:
+    """
+    Issues `requests` sequential GETs after one warm-up request.
+    Returns:
+        dict: p50/p95/p99 latency (ms), throughput (req/s) and peak traced memory (MiB).
+    """
+    client = app.test_client()
+    url = f"/api/heatmap-data?index={index}&date=2024-04-01"
+    assert client.get(url).status_code == 200
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(requests):
+        t0 = time.perf_counter()
+        resp = client.get(url)
+        latencies.append((time.perf_counter() - t0) * 1000)
+        assert resp.status_code == 200
+    elapsed = time.perf_counter() - started
+    # Memory is traced in a separate request; tracemalloc would distort the timings
+    tracemalloc.start()
+    client.get(url)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    return {
+        "p50_ms": round(float(p50), 3),
+        "p95_ms": round(float(p95), 3),
+        "p99_ms": round(float(p99), 3),
+        "throughput_rps": round(requests / elapsed, 1),
+        "peak_mib": round(peak / 2 ** 20, 2),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Offline /api/heatmap-data benchmark")
+    parser.add_argument("--requests", type=int, default=50, help="timed requests per scenario")
+    parser.add_argument("--tolerance", type=float, default=0.5,
+                        help="allowed p50 slowdown vs baseline (0.5 = 50%%)")
+    parser.add_argument("--update-baseline", action="store_true", help="write results as the new baseline")
+    args = parser.parse_args()
+
+    from benchmarks.synthetic import make_frame, make_symbols
+
+    baseline: Dict[str, Dict[str, float]] = {}
+    if os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH) as f:
+            baseline = json.load(f)
+
+    results: Dict[str, Dict[str, float]] = {}
+    regressions: List[str] = []
+    print(f"{'scenario':<16} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'req/s':>8} {'peak MiB':>9} {'vs base':>8}")
+    with tempfile.TemporaryDirectory() as workdir:
+        for size in SIZES:
+            symbols = make_symbols(size)
+            for layout, multi_index, nan_fraction in LAYOUTS:
+                name = f"{size}-{layout}"
+                frame = make_frame(symbols, rows=1, nan_fraction=nan_fraction, multi_index=multi_index)
+                app = make_app(symbols, frame, workdir)
+                result = run_scenario(app, f"BENCH{size}", args.requests)
+                results[name] = result
+                ratio = ""
+                if name in baseline:
+                    change = result["p50_ms"] / baseline[name]["p50_ms"]
+                    ratio = f"{change:.2f}x"
+                    if change > 1 + args.tolerance:
+                        regressions.append(name)
+                        ratio += " !"
+                print(f"{name:<16} {result['p50_ms']:>8.2f} {result['p95_ms']:>8.2f} {result['p99_ms']:>8.2f} "
+                      f"{result['throughput_rps']:>8.1f} {result['peak_mib']:>9.2f} {ratio:>8}")
+
+    if args.update_baseline:
+        with open(BASELINE_PATH, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"Baseline written to {BASELINE_PATH}")
+        return 0
+    if regressions:
+        print(f"REGRESSION: p50 latency above baseline by more than {args.tolerance:.0%}: {', '.join(regressions)}",
+              file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
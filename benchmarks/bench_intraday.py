@@ -0,0 +1,44 @@
+"""
+Module-level docstring:
+Benchmark: intraday payload size and LTTB downsampling time.
+For 1, 5 and 60 sessions of 1-minute bars, reports the encoded size of the
+raw series and of the series downsampled to the point budget, and the time
+app.intraday takes to downsample it.
+
+Usage:
+    python -m benchmarks.bench_intraday [--points N] [--repeat N]
+"""
+import argparse
+import timeit
+
+import numpy as np
+
+from app import create_app
+from app.http_cache import encode_json
+from app.intraday import downsample
+
+BARS_PER_SESSION = 375
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[2])
+    parser.add_argument("--points", type=int, default=300, help="point budget")
+    parser.add_argument("--repeat", type=int, default=5, help="timing repetitions (best is reported)")
+    args = parser.parse_args()
+
+    app = create_app()
+    rng = np.random.default_rng(0)
+    print(f"{'sessions':>8} {'bars':>7} {'raw B':>9} {'budget B':>9} {'lttb ms':>8}")
+    for sessions in (1, 5, 60):
+        bars = sessions * BARS_PER_SESSION
+        times = 1711943100 + 60 * np.arange(bars, dtype=np.int64)
+        prices = np.round(1500 + np.cumsum(rng.normal(0, 0.5, bars)), 2)
+        raw = [{"time": t, "price": p} for t, p in zip(times.tolist(), prices.tolist())]
+        seconds = min(timeit.repeat(lambda: downsample((times, prices), args.points), number=1, repeat=args.repeat))
+        reduced = downsample((times, prices), args.points)
+        print(f"{sessions:>8} {bars:>7} {len(encode_json(app, raw)):>9} {len(encode_json(app, reduced)):>9} "
+              f"{seconds * 1000:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+Module-level docstring:
+Benchmark: top-K movers by partial selection vs full sorts.
+For 50, 500 and 2000 symbols, times app.movers selecting the top 10 gainers,
+losers and volume leaders of a view from a prebuilt table, against sorting
+the whole view three times, and checks that both give the same symbols.
+
+Usage:
+    python -m benchmarks.bench_movers [--k K] [--repeat N]
+"""
+import argparse
+import timeit
+
+import numpy as np
+
+from app.movers import MoversTable
+from benchmarks.synthetic import make_frame, make_symbols
+
+
+def sorted_movers(table: MoversTable, symbols, k: int):
+    """Full-sort reference: stable sorts of the whole view."""
+    pos = table.positions("view", symbols)
+    change, volume = table.change[pos], table.volume[pos]
+    up, down = pos[change > 0], pos[change < 0]
+    return {
+        "gainers": up[np.argsort(-table.change[up], kind="stable")][:k].tolist(),
+        "losers": down[np.argsort(table.change[down], kind="stable")][:k].tolist(),
+        "volume": pos[np.argsort(-volume, kind="stable")][:k].tolist(),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[2])
+    parser.add_argument("--k", type=int, default=10, help="entries per list")
+    parser.add_argument("--repeat", type=int, default=200, help="timing repetitions (best is reported)")
+    args = parser.parse_args()
+
+    print(f"{'symbols':>8} {'sort us':>9} {'select us':>10} {'speedup':>8}")
+    for count in (50, 500, 2000):
+        symbols = make_symbols(count)
+        table = MoversTable.from_frame(make_frame(symbols, rows=1, nan_fraction=0.05), symbols)
+        assert table.movers("view", symbols, args.k) == sorted_movers(table, symbols, args.k)
+        full = min(timeit.repeat(lambda: sorted_movers(table, symbols, args.k), number=1, repeat=args.repeat))
+        select = min(timeit.repeat(lambda: table.movers("view", symbols, args.k), number=1, repeat=args.repeat))
+        print(f"{count:>8} {full * 1e6:>9.1f} {select * 1e6:>10.1f} {full / select:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+Module-level docstring:
+Benchmark: heatmap payload serialization and compression.
+For 50, 500 and 2000 symbols, times encoding the payload with the stdlib-based
+Flask JSON provider (what jsonify() did per request) and with app.http_cache's
+encoder, then reports the size and compression time of every content-coding
+available here. Compression happens once per cache fill, not per request.
+
+Usage:
+    python -m benchmarks.bench_serialization [--repeat N]
+"""
+import argparse
+import timeit
+
+from app import create_app
+from app.http_cache import COMPRESSORS, encode_json, orjson
+from app.tiles import build_tiles, latest_quotes
+from benchmarks.synthetic import make_frame, make_mappings, make_symbols
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[2])
+    parser.add_argument("--repeat", type=int, default=5, help="timing repetitions (best is reported)")
+    args = parser.parse_args()
+
+    app = create_app()
+    codings = [coding for coding, _, _ in COMPRESSORS]
+    print(f"encoder: {'orjson' if orjson is not None else 'flask json (orjson not installed)'}")
+    header = f"{'symbols':>8} {'json ms':>9} {'fast ms':>9} {'identity B':>11}"
+    for coding in codings:
+        header += f" {coding + ' B':>10} {coding + ' ms':>9}"
+    print(header)
+    for count in (50, 500, 2000):
+        symbols = make_symbols(count)
+        df = make_frame(symbols, rows=1, nan_fraction=0.05)
+        sector_map, name_map = make_mappings(symbols)
+        payload = {
+            "index": "BENCH", "sector": None, "date": "2024-04-01",
+            "data": build_tiles(latest_quotes(df, symbols), symbols, sector_map, name_map),
+        }
+        stdlib = min(timeit.repeat(lambda: app.json.dumps(payload), number=1, repeat=args.repeat))
+        fast = min(timeit.repeat(lambda: encode_json(app, payload), number=1, repeat=args.repeat))
+        body = encode_json(app, payload)
+        row = f"{count:>8} {stdlib * 1000:>9.2f} {fast * 1000:>9.2f} {len(body):>11}"
+        for _, _, compress in COMPRESSORS:
+            seconds = min(timeit.repeat(lambda: compress(body), number=1, repeat=args.repeat))
+            row += f" {len(compress(body)):>10} {seconds * 1000:>9.2f}"
+        print(row)
+
+
+if __name__ == "__main__":
+    main()
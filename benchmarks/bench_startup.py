@@ -0,0 +1,98 @@
+"""
+Module-level docstring:
+Benchmark: process startup and first-request latency.
+Each run is a fresh interpreter, as a new worker would be. Reports the time to
+import the app and run create_app(), with the heavy dependencies deferred (the
+default) and imported eagerly up front (as before they were deferred), and the
+latency of the first heatmap request with and without warm_up() having run
+before it (as configured with NSEVIZ_PREFETCH, so that it publishes a snapshot). Quotes come from a generated CSV through the file provider, so no
+network is used and the child imports nothing heavy before its first request.
+
+Usage:
+    python -m benchmarks.bench_startup [--runs N]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from datetime import timedelta
+
+from app.scheduler import market_today
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+# Runs in the child interpreter; prints one JSON line of timings in milliseconds
+CHILD = """
+import json, sys, time
+started = time.perf_counter()
+if {eager}:
+    import numpy, pandas, yfinance
+from app import create_app
+app = create_app()
+created = time.perf_counter()
+heavy = [name for name in ("numpy", "pandas", "yfinance") if name in sys.modules]
+
+warmed = time.perf_counter()
+if {warm}:
+    from app.warmup import warm_up
+    # warm_up() publishes a snapshot only for prefetching deployments; the scheduler itself is not started
+    app.config["PREFETCH_ENABLED"] = True
+    warm_up(app)
+warmed = time.perf_counter() - warmed
+
+client = app.test_client()
+request = time.perf_counter()
+response = client.get("/api/heatmap-data?index=NIFTY50")
+first = time.perf_counter() - request
+assert response.status_code == 200, response.status_code
+print(json.dumps({{"create_app": (created - started) * 1e3, "warm_up": warmed * 1e3,
+                  "first_request": first * 1e3, "heavy_after_create": heavy}}))
+"""
+
+
+def write_quotes(path: str) -> None:
+    """Writes two sessions (yesterday and today) of quotes for every constituent."""
+    with open(os.path.join(ROOT, "app", "data", "constituents.json")) as f:
+        data = json.load(f)
+    symbols = sorted({symbol for members in data["indices"].values() for symbol in members})
+    today = market_today()
+    with open(path, "w") as f:
+        f.write("Date,Symbol,Open,High,Low,Close,Volume\n")
+        for day, close in ((today - timedelta(days=1), 100.0), (today, 101.0)):
+            for symbol in symbols:
+                f.write(f"{day},{symbol},100,102,99,{close},1000\n")
+
+
+def run(eager: bool, warm: bool, runs: int, quotes: str) -> dict:
+    env = dict(os.environ, NSEVIZ_DATA_PROVIDER="file", NSEVIZ_DATA_FILE=quotes)
+    samples = []
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, "-c", CHILD.format(eager=eager, warm=warm)], cwd=ROOT, env=env,
+                             capture_output=True, text=True, check=True)
+        samples.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    result = {key: statistics.median(s[key] for s in samples) for key in ("create_app", "warm_up", "first_request")}
+    result["heavy_after_create"] = samples[-1]["heavy_after_create"]
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[2])
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters per scenario (median is reported)")
+    args = parser.parse_args()
+
+    print(f"{'scenario':<16} {'create_app ms':>14} {'warm_up ms':>11} {'1st request ms':>15}  heavy modules after create_app")
+    with tempfile.TemporaryDirectory() as tmp:
+        quotes = os.path.join(tmp, "quotes.csv")
+        write_quotes(quotes)
+        for name, eager, warm in (("eager imports", True, False), ("lazy", False, False),
+                                  ("lazy + warm_up", False, True)):
+            r = run(eager, warm, args.runs, quotes)
+            print(f"{name:<16} {r['create_app']:>14.1f} {r['warm_up']:>11.1f} {r['first_request']:>15.1f}  "
+                  f"{', '.join(r['heavy_after_create']) or '-'}")
+
+
+if __name__ == "__main__":
+    main()
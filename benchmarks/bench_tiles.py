@@ -0,0 +1,81 @@
+"""
+Module-level docstring:
+Benchmark: per-symbol loop vs vectorized tile computation.
+Compares the original heatmap_data loop with app.tiles at 50, 500 and 2000
+symbols and checks that both produce the same tiles.
+
+Usage:
+    python -m benchmarks.bench_tiles [--repeat N]
+"""
+import argparse
+import timeit
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from app.tiles import build_tiles, latest_quotes
+from benchmarks.synthetic import make_frame, make_mappings, make_symbols
+
+
+def loop_tiles(df: Any, tickers: List[str], sector_map: Dict[str, str], name_map: Dict[str, str],
+               sector: Optional[str] = None) -> List[Dict[str, Any]]:
+    """The per-symbol loop heatmap_data used before vectorization (reference implementation)."""
+    result = []
+    for symbol in tickers:
+        if sector and sector_map.get(symbol) != sector:
+            continue
+        if hasattr(df, 'columns') and hasattr(df.columns, 'levels') and symbol in df.columns.levels[0]:
+            stock_df = df[symbol]
+        else:
+            stock_df = df
+        if stock_df.empty:
+            continue
+        latest = stock_df.iloc[-1]
+        if 'Close' not in latest or np.isnan(latest['Close']):
+            continue
+        price = float(latest['Close'])
+        if 'Open' in latest and not np.isnan(latest['Open']) and latest['Open'] > 0:
+            change = float(latest['Close'] - latest['Open']) / float(latest['Open']) * 100
+        else:
+            change = 0.0
+        if 'Volume' in latest and not np.isnan(latest['Volume']):
+            volume = int(latest['Volume'])
+        else:
+            volume = 0
+        result.append({
+            "symbol": symbol,
+            "name": name_map.get(symbol, symbol),
+            "price": price,
+            "change": round(change, 2),
+            "volume": volume,
+            "sector": sector_map.get(symbol, "UNKNOWN"),
+        })
+    return result
+
+
+def vectorized_tiles(df: Any, tickers: List[str], sector_map: Dict[str, str], name_map: Dict[str, str],
+                     sector: Optional[str] = None) -> List[Dict[str, Any]]:
+    return build_tiles(latest_quotes(df, tickers), tickers, sector_map, name_map, sector)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[2])
+    parser.add_argument("--repeat", type=int, default=5, help="timing repetitions (best is reported)")
+    args = parser.parse_args()
+
+    print(f"{'symbols':>8} {'loop ms':>10} {'vector ms':>10} {'speedup':>8}")
+    for count in (50, 500, 2000):
+        symbols = make_symbols(count)
+        # A single session row, as heatmap_data downloads for one date
+        df = make_frame(symbols, rows=1, nan_fraction=0.05)
+        sector_map, name_map = make_mappings(symbols)
+        assert loop_tiles(df, symbols, sector_map, name_map) == vectorized_tiles(df, symbols, sector_map, name_map)
+        loop = min(timeit.repeat(lambda: loop_tiles(df, symbols, sector_map, name_map),
+                                 number=1, repeat=args.repeat))
+        vector = min(timeit.repeat(lambda: vectorized_tiles(df, symbols, sector_map, name_map),
+                                   number=1, repeat=args.repeat))
+        print(f"{count:>8} {loop * 1000:>10.2f} {vector * 1000:>10.2f} {loop / vector:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
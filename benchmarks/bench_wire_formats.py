@@ -0,0 +1,50 @@
+"""
+Module-level docstring:
+Benchmark: heatmap payload size and parse time per wire format.
+For 50, 500 and 2000 tiles, reports the body size (identity and gzip) of the
+row JSON, columnar JSON and, when msgpack is installed, MessagePack formats,
+and the time to parse each body in Python (json.loads / msgpack.unpackb) as a
+stand-in for client-side parsing.
+
+Usage:
+    python -m benchmarks.bench_wire_formats [--repeat N]
+"""
+import argparse
+import gzip
+import json
+import timeit
+
+from app import create_app
+from app.http_cache import encode_json
+from app.tiles import build_tiles, latest_quotes
+from app.wire import columnar_payload, encode_msgpack, msgpack
+from benchmarks.synthetic import make_frame, make_mappings, make_symbols
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[2])
+    parser.add_argument("--repeat", type=int, default=20, help="timing repetitions (best is reported)")
+    args = parser.parse_args()
+
+    app = create_app()
+    print(f"{'tiles':>6} {'format':>9} {'bytes':>8} {'gzip B':>8} {'parse ms':>9}")
+    for count in (50, 500, 2000):
+        symbols = make_symbols(count)
+        sector_map, name_map = make_mappings(symbols)
+        df = make_frame(symbols, rows=1, nan_fraction=0.05)
+        payload = {"index": "BENCH", "sector": None, "date": "2024-04-01",
+                   "data": build_tiles(latest_quotes(df, symbols), symbols, sector_map, name_map)}
+        bodies = {
+            "json": (encode_json(app, payload), json.loads),
+            "columnar": (encode_json(app, columnar_payload(payload)), json.loads),
+        }
+        if msgpack is not None:
+            bodies["msgpack"] = (encode_msgpack(columnar_payload(payload)), msgpack.unpackb)
+        for name, (body, parse) in bodies.items():
+            seconds = min(timeit.repeat(lambda: parse(body), number=1, repeat=args.repeat))
+            print(f"{count:>6} {name:>9} {len(body):>8} {len(gzip.compress(body, mtime=0)):>8} "
+                  f"{seconds * 1000:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Module-level docstring:
+Synthetic yfinance-shaped OHLCV frames for offline benchmarks.
+"""
+from typing import List, Tuple
+
+import numpy as np
+import pandas as pd
+
+FIELDS: List[str] = ["Open", "High", "Low", "Close", "Volume"]
+
+
+def make_symbols(count: int) -> List[str]:
+    """Returns `count` deterministic fake symbols (SYM0000, SYM0001, ...)."""
+    return [f"SYM{i:04d}" for i in range(count)]
+
+
+def make_frame(symbols: List[str], rows: int = 1, nan_fraction: float = 0.0,
+               multi_index: bool = True, seed: int = 0) -> pd.DataFrame:
+    """
+    Builds a frame shaped like yf.download(symbols, group_by='ticker').
+    Args:
+        symbols (list): Ticker symbols (column level 0).
+        rows (int): Number of daily rows.
+        nan_fraction (float): Fraction of cells replaced by NaN (NaN-heavy rows).
+        multi_index (bool): False returns the flat single-ticker layout for symbols[0].
+        seed (int): RNG seed, so runs are reproducible.
+    Returns:
+        DataFrame: Synthetic OHLCV frame.
+    """
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range("2024-04-01", periods=rows, name="Date")
+    count = len(symbols) if multi_index else 1
+    base = rng.uniform(50, 5000, size=(rows, count))
+    open_ = base * rng.uniform(0.97, 1.03, size=base.shape)
+    close = base * rng.uniform(0.97, 1.03, size=base.shape)
+    high = np.maximum(open_, close) * 1.01
+    low = np.minimum(open_, close) * 0.99
+    volume = rng.integers(1_000, 5_000_000, size=base.shape).astype(np.float64)
+    cube = np.stack([open_, high, low, close, volume], axis=2)
+    if nan_fraction:
+        cube[rng.random(cube.shape) < nan_fraction] = np.nan
+    if not multi_index:
+        return pd.DataFrame(cube[:, 0, :], index=index, columns=FIELDS)
+    columns = pd.MultiIndex.from_product([symbols, FIELDS])
+    return pd.DataFrame(cube.reshape(rows, count * len(FIELDS)), index=index, columns=columns)
+
+
+def make_mappings(symbols: List[str]) -> Tuple[dict, dict]:
+    """Returns (sector_map, name_map) spreading symbols over a few sectors."""
+    sectors = ["FINANCE", "IT", "AUTO", "ENERGY", "PHARMA"]
+    sector_map = {symbol: sectors[i % len(sectors)] for i, symbol in enumerate(symbols)}
+    name_map = {symbol: f"{symbol} Ltd" for symbol in symbols}
+    return sector_map, name_map
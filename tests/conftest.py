@@ -0,0 +1,57 @@
+"""
+Shared test helpers: a yfinance-shaped frame factory and an app/client fixture
+whose market-data provider serves that frame.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+import pandas as pd
+import pytest
+from app import create_app
+from app.providers import FrameProvider
+
+# Default frame: symbol -> (open, close, volume) on 2024-04-01
+QUOTES = {"HDFCBANK": (1580.0, 1600.5, 100000), "INFY": (1410.0, 1400.0, 80000)}
+
+
+def make_frame(closes=None, opens=100.0, volumes=1000, dates=('2024-04-01',)):
+    """
+    Returns a frame shaped like yf.download(group_by='ticker') with Open/Close/Volume per symbol.
+    Args:
+        closes (dict): Symbol -> close; None for the QUOTES frame.
+        opens, volumes: One value for every symbol, or a symbol -> value dict.
+        dates (sequence): Row dates. Any value above may be a list with one entry per date.
+    Returns:
+        DataFrame: (symbol, field) columns in the order of `closes`; missing values are NaN.
+    """
+    if closes is None:
+        opens, closes, volumes = ({symbol: quote[i] for symbol, quote in QUOTES.items()} for i in range(3))
+
+    def column(values, symbol):
+        value = values.get(symbol, np.nan) if isinstance(values, dict) else values
+        return list(value) if isinstance(value, (list, tuple)) else [value] * len(dates)
+
+    data = {(symbol, field): column(values, symbol)
+            for symbol in closes for field, values in (("Open", opens), ("Close", closes), ("Volume", volumes))}
+    return pd.DataFrame(data, index=pd.to_datetime(list(dates)))
+
+
+@pytest.fixture
+def app():
+    """App whose provider serves make_frame(); tests may replace the provider."""
+    app = create_app()
+    app.testing = True
+    app.extensions['market_data_provider'] = FrameProvider(make_frame())
+    return app
+
+
+@pytest.fixture
+def provider(app):
+    return app.extensions['market_data_provider']
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
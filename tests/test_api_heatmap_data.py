@@ -1,15 +1,19 @@
 """
 Contract tests for /api/heatmap-data endpoint (TDD, NSEViz)
 Covers: success, filtering, errors, and edge cases.
+yf.download is patched, so the tests need no network access.
 """
+from unittest.mock import patch
+
 import pytest
 from app import create_app
+from conftest import make_frame
 
 @pytest.fixture
 def client():
     app = create_app()
     app.config['TESTING'] = True
-    with app.test_client() as client:
+    with patch('yfinance.download', return_value=make_frame()), app.test_client() as client:
         yield client
 
 def test_success_minimal(client):
@@ -0,0 +1,69 @@
+"""
+Tests for the /api/heatmap-data/batch endpoint.
+Covers: one upstream fetch per date, per-query errors, cache sharing, request validation.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pandas as pd
+import pytest
+from app.providers import FrameProvider
+
+URL = '/api/heatmap-data/batch'
+
+
+def test_views_share_one_fetch(client, provider):
+    resp = client.post(URL, json={"queries": [
+        {"index": "NIFTY50", "date": "2024-04-01"},
+        {"index": "NIFTY50", "sector": "IT", "date": "2024-04-01"},
+        {"index": "NIFTYBANK", "date": "2024-04-01"},
+    ]})
+    assert resp.status_code == 200
+    results = resp.get_json()["results"]
+    assert [[t["symbol"] for t in r["data"]] for r in results] == [["HDFCBANK", "INFY"], ["INFY"], ["HDFCBANK"]]
+    assert results[1]["sector"] == "IT"
+    assert len(provider.calls) == 1
+
+    # The single-view endpoint is served from the entries the batch cached
+    single = client.get('/api/heatmap-data?index=NIFTYBANK&date=2024-04-01')
+    assert single.get_json() == results[2]
+    assert len(provider.calls) == 1
+
+
+def test_per_query_errors(app):
+    resp = app.test_client().post(URL, json={"queries": [
+        {"index": "NIFTY50", "date": "2024-04-01"},
+        {"index": "UNKNOWN"},
+        {"sector": "IT"},
+        {"index": "NIFTY50", "date": "01-04-2024"},
+        "NIFTY50",
+    ]})
+    assert resp.status_code == 200
+    results = resp.get_json()["results"]
+    assert len(results[0]["data"]) == 2
+    assert [r["error"]["code"] for r in results[1:]] == ["INVALID_PARAM"] * 4
+    assert "index" in results[2]["error"]["message"]
+    assert "date" in results[3]["error"]["message"]
+
+
+def test_upstream_failure_is_fetched_once(app):
+    class FailingProvider(FrameProvider):
+        def download(self, symbols, start, end):
+            self.calls.append({"symbols": list(symbols), "start": start, "end": end})
+            raise RuntimeError('throttled')
+
+    provider = app.extensions['market_data_provider'] = FailingProvider(pd.DataFrame())
+    resp = app.test_client().post(URL, json={"queries": [
+        {"index": "NIFTY50", "date": "2024-04-01"}, {"index": "NIFTYBANK", "date": "2024-04-01"}]})
+    assert resp.status_code == 200
+    assert [r["error"]["code"] for r in resp.get_json()["results"]] == ["YFINANCE_ERROR"] * 2
+    assert len(provider.calls) == 1
+
+
+@pytest.mark.parametrize("body", [None, {}, {"queries": []}, {"queries": "NIFTY50"},
+                                  {"queries": [{"index": "NIFTY50"}] * 51}])
+def test_invalid_bodies(app, body):
+    resp = app.test_client().post(URL, json=body) if body is not None else app.test_client().post(URL, data="x")
+    assert resp.status_code == 400
+    assert resp.get_json()["error"]["code"] == "INVALID_PARAM"
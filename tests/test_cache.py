@@ -0,0 +1,101 @@
+"""
+Tests for the heatmap snapshot cache (app/cache.py) and its use by /api/heatmap-data.
+Covers: LRU eviction, TTL expiry, stale-while-revalidate, historical dates, stats.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import time
+import threading
+import pytest
+from app.cache import SnapshotCache
+
+
+def test_lru_eviction():
+    cache = SnapshotCache(max_entries=2, ttl=60)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a', lambda: 'reloaded') == 1  # 'a' becomes most recently used
+    cache.put('c', 3)
+    assert cache.get('b', lambda: 'reloaded') == 'reloaded'
+    assert cache.stats()['evictions'] >= 1
+
+
+def test_expired_entry_reloads_after_stale_window():
+    cache = SnapshotCache(max_entries=4, ttl=0.01, stale_ttl=0)
+    assert cache.get('k', lambda: 1) == 1
+    time.sleep(0.02)
+    assert cache.get('k', lambda: 2) == 2
+    assert cache.stats()['misses'] == 2
+
+
+def test_stale_while_revalidate_serves_old_value():
+    cache = SnapshotCache(max_entries=4, ttl=0.01, stale_ttl=60)
+    cache.get('k', lambda: 'old')
+    time.sleep(0.02)
+    refreshed = threading.Event()
+
+    def loader():
+        refreshed.set()
+        return 'new'
+
+    # The refreshed value is stored with the TTL passed on the stale hit
+    assert cache.get('k', loader, ttl=60) == 'old'
+    assert refreshed.wait(2)
+    for _ in range(100):
+        if cache.stats()['refreshes']:
+            break
+        time.sleep(0.01)
+    assert cache.get('k', lambda: 'unused') == 'new'
+    stats = cache.stats()
+    assert stats['stale_hits'] == 1
+    assert stats['refreshes'] == 1
+
+
+def test_none_ttl_never_expires():
+    cache = SnapshotCache(max_entries=4, ttl=0.0, stale_ttl=0)
+    cache.get('k', lambda: 1, ttl=None)
+    assert cache.get('k', lambda: 2) == 1
+
+
+def test_loader_errors_are_not_cached():
+    cache = SnapshotCache(max_entries=4, ttl=60)
+
+    def failing():
+        raise RuntimeError('upstream down')
+
+    with pytest.raises(RuntimeError):
+        cache.get('k', failing)
+    assert cache.get('k', lambda: 'ok') == 'ok'
+
+
+def test_disabled_cache_always_loads():
+    cache = SnapshotCache(max_entries=0)
+    assert cache.get('k', lambda: 1) == 1
+    assert cache.get('k', lambda: 2) == 2
+
+
+def test_endpoint_caches_by_normalized_query(client, provider):
+    first = client.get('/api/heatmap-data?index=NIFTY50&date=2024-04-01').get_json()
+    second = client.get('/api/heatmap-data?date=2024-04-01&index=NIFTY50&foo=bar').get_json()
+    assert first == second
+    assert len(provider.calls) == 1
+    client.get('/api/heatmap-data?index=NIFTY50&sector=IT&date=2024-04-01')
+    assert len(provider.calls) == 2
+
+    stats = client.get('/api/cache-stats').get_json()
+    assert stats['hits'] == 1
+    assert stats['misses'] == 2
+    assert stats['size'] == 2
+
+
+def test_historical_dates_ignore_ttl(app, client, provider):
+    app.config['HEATMAP_CACHE_TTL'] = 0
+    app.config['HEATMAP_CACHE_STALE_TTL'] = 0
+    client.get('/api/heatmap-data?index=NIFTY50&date=2024-04-01')
+    client.get('/api/heatmap-data?index=NIFTY50&date=2024-04-01')
+    assert len(provider.calls) == 1
+    client.get('/api/heatmap-data?index=NIFTY50')
+    client.get('/api/heatmap-data?index=NIFTY50')
+    assert len(provider.calls) == 3
@@ -0,0 +1,82 @@
+"""
+Tests for delta heatmap responses (app/delta.py) via /api/heatmap-data?since=.
+Covers: version tokens, changed/removed tiles, full fallback, payload reduction.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import json
+import pytest
+from app.delta import ViewHistory
+from app.scheduler import market_today
+from app.snapshot import get_snapshot_store
+from conftest import make_frame
+
+
+@pytest.fixture
+def setup(app, tmp_path):
+    symbols = [f"SYM{i:03d}" for i in range(500)]
+    path = tmp_path / "c.json"
+    path.write_text(json.dumps({"indices": {"BIG": symbols}, "symbols": {}}))
+    app.config['CONSTITUENTS_FILE'] = str(path)
+    today = market_today().strftime('%Y-%m-%d')
+    return app, get_snapshot_store(app), symbols, today
+
+
+def test_since_returns_only_changes(setup):
+    app, store, symbols, today = setup
+    closes = {symbol: 101.0 for symbol in symbols}
+    store.publish(today, make_frame(closes))
+    client = app.test_client()
+    url = f'/api/heatmap-data?index=BIG&date={today}'
+    full = client.get(url)
+    body = full.get_json()
+    assert body["full"] is True and len(body["data"]) == 500
+    version = body["version"]
+    assert version == f"{store.epoch}-1"
+
+    changed = dict(closes, SYM001=105.0, SYM002=99.0)
+    del changed["SYM499"]
+    store.publish(today, make_frame(changed))
+    delta = client.get(f'{url}&since={version}')
+    data = delta.get_json()
+    assert data["full"] is False and data["since"] == version
+    assert data["version"] == f"{store.epoch}-2"
+    assert [tile["symbol"] for tile in data["data"]] == ["SYM001", "SYM002"]
+    assert data["data"][0]["price"] == 105.0 and data["data"][0]["name"] == "SYM001"
+    assert data["removed"] == ["SYM499"]
+    assert len(delta.data) < 0.1 * len(full.data)
+
+    # Already current: nothing to send
+    current = client.get(f'{url}&since={data["version"]}').get_json()
+    assert current["data"] == [] and current["removed"] == []
+
+
+def test_unknown_versions_fall_back_to_full(setup):
+    app, store, symbols, today = setup
+    client = app.test_client()
+    url = f'/api/heatmap-data?index=BIG&date={today}'
+    # Version 1 is never requested for this view, so it is never recorded
+    store.publish(today, make_frame({symbol: 101.0 for symbol in symbols}))
+    store.publish(today, make_frame({symbol: 102.0 for symbol in symbols}))
+    for since in (f"{store.epoch}-1", "deadbeef-1", f"{store.epoch}-7"):
+        body = client.get(f'{url}&since={since}').get_json()
+        assert body["full"] is True and len(body["data"]) == 500
+
+
+def test_invalid_since(setup):
+    app, _, _, today = setup
+    resp = app.test_client().get(f'/api/heatmap-data?index=BIG&date={today}&since=abc')
+    assert resp.status_code == 400
+    assert resp.get_json()["error"]["code"] == "INVALID_PARAM"
+
+
+def test_history_bounds():
+    history = ViewHistory(max_versions=2, max_views=1)
+    tiles = [{"symbol": "A", "price": 1.0, "change": 0.0, "volume": 1}]
+    for version in (1, 2, 3):
+        history.record("view", version, tiles)
+    assert history.get("view", 1) is None and history.get("view", 3) == {"A": (1.0, 0.0, 1)}
+    history.record("other", 1, tiles)
+    assert history.get("view", 3) is None
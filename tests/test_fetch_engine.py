@@ -0,0 +1,125 @@
+"""
+Tests for the chunked asyncio fetch engine (app/fetch_engine.py).
+Covers: chunk merging, bounded concurrency, non-thread-safe providers, errors, endpoint wiring.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import asyncio
+import threading
+import time
+from unittest.mock import patch
+import pandas as pd
+import pytest
+from app import create_app
+from app.fetch_engine import FetchEngine, chunked, get_fetch_engine, merge_chunks
+from app.providers import FrameProvider, YFinanceProvider
+from app.tiles import build_tiles, latest_quotes
+from conftest import make_frame
+
+SYMBOLS = [f"SYM{i}" for i in range(10)]
+
+
+def universe_frame(symbols):
+    return make_frame({symbol: [101.0 + i, 102.0 + i] for i, symbol in enumerate(symbols)},
+                      opens={symbol: 100.0 + i for i, symbol in enumerate(symbols)},
+                      volumes={symbol: 1000 * (i + 1) for i, symbol in enumerate(symbols)},
+                      dates=['2024-04-01', '2024-04-02'])
+
+
+class SlowProvider(FrameProvider):
+    """Slices a fixed frame per request and records peak concurrency."""
+
+    def __init__(self, frame, delay=0.05, thread_safe=True):
+        self.frame = frame
+        self.delay = delay
+        self.thread_safe = thread_safe
+        self.active = 0
+        self.peak = 0
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def download(self, symbols, start, end):
+        with self._lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+            self.calls.append(list(symbols))
+        time.sleep(self.delay)
+        with self._lock:
+            self.active -= 1
+        return self.frame[symbols]
+
+
+def test_chunks_merge_to_same_tiles():
+    frame = universe_frame(SYMBOLS)
+    engine = FetchEngine(SlowProvider(frame, delay=0), chunk_size=3, concurrency=2)
+    merged = engine.fetch_blocking(SYMBOLS, '2024-04-01', '2024-04-02')
+    assert chunked(SYMBOLS, 3)[-1] == ["SYM9"]
+    assert list(merged.columns.get_level_values(0).unique()) == SYMBOLS
+    maps = ({}, {})
+    assert build_tiles(latest_quotes(merged, SYMBOLS), SYMBOLS, *maps) == \
+        build_tiles(latest_quotes(frame, SYMBOLS), SYMBOLS, *maps)
+    assert engine.stats() == {"fetches": 1, "chunks": 4, "chunk_errors": 0}
+
+
+def test_flat_single_ticker_chunks_are_keyed():
+    frame = universe_frame(["A", "B"])
+    merged = merge_chunks([(["A"], frame["A"]), (["B"], frame["B"]), (["C"], pd.DataFrame())])
+    assert merged.equals(frame)
+
+
+def test_concurrency_is_bounded():
+    provider = SlowProvider(universe_frame(SYMBOLS))
+    engine = FetchEngine(provider, chunk_size=2, concurrency=2)
+    engine.fetch_blocking(SYMBOLS, '2024-04-01', '2024-04-02')
+    assert provider.peak == 2  # 5 chunks, 2 at a time
+    assert len(provider.calls) == 5
+
+
+def test_unsafe_provider_is_serialized():
+    provider = SlowProvider(universe_frame(SYMBOLS), delay=0.01, thread_safe=False)
+    FetchEngine(provider, chunk_size=2, concurrency=4).fetch_blocking(SYMBOLS, '2024-04-01', '2024-04-02')
+    assert provider.peak == 1
+    assert len(provider.calls) == 5
+
+
+def test_chunk_error_propagates():
+    class Failing(SlowProvider):
+        def download(self, symbols, start, end):
+            if "SYM5" in symbols:
+                raise RuntimeError('throttled')
+            return super().download(symbols, start, end)
+
+    engine = FetchEngine(Failing(universe_frame(SYMBOLS), delay=0), chunk_size=2)
+    with pytest.raises(RuntimeError):
+        engine.fetch_blocking(SYMBOLS, '2024-04-01', '2024-04-02')
+    assert engine.stats()["chunk_errors"] == 1
+
+
+def test_awaitable_from_async_code():
+    engine = FetchEngine(SlowProvider(universe_frame(SYMBOLS), delay=0), chunk_size=4)
+
+    async def view():
+        return await engine.fetch(SYMBOLS[:5], '2024-04-01', '2024-04-02')
+
+    assert list(asyncio.run(view()).columns.get_level_values(0).unique()) == SYMBOLS[:5]
+
+
+def test_endpoint_uses_engine_when_configured(app, client, provider):
+    app.config['FETCH_CHUNK_SIZE'] = 1
+    data = client.get('/api/heatmap-data?index=NIFTY50&date=2024-04-01').get_json()
+    assert [call["symbols"] for call in provider.calls] == [["HDFCBANK"], ["INFY"]]
+    assert [(t["symbol"], t["price"]) for t in data["data"]] == [("HDFCBANK", 1600.5), ("INFY", 1400.0)]
+
+
+def test_yfinance_chunks_share_a_session():
+    app = create_app()
+    app.config['FETCH_CHUNK_SIZE'] = 1
+    provider = app.extensions['market_data_provider'] = YFinanceProvider()
+    engine = get_fetch_engine(app)
+    assert provider.session is not None
+    with patch('yfinance.download', return_value=pd.DataFrame()) as download:
+        engine.fetch_blocking(["HDFCBANK", "INFY"], '2024-04-01', '2024-04-01')
+    assert download.call_count == 2
+    assert all(call.kwargs["session"] is provider.session for call in download.call_args_list)
@@ -161,7 +161,8 @@ def test_invalid_sector_param(client):
     assert data["note"] == "No data available for the given parameters."
 
 def test_invalid_category_param(client):
-    resp = client.get('/api/heatmap-data?index=NIFTY50&category=INVALID')
+    with patch('yfinance.download', side_effect=mock_yfinance_download):
+        resp = client.get('/api/heatmap-data?index=NIFTY50&category=INVALID')
     assert resp.status_code == 200
     data = resp.get_json()
     assert "data" in data
@@ -0,0 +1,232 @@
+"""
+Tests for the on-disk OHLCV history store (app/history.py).
+Covers: incremental sync, persistence across restarts, session reads, readers racing a write,
+concurrent writer processes, syncs of other symbols during a download, rollup pyramid, endpoint integration.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import multiprocessing
+import threading
+import time
+from datetime import date
+import numpy as np
+import pandas as pd
+import pytest
+from app import create_app
+from app.history import HistoryStore, rollup
+from app.providers import FrameProvider
+
+
+def make_history_frame():
+    idx = pd.to_datetime(['2024-04-01', '2024-04-02', '2024-04-03'])
+    columns = pd.MultiIndex.from_product([['HDFCBANK', 'INFY'], ['Open', 'High', 'Low', 'Close', 'Volume']])
+    data = [
+        [1580.0, 1605.0, 1575.0, 1600.5, 100000, 1410.0, 1415.0, 1395.0, 1400.0, 80000],
+        [1600.0, 1620.0, 1590.0, 1610.0, 90000, 1400.0, 1420.0, 1390.0, 1415.0, 85000],
+        [1610.0, 1630.0, 1600.0, 1625.0, 95000, np.nan, np.nan, np.nan, np.nan, np.nan],
+    ]
+    return pd.DataFrame(data, index=idx, columns=columns)
+
+
+def test_sync_downloads_only_missing_days(tmp_path):
+    store = HistoryStore(str(tmp_path))
+    provider = FrameProvider(make_history_frame())
+    assert store.sync(provider, ['HDFCBANK', 'INFY'], date(2024, 4, 2), date(2024, 4, 2)) == 1
+    assert provider.calls[-1] == {'symbols': ['HDFCBANK', 'INFY'], 'start': '2024-04-02', 'end': '2024-04-02'}
+    # Already covered: no download
+    assert store.sync(provider, ['HDFCBANK', 'INFY'], date(2024, 4, 2), date(2024, 4, 2)) == 0
+    # Extending both ends fetches only the two gaps
+    assert store.sync(provider, ['HDFCBANK', 'INFY'], date(2024, 4, 1), date(2024, 4, 3)) == 2
+    starts = sorted(call['start'] for call in provider.calls[1:])
+    assert starts == ['2024-04-01', '2024-04-03']
+    assert store.coverage('HDFCBANK') == (date(2024, 4, 1), date(2024, 4, 3))
+    bars = store.read_range('HDFCBANK', date(2024, 4, 1), date(2024, 4, 3))
+    assert list(bars['Close']) == [1600.5, 1610.0, 1625.0]
+
+
+def test_store_survives_restart(tmp_path):
+    store = HistoryStore(str(tmp_path))
+    store.sync(FrameProvider(make_history_frame()), ['HDFCBANK', 'INFY'], date(2024, 4, 1), date(2024, 4, 3))
+    reopened = HistoryStore(str(tmp_path))
+    provider = FrameProvider(pd.DataFrame())
+    assert reopened.sync(provider, ['HDFCBANK', 'INFY'], date(2024, 4, 1), date(2024, 4, 3)) == 0
+    assert provider.calls == []
+    session = reopened.read_session(['HDFCBANK', 'INFY', 'SBIN'], date(2024, 4, 2))
+    assert session['HDFCBANK']['Close'].iloc[-1] == 1610.0
+    assert session['INFY']['Volume'].iloc[-1] == 85000
+    assert 'SBIN' not in session.columns.get_level_values(0)
+    assert reopened.read_session(['HDFCBANK'], date(2024, 4, 6)).empty
+
+
+def test_columns_are_memory_mapped(tmp_path):
+    store = HistoryStore(str(tmp_path))
+    store.sync(FrameProvider(make_history_frame()), ['HDFCBANK'], date(2024, 4, 1), date(2024, 4, 3))
+    columns = store.columns('HDFCBANK')
+    assert isinstance(columns['close'], np.memmap)
+    assert columns['date'].dtype == np.dtype('datetime64[D]')
+
+
+def test_invalid_symbol_rejected(tmp_path):
+    store = HistoryStore(str(tmp_path))
+    with pytest.raises(ValueError):
+        store.coverage('../etc')
+
+
+def test_reader_retries_when_a_write_replaces_its_version(tmp_path):
+    writer = HistoryStore(str(tmp_path))
+    writer.sync(FrameProvider(make_history_frame()), ['HDFCBANK'], date(2024, 4, 1), date(2024, 4, 2))
+    reader = HistoryStore(str(tmp_path))  # another worker's view of the same store
+    stale = reader._read_meta('HDFCBANK')
+    writer.sync(FrameProvider(make_history_frame()), ['HDFCBANK'], date(2024, 4, 1), date(2024, 4, 3))
+    assert not (tmp_path / 'HDFCBANK' / f"v{stale['version']}").exists()
+    metas = [stale]
+    read_meta = reader._read_meta
+    reader._read_meta = lambda symbol: metas.pop() if metas else read_meta(symbol)
+    assert reader.columns('HDFCBANK')['close'].tolist() == [1600.5, 1610.0, 1625.0]
+    metas.append(stale)
+    assert len(reader.bars('HDFCBANK', 'weekly')['date']) == 1
+
+
+class SlowProvider(FrameProvider):
+    def download(self, symbols, start, end):
+        time.sleep(0.2)  # long enough for the other worker to reach the same gap
+        return super().download(symbols, start, end)
+
+
+def _sync_worker(root, start, through, go, downloads):
+    go.wait(10)
+    store = HistoryStore(root)
+    downloads.put(store.sync(SlowProvider(make_history_frame()), ['HDFCBANK', 'INFY'], start, through))
+
+
+def test_concurrent_writer_processes(tmp_path):
+    root = str(tmp_path)
+    go, downloads = multiprocessing.Event(), multiprocessing.Queue()
+    # Four workers backfill the same range at once
+    args = (root, date(2024, 4, 1), date(2024, 4, 3), go, downloads)
+    workers = [multiprocessing.Process(target=_sync_worker, args=args) for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    go.set()
+    for worker in workers:
+        worker.join(30)
+    assert [worker.exitcode for worker in workers] == [0, 0, 0, 0]
+    # One download: the workers that waited find the gap filled
+    assert sum(downloads.get(timeout=5) for _ in workers) == 1
+    store = HistoryStore(root)
+    assert store.coverage('HDFCBANK') == (date(2024, 4, 1), date(2024, 4, 3))
+    assert store.read_range('HDFCBANK', date(2024, 4, 1), date(2024, 4, 3))['Close'].tolist() == [1600.5, 1610.0, 1625.0]
+    assert sorted(os.listdir(tmp_path / 'INFY')) == ['meta.json', f"v{store.version('INFY')}"]
+
+
+
+class BlockingProvider(FrameProvider):
+    def __init__(self, frame):
+        super().__init__(frame)
+        self.started, self.release = threading.Event(), threading.Event()
+
+    def download(self, symbols, start, end):
+        self.started.set()
+        self.release.wait(10)
+        return super().download(symbols, start, end)
+
+
+def test_download_locks_only_its_own_symbols(tmp_path):
+    store = HistoryStore(str(tmp_path))
+    backfill = BlockingProvider(make_history_frame())
+    worker = threading.Thread(target=store.sync, args=(backfill, ['INFY'], date(2024, 4, 1), date(2024, 4, 3)))
+    worker.start()
+    try:
+        assert backfill.started.wait(10)
+        # INFY's download is in flight; HDFCBANK syncs and reads without waiting for it
+        assert store.sync(FrameProvider(make_history_frame()), ['HDFCBANK'], date(2024, 4, 1), date(2024, 4, 3)) == 1
+        assert store.coverage('INFY') is None
+    finally:
+        backfill.release.set()
+        worker.join(10)
+    assert store.coverage('INFY') == (date(2024, 4, 1), date(2024, 4, 3))
+
+
+def test_past_dates_served_from_disk(tmp_path):
+    def make_app(provider):
+        app = create_app()
+        app.testing = True
+        app.config['HISTORY_DIR'] = str(tmp_path)
+        app.extensions['market_data_provider'] = provider
+        return app
+
+    first = FrameProvider(make_history_frame())
+    resp = make_app(first).test_client().get('/api/heatmap-data?index=NIFTY50&date=2024-04-02')
+    data = resp.get_json()
+    assert [item['price'] for item in data['data']] == [1610.0, 1415.0]
+    assert len(first.calls) == 1
+
+    # A fresh app (restart) reuses the store without any download for covered dates
+    second = FrameProvider(pd.DataFrame())
+    app = make_app(second)
+    data = app.test_client().get('/api/heatmap-data?index=NIFTY50&date=2024-04-03').get_json()
+    # INFY has no bar that day
+    assert [item['price'] for item in data['data']] == [1625.0]
+    assert second.calls == []
+
+
+def make_daily_frame(days=300):
+    idx = pd.bdate_range('2023-01-02', periods=days)
+    close = 100.0 + np.arange(days, dtype=float)
+    columns = pd.MultiIndex.from_product([['INFY'], ['Open', 'High', 'Low', 'Close', 'Volume']])
+    return pd.DataFrame(np.column_stack([close - 1, close + 2, close - 3, close, np.full(days, 10.0)]),
+                        index=idx, columns=columns)
+
+
+def test_rollup_weekly_and_monthly():
+    columns = {
+        'date': np.array(['2024-03-29', '2024-04-01', '2024-04-02', '2024-04-05'], dtype='datetime64[D]'),
+        'open': np.array([1.0, 2.0, 3.0, 4.0]), 'high': np.array([5.0, 9.0, 7.0, 6.0]),
+        'low': np.array([0.5, 1.5, 0.4, 3.0]), 'close': np.array([1.5, 2.5, 3.5, np.nan]),
+        'volume': np.array([10.0, 20.0, 30.0, 40.0]),
+    }
+    weekly = rollup(columns, 'weekly')
+    assert weekly['date'].astype(str).tolist() == ['2024-03-25', '2024-04-01']
+    assert weekly['open'].tolist() == [1.0, 2.0] and weekly['close'].tolist() == [1.5, 3.5]
+    assert weekly['high'].tolist() == [5.0, 9.0] and weekly['low'].tolist() == [0.5, 0.4]
+    assert weekly['volume'].tolist() == [10.0, 50.0]  # the day without a close is skipped
+    monthly = rollup(columns, 'monthly')
+    assert monthly['date'].astype(str).tolist() == ['2024-03-01', '2024-04-01']
+
+
+def test_rollups_stored_with_each_version(tmp_path):
+    store = HistoryStore(str(tmp_path))
+    store.sync(FrameProvider(make_daily_frame()), ['INFY'], date(2023, 1, 1), date(2024, 12, 31))
+    weekly = store.bars('INFY', 'weekly')
+    assert isinstance(weekly['close'], np.memmap)
+    assert len(weekly['date']) == 60 and len(store.bars('INFY', 'monthly')['date']) == 14
+    # A version written without rollup files gets them derived on read
+    vdir = tmp_path / 'INFY' / f"v{store.version('INFY')}"
+    for path in vdir.glob('monthly_*.npy'):
+        path.unlink()
+    reopened = HistoryStore(str(tmp_path))
+    assert reopened.bars('INFY', 'monthly')['close'].tolist() == store.bars('INFY', 'monthly')['close'].tolist()
+
+
+def test_every_timeframe_from_one_download(tmp_path):
+    app = create_app()
+    app.testing = True
+    app.config['HISTORY_DIR'] = str(tmp_path)
+    provider = app.extensions['market_data_provider'] = FrameProvider(make_daily_frame())
+    client = app.test_client()
+    sizes = {}
+    for timeframe in ('5D', '1M', '6M', '1Y', 'MAX'):
+        body = client.get(f'/api/history?symbol=INFY&timeframe={timeframe}').get_json()
+        sizes[timeframe] = (body['interval'], len(body['data']))
+    assert len(provider.calls) == 1
+    assert sizes == {'5D': ('1d', 5), '1M': ('1d', 24), '6M': ('1d', 133), '1Y': ('1wk', 53), 'MAX': ('1mo', 14)}
+    last = client.get('/api/history?symbol=INFY&timeframe=5d').get_json()['data'][-1]
+    assert last == {'date': '2024-02-23', 'open': 398.0, 'high': 401.0, 'low': 396.0, 'close': 399.0, 'volume': 10}
+
+    assert client.get('/api/history?symbol=INFY&timeframe=2W').status_code == 400
+    assert client.get('/api/history?symbol=TCS&timeframe=1M').status_code == 400
+    assert client.get('/api/history?timeframe=1M').status_code == 400
+    app.config['HISTORY_DIR'] = None
+    assert client.get('/api/history?symbol=INFY&timeframe=1M').status_code == 503
@@ -0,0 +1,109 @@
+"""
+Tests for conditional GET support (app/http_cache.py) on /api/heatmap-data.
+Covers: ETag/Last-Modified headers, 304 responses, session-aware Cache-Control.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from unittest.mock import patch
+from app import create_app
+from app.http_cache import cache_control
+from app.providers import FrameProvider
+from app.scheduler import market_today
+from conftest import make_frame
+
+URL = '/api/heatmap-data?index=NIFTY50&date=2024-04-01'
+
+
+def test_validators_and_not_modified(client):
+    resp = client.get(URL)
+    assert resp.status_code == 200
+    etag = resp.headers['ETag']
+    assert etag.startswith('"') and resp.headers['Last-Modified']
+    assert resp.get_json()['data'][0]['symbol'] == 'HDFCBANK'
+
+    again = client.get(URL, headers={'If-None-Match': etag})
+    assert again.status_code == 304
+    assert again.data == b''
+    assert again.headers['ETag'] == etag
+
+    since = client.get(URL, headers={'If-Modified-Since': resp.headers['Last-Modified']})
+    assert since.status_code == 304
+    assert client.get(URL, headers={'If-None-Match': '"other"'}).status_code == 200
+
+
+def test_etag_follows_content(client):
+    first = client.get(URL).headers['ETag']
+    other = create_app()
+    other.extensions['market_data_provider'] = FrameProvider(make_frame())
+    assert other.test_client().get(URL).headers['ETag'] == first
+    frame = make_frame()
+    frame[('HDFCBANK', 'Close')] = 1700.0
+    changed = create_app()
+    changed.extensions['market_data_provider'] = FrameProvider(frame)
+    assert changed.test_client().get(URL).headers['ETag'] != first
+
+
+def test_past_session_is_immutable(client):
+    resp = client.get(URL)
+    assert resp.headers['Cache-Control'] == 'public, max-age=31536000, immutable'
+
+
+def test_live_session_max_age(app, client):
+    today = market_today().strftime('%Y-%m-%d')
+    with patch('app.routes.is_market_open', return_value=True):
+        resp = client.get(f'/api/heatmap-data?index=NIFTY50&date={today}')
+    assert resp.headers['Cache-Control'] == 'public, max-age=15'
+    assert cache_control(app, past_session=False, market_open=False) == 'public, max-age=300'
+
+
+def test_errors_carry_no_validators(client):
+    resp = client.get('/api/heatmap-data?index=UNKNOWN')
+    assert resp.status_code == 400
+    assert 'ETag' not in resp.headers
+
+
+def big_app():
+    # Enough symbols for the body to pass the compression threshold
+    symbols = [f"SYM{i:03d}" for i in range(40)]
+    app = create_app()
+    app.extensions['market_data_provider'] = FrameProvider(make_frame({symbol: 101.5 for symbol in symbols}))
+    return app, symbols
+
+
+def test_gzip_served_from_stored_blob(tmp_path):
+    import gzip
+    import json
+    path = tmp_path / 'c.json'
+    app, symbols = big_app()
+    path.write_text(json.dumps({"indices": {"BIG": symbols}, "symbols": {}}))
+    app.config['CONSTITUENTS_FILE'] = str(path)
+    client = app.test_client()
+    url = '/api/heatmap-data?index=BIG&date=2024-04-01'
+    plain = client.get(url)
+    assert 'Content-Encoding' not in plain.headers
+    assert 'Accept-Encoding' in plain.headers['Vary']
+
+    zipped = client.get(url, headers={'Accept-Encoding': 'gzip, deflate'})
+    assert zipped.headers['Content-Encoding'] == 'gzip'
+    assert len(zipped.data) < len(plain.data)
+    assert gzip.decompress(zipped.data) == plain.data
+    assert zipped.headers['ETag'] != plain.headers['ETag']
+    assert client.get(url, headers={'Accept-Encoding': 'gzip',
+                                    'If-None-Match': zipped.headers['ETag']}).status_code == 304
+    assert 'Content-Encoding' not in client.get(url, headers={'Accept-Encoding': 'gzip;q=0'}).headers
+
+
+def test_small_bodies_not_compressed(client):
+    resp = client.get(URL, headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in resp.headers
+
+
+def test_encoder_fallback_matches(app, monkeypatch):
+    import json
+    from app import http_cache
+    payload = {"b": [1, 2.5], "a": "x"}
+    fast = http_cache.encode_json(app, payload)
+    monkeypatch.setattr(http_cache, 'orjson', None)
+    assert json.loads(http_cache.encode_json(app, payload)) == json.loads(fast)
@@ -0,0 +1,95 @@
+"""
+Tests for intraday series and LTTB downsampling (app/intraday.py) and /api/intraday.
+Covers: LTTB vs a reference implementation, index levels, caching per budget, validation.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+import pandas as pd
+from app.intraday import index_series, lttb, symbol_series
+from app.providers import FileProvider, FrameProvider
+from conftest import make_frame
+
+
+def reference_lttb(x, y, threshold):
+    """Straightforward LTTB with a Python loop over every point."""
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return list(range(n))
+    edges = [int(v) for v in np.linspace(1, n - 1, threshold - 1)]
+    selected, a = [0], 0
+    for i in range(threshold - 2):
+        lo, hi = edges[i], edges[i + 1]
+        if i + 1 < threshold - 2:
+            nxt = range(edges[i + 1], edges[i + 2])
+            cx, cy = sum(x[j] for j in nxt) / len(nxt), sum(y[j] for j in nxt) / len(nxt)
+        else:
+            cx, cy = x[n - 1], y[n - 1]
+        best, best_area = lo, -1.0
+        for j in range(lo, hi):
+            area = abs((x[a] - cx) * (y[j] - y[a]) - (x[a] - x[j]) * (cy - y[a]))
+            if area > best_area:
+                best, best_area = j, area
+        selected.append(best)
+        a = best
+    return selected + [n - 1]
+
+
+def session_frame(symbols, bars=375, seed=0):
+    rng = np.random.default_rng(seed)
+    times = pd.date_range('2024-04-01 09:15', periods=bars, freq='min', tz='Asia/Kolkata')
+    closes = {symbol: (100.0 * (i + 1) + np.cumsum(rng.normal(0, 0.5, bars))).tolist()
+              for i, symbol in enumerate(symbols)}
+    return make_frame(closes, opens=closes, volumes=1000.0, dates=times)
+
+
+def test_lttb_matches_reference_and_keeps_peaks():
+    rng = np.random.default_rng(1)
+    x = np.arange(1000, dtype=float)
+    y = np.cumsum(rng.normal(size=1000))
+    y[537] = 100.0
+    kept = lttb(x, y, 60)
+    assert kept.tolist() == reference_lttb(x.tolist(), y.tolist(), 60)
+    assert len(kept) == 60 and kept[0] == 0 and kept[-1] == 999 and 537 in kept
+    assert lttb(x[:10], y[:10], 60).tolist() == list(range(10))
+
+
+def test_index_series_is_cap_weighted():
+    frame = session_frame(["A", "B"], bars=3)
+    frame[("A", "Close")] = [100.0, 110.0, 120.0]
+    frame[("B", "Close")] = [np.nan, 50.0, 40.0]
+    times, levels = index_series(frame, ["A", "B"], {"A": 3.0, "B": 1.0})
+    assert levels.tolist() == [100.0, 107.5, 110.0]
+    assert times[1] - times[0] == 60
+    assert symbol_series(frame, "B")[1].tolist() == [50.0, 40.0]
+
+
+def test_intraday_endpoint_caches_series_and_budgets(app, client):
+    provider = app.extensions['market_data_provider'] = FrameProvider(session_frame(['HDFCBANK', 'INFY']))
+    body = client.get('/api/intraday?symbol=INFY&date=2024-04-01&points=50').get_json()
+    assert body["symbol"] == "INFY" and body["raw_points"] == 375 and len(body["data"]) == 50
+    assert body["data"][0]["time"] == int(pd.Timestamp('2024-04-01 09:15', tz='Asia/Kolkata').timestamp())
+    assert len(client.get('/api/intraday?symbol=INFY&date=2024-04-01').get_json()["data"]) == 300
+    client.get('/api/intraday?symbol=INFY&date=2024-04-01&points=50')
+    assert len(provider.calls) == 1  # one download per (symbol, session), whatever the budget
+
+    index = client.get('/api/intraday?index=NIFTY50&date=2024-04-01&points=20').get_json()
+    assert index["index"] == "NIFTY50" and len(index["data"]) == 20 and index["data"][0]["price"] == 100.0
+
+    for query in ('', 'symbol=INFY&index=NIFTY50', 'symbol=TCS', 'index=SENSEX',
+                  'symbol=INFY&points=2', 'symbol=INFY&points=abc', 'symbol=INFY&date=2024-13-01'):
+        assert client.get(f'/api/intraday?{query}').status_code == 400
+
+
+def test_file_provider_intraday(tmp_path):
+    path = tmp_path / "bars.csv"
+    path.write_text(
+        "Date,Symbol,Open,High,Low,Close,Volume\n"
+        "2024-04-01 09:15:00,INFY,1,1,1,1400,10\n"
+        "2024-04-01 09:16:00,INFY,1,1,1,1401,10\n"
+        "2024-04-02 09:15:00,INFY,1,1,1,1410,10\n"
+    )
+    frame = FileProvider(str(path)).download_intraday(["INFY"], "2024-04-01")
+    assert frame[("INFY", "Close")].tolist() == [1400, 1401]
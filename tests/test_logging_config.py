@@ -0,0 +1,81 @@
+"""
+Tests for the queue-based logging pipeline (app/logging_config.py).
+Covers: single queue handler, structured request lines, sampling, no duplicates, forked workers.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import logging
+import logging.handlers
+import pytest
+from app import create_app
+from app.logging_config import SamplingFilter, stop_logging
+
+
+@pytest.fixture
+def log_file(tmp_path, monkeypatch):
+    path = tmp_path / "nseviz.log"
+    monkeypatch.setenv('NSEVIZ_LOG_FILE', str(path))
+    yield path
+    stop_logging()
+
+
+def read_log(path):
+    # The listener writes asynchronously; flush by stopping it
+    stop_logging()
+    return path.read_text()
+
+
+def test_only_queue_handler_on_request_path(log_file):
+    create_app()
+    app = create_app()
+    root_handlers = logging.getLogger().handlers
+    assert len(root_handlers) == 1
+    assert isinstance(root_handlers[0], logging.handlers.QueueHandler)
+    assert app.logger.handlers == []
+
+
+def test_structured_request_line(log_file):
+    app = create_app()
+    app.test_client().get('/api/heatmap-data?sector=FINANCE')
+    content = read_log(log_file)
+    line = next(line for line in content.splitlines() if 'Request: GET /api/heatmap-data' in line)
+    assert "params={'sector': 'FINANCE'}" in line
+    assert 'status=400' in line
+    assert 'upstream_ms=' in line and 'total_ms=' in line
+    assert 'Missing required parameter: index' in content
+    # Created twice would mean every line is written twice
+    assert content.count('Missing required parameter: index') == 1
+
+
+def make_record(level=logging.INFO, sampled=True):
+    record = logging.LogRecord('root', level, __file__, 1, 'msg', None, None)
+    record.sampled = sampled
+    return record
+
+
+def test_sampling_filter_keeps_fraction():
+    sampler = SamplingFilter(0.25)
+    kept = sum(sampler.filter(make_record()) for _ in range(100))
+    assert kept == 25
+    assert sampler.filter(make_record(sampled=False))
+    assert sampler.filter(make_record(level=logging.ERROR))
+    assert all(SamplingFilter(1.0).filter(make_record()) for _ in range(10))
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason="needs os.fork")
+def test_forked_worker_gets_its_own_listener(log_file):
+    create_app()
+    pid = os.fork()
+    if pid == 0:
+        code = 1
+        try:
+            logging.getLogger().info('from the forked worker')
+            stop_logging()
+            code = 0
+        finally:
+            os._exit(code)
+    _, status = os.waitpid(pid, 0)
+    assert os.waitstatus_to_exitcode(status) == 0
+    assert 'from the forked worker' in read_log(log_file)
@@ -0,0 +1,67 @@
+"""
+Tests for in-process metrics (app/metrics.py) and the /api/metrics endpoint.
+Covers: histogram buckets, Prometheus text format, per-stage recording.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pandas as pd
+from app.metrics import STAGE_SECONDS, UPSTREAM_ERRORS, MetricsRegistry
+from app.providers import FrameProvider
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = MetricsRegistry()
+    hist = registry.histogram("demo_seconds", "Demo.", ["stage"], buckets=(0.1, 1.0))
+    hist.observe(0.05, "build")
+    hist.observe(0.5, "build")
+    hist.observe(5, "build")
+    text = registry.render()
+    assert "# TYPE demo_seconds histogram" in text
+    assert 'demo_seconds_bucket{stage="build",le="0.1"} 1' in text
+    assert 'demo_seconds_bucket{stage="build",le="1"} 2' in text
+    assert 'demo_seconds_bucket{stage="build",le="+Inf"} 3' in text
+    assert 'demo_seconds_count{stage="build"} 3' in text
+    assert 'demo_seconds_sum{stage="build"} 5.55' in text
+
+
+def test_counter_and_label_escaping():
+    registry = MetricsRegistry()
+    counter = registry.counter("demo_total", "Demo.", ["path"])
+    counter.inc('a"b')
+    counter.inc('a"b', amount=2)
+    assert 'demo_total{path="a\\"b"} 3' in registry.render([("demo_gauge", "gauge", "Gauge.", 1.5)])
+    assert "demo_gauge 1.5" in registry.render([("demo_gauge", "gauge", "Gauge.", 1.5)])
+
+
+def test_metrics_endpoint_reports_stages(client):
+    before = {stage: STAGE_SECONDS.count(stage) for stage in ("validate", "upstream", "build", "serialize")}
+    client.get('/api/heatmap-data?index=NIFTY50&date=2024-04-01')
+    client.get('/api/heatmap-data?index=NIFTY50&date=2024-04-01')
+    assert STAGE_SECONDS.count("validate") == before["validate"] + 2
+    assert STAGE_SECONDS.count("upstream") == before["upstream"] + 1  # second request is a cache hit
+    assert STAGE_SECONDS.count("build") == before["build"] + 1
+    assert STAGE_SECONDS.count("serialize") == before["serialize"] + 2
+
+    resp = client.get('/api/metrics')
+    assert resp.status_code == 200
+    assert resp.content_type.startswith('text/plain')
+    text = resp.get_data(as_text=True)
+    assert 'nseviz_stage_duration_seconds_bucket{stage="upstream",le="+Inf"}' in text
+    assert 'nseviz_request_duration_seconds_count{endpoint="api.heatmap_data",status="200"}' in text
+    assert 'nseviz_response_size_bytes_count{endpoint="api.heatmap_data"}' in text
+    assert "nseviz_cache_hits_total 1" in text
+    assert "nseviz_cache_misses_total 1" in text
+
+
+def test_upstream_errors_counted(app, client):
+    class FailingProvider(FrameProvider):
+        def download(self, symbols, start, end):
+            raise RuntimeError('throttled')
+
+    app.extensions['market_data_provider'] = FailingProvider(pd.DataFrame())
+    before = UPSTREAM_ERRORS.value()
+    resp = client.get('/api/heatmap-data?index=NIFTY50&date=2024-04-01')
+    assert resp.status_code == 500
+    assert UPSTREAM_ERRORS.value() == before + 1
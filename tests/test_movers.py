@@ -0,0 +1,69 @@
+"""
+Tests for top movers (app/movers.py) and /api/movers.
+Covers: partial selection vs full sort, sign filters, per-snapshot tables, endpoint.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import json
+import numpy as np
+from app.movers import top_k
+from app.providers import FrameProvider
+from app.scheduler import market_today
+from app.snapshot import get_snapshot_store
+from conftest import make_frame
+
+
+def test_top_k_matches_full_sort():
+    rng = np.random.default_rng(3)
+    values = np.round(rng.normal(size=2000), 1)  # many ties
+    for k in (1, 10, 2000, 5000):
+        expected = sorted(range(len(values)), key=lambda i: (-values[i], i))[:k]
+        assert top_k(values, k).tolist() == expected
+    expected = sorted(range(len(values)), key=lambda i: (values[i], i))[:10]
+    assert top_k(values, 10, largest=False).tolist() == expected
+    assert top_k(values[:0], 10).tolist() == []
+
+
+def test_movers_endpoint_from_snapshot(app, client, tmp_path):
+    symbols = [f"SYM{i:03d}" for i in range(200)]
+    path = tmp_path / "c.json"
+    path.write_text(json.dumps({"indices": {"BIG": symbols}, "symbols": {
+        symbol: {"sector": "IT" if i % 2 else "FINANCE"} for i, symbol in enumerate(symbols)}}))
+    app.config['CONSTITUENTS_FILE'] = str(path)
+    today = market_today().strftime('%Y-%m-%d')
+    rng = np.random.default_rng(0)
+    closes = dict(zip(symbols, np.round(100 + rng.normal(0, 3, 200), 2).tolist()))
+    volumes = dict(zip(symbols, rng.integers(1, 10**6, 200).tolist()))
+    store = get_snapshot_store(app)
+    store.publish(today, make_frame(dict(closes, SYM000=50.0), volumes=volumes))
+    assert client.get('/api/movers?index=BIG&k=1').get_json()["losers"][0]["symbol"] == "SYM000"
+    store.publish(today, make_frame(closes, volumes=volumes))
+    assert app.extensions['movers_tracker'].stats()["builds"] == 2  # rebuilt on publish, before any request
+
+    body = client.get('/api/movers?index=BIG&sector=IT&k=5').get_json()
+    it = [s for i, s in enumerate(symbols) if i % 2]
+    change = {s: round((closes[s] - 100.0) / 100.0 * 100, 2) for s in it}
+    assert body["version"] == f"{store.epoch}-2"
+    assert [t["symbol"] for t in body["gainers"]] == sorted(it, key=lambda s: (-change[s], it.index(s)))[:5]
+    assert [t["symbol"] for t in body["losers"]] == sorted(it, key=lambda s: (change[s], it.index(s)))[:5]
+    assert [t["symbol"] for t in body["volume"]] == sorted(it, key=lambda s: -volumes[s])[:5]
+    assert all(t["change"] > 0 for t in body["gainers"]) and body["losers"][0]["sector"] == "IT"
+    assert app.extensions['movers_tracker'].stats()["builds"] == 2
+
+    for query in ('', 'index=SENSEX', 'index=BIG&k=0', 'index=BIG&k=51', 'index=BIG&date=2024-13-01'):
+        assert client.get(f'/api/movers?{query}').status_code == 400
+
+
+def test_movers_table_shared_across_views(app, client):
+    provider = app.extensions['market_data_provider'] = FrameProvider(
+        make_frame({'HDFCBANK': 101.0, 'INFY': 98.0}, volumes={'HDFCBANK': 5, 'INFY': 7}))
+    body = client.get('/api/movers?index=NIFTY50&date=2024-04-01').get_json()
+    assert [t["symbol"] for t in body["gainers"]] == ["HDFCBANK"]
+    assert [t["symbol"] for t in body["losers"]] == ["INFY"]
+    assert [t["symbol"] for t in body["volume"]] == ["INFY", "HDFCBANK"]
+    assert body["losers"][0] == {"symbol": "INFY", "name": "Infosys Ltd", "price": 98.0, "change": -2.0,
+                                 "volume": 7, "sector": "IT"}
+    client.get('/api/movers?index=NIFTYBANK&date=2024-04-01&k=3')
+    assert len(provider.calls) == 1
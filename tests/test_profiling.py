@@ -0,0 +1,65 @@
+"""
+Tests for opt-in request profiling (app/profiling.py).
+Covers: header opt-in, stored stats, retrieval by request id, token guard.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pstats
+from app import create_app
+from app.providers import FrameProvider
+from conftest import make_frame
+
+
+def make_app(tmp_path, monkeypatch, token=None):
+    monkeypatch.setenv('NSEVIZ_PROFILE_DIR', str(tmp_path))
+    if token:
+        monkeypatch.setenv('NSEVIZ_PROFILE_TOKEN', token)
+    app = create_app()
+    app.testing = True
+    app.extensions['market_data_provider'] = FrameProvider(make_frame())
+    return app
+
+
+def test_profiled_request_is_stored_and_retrievable(tmp_path, monkeypatch):
+    client = make_app(tmp_path, monkeypatch).test_client()
+    resp = client.get('/api/heatmap-data?index=NIFTY50&date=2024-04-01', headers={'X-Profile': '1'})
+    assert resp.status_code == 200
+    request_id = resp.headers['X-Profile-Id']
+    stats = pstats.Stats(str(tmp_path / f"{request_id}.prof"))
+    assert any(func[2] == 'build_heatmap_response' for func in stats.stats)
+
+    text = client.get(f'/api/profiles/{request_id}')
+    assert text.status_code == 200
+    assert 'GET /api/heatmap-data?index=NIFTY50&date=2024-04-01' in text.get_data(as_text=True)
+    raw = client.get(f'/api/profiles/{request_id}?format=pstats')
+    assert raw.status_code == 200
+    assert client.get('/api/profiles').get_json()['profiles'] == [request_id]
+
+
+def test_requests_without_header_are_not_profiled(tmp_path, monkeypatch):
+    client = make_app(tmp_path, monkeypatch).test_client()
+    resp = client.get('/api/heatmap-data?index=NIFTY50&date=2024-04-01')
+    assert 'X-Profile-Id' not in resp.headers
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_token_guard_and_invalid_ids(tmp_path, monkeypatch):
+    client = make_app(tmp_path, monkeypatch, token='s3cret').test_client()
+    resp = client.get('/api/heatmap-data?index=NIFTY50', headers={'X-Profile': '1'})
+    assert 'X-Profile-Id' not in resp.headers
+    resp = client.get('/api/heatmap-data?index=NIFTY50&date=2024-04-01', headers={'X-Profile': 's3cret'})
+    request_id = resp.headers['X-Profile-Id']
+    assert client.get(f'/api/profiles/{request_id}').status_code == 403
+    headers = {'X-Profile': 's3cret'}
+    assert client.get(f'/api/profiles/{request_id}', headers=headers).status_code == 200
+    assert client.get('/api/profiles/..%2F..%2Fetc', headers=headers).status_code in (400, 404)
+    assert client.get('/api/profiles/' + '0' * 32, headers=headers).status_code == 404
+
+
+def test_profiling_disabled_without_directory(monkeypatch):
+    monkeypatch.delenv('NSEVIZ_PROFILE_DIR', raising=False)
+    app = create_app()
+    resp = app.test_client().get('/api/profiles')
+    assert resp.status_code == 404
@@ -0,0 +1,81 @@
+"""
+Tests for the market-data provider layer (app/providers.py).
+Covers: batched union fetch, offline file provider, provider selection, the provider interface,
+inclusive session ranges.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from unittest.mock import patch
+
+import pytest
+from app.providers import FileProvider, MarketDataProvider, YFinanceProvider, create_provider, union_symbols
+from conftest import make_frame
+
+
+def test_union_symbols_dedupes_in_order():
+    assert union_symbols([["HDFCBANK", "INFY"], ["HDFCBANK", "SBIN"]]) == ["HDFCBANK", "INFY", "SBIN"]
+
+
+def test_every_index_served_from_union_download(client, provider):
+    resp = client.get('/api/heatmap-data?index=NIFTYBANK&date=2024-04-01')
+    assert resp.status_code == 200
+    data = resp.get_json()
+    assert [item['symbol'] for item in data['data']] == ['HDFCBANK']
+    # NIFTYBANK only has HDFCBANK, but the provider is asked for the whole universe
+    assert provider.calls[-1]['symbols'] == ['HDFCBANK', 'INFY']
+
+    resp = client.get('/api/heatmap-data?index=NIFTY50&date=2024-04-01')
+    data = resp.get_json()
+    assert [item['symbol'] for item in data['data']] == ['HDFCBANK', 'INFY']
+    infy = data['data'][1]
+    assert infy['price'] == 1400.0
+    assert infy['volume'] == 80000
+
+
+def test_file_provider_reads_long_csv(tmp_path):
+    path = tmp_path / "quotes.csv"
+    path.write_text(
+        "Date,Symbol,Open,High,Low,Close,Volume\n"
+        "2024-04-01,HDFCBANK,1580,1605,1575,1600.5,100000\n"
+        "2024-04-01,INFY,1410,1415,1395,1400,80000\n"
+        "2024-04-02,HDFCBANK,1600,1620,1590,1610,90000\n"
+    )
+    provider = FileProvider(str(path))
+    df = provider.download(['INFY', 'HDFCBANK', 'SBIN'], start='2024-04-01', end='2024-04-01')
+    assert list(df.columns.get_level_values(0).unique()) == ['INFY', 'HDFCBANK']
+    assert df['HDFCBANK']['Close'].iloc[-1] == 1600.5
+    assert df['INFY']['Volume'].iloc[-1] == 80000
+    assert provider.download(['HDFCBANK'], start='2025-01-01', end='2025-01-01').empty
+
+
+def test_create_provider_from_config(tmp_path):
+    assert isinstance(create_provider({}), YFinanceProvider)
+    path = tmp_path / "quotes.csv"
+    path.write_text("Date,Symbol,Open,High,Low,Close,Volume\n")
+    assert isinstance(create_provider({"MARKET_DATA_PROVIDER": "file", "MARKET_DATA_FILE": str(path)}), FileProvider)
+    with pytest.raises(ValueError):
+        create_provider({"MARKET_DATA_PROVIDER": "file"})
+    with pytest.raises(ValueError):
+        create_provider({"MARKET_DATA_PROVIDER": "bloomberg"})
+
+
+def test_providers_implement_both_downloads():
+    class DailyOnly(MarketDataProvider):
+        def download(self, symbols, start, end):
+            return None
+
+    with pytest.raises(TypeError):
+        DailyOnly()
+
+
+def test_yfinance_range_includes_the_last_session():
+    provider = YFinanceProvider()
+    with patch('yfinance.download', return_value=make_frame()) as download:
+        provider.download(['HDFCBANK', 'INFY'], start='2024-04-01', end='2024-04-01')
+        provider.download_intraday(['INFY'], '2024-03-31')
+    # yf.download's end is exclusive; one session needs the next day as end
+    daily, intraday = download.call_args_list
+    assert (daily.kwargs['start'], daily.kwargs['end']) == ('2024-04-01', '2024-04-02')
+    assert (intraday.kwargs['start'], intraday.kwargs['end']) == ('2024-03-31', '2024-04-01')
@@ -0,0 +1,259 @@
+"""
+Tests for the shared-memory quote board (app/quote_board.py) and its use by /api/heatmap-data.
+Covers: publish/read across mappings, seqlock retries and torn reads from another process,
+writer election, identical responses from two workers, prefetch publishing, non-writers
+following the writer process.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import json
+import multiprocessing
+import subprocess
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+from app import create_app
+from app.providers import FrameProvider, MarketDataProvider
+from app.quote_board import QuoteBoard, get_quote_board
+from app.routes import view_tiles
+from app.scheduler import market_today, start_prefetch
+from app.snapshot import get_snapshot_store
+from app.streaming import get_tile_publisher
+from app.snapshot import MarketSnapshot
+from app.tiles import latest_quotes
+from conftest import make_frame
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+
+def quotes_frame(closes, when='2024-04-01 15:30'):
+    return make_frame(closes, dates=[when])
+
+
+def publish(board, closes, symbols, date='2024-04-01'):
+    quotes = latest_quotes(quotes_frame(closes), symbols, detail=True)
+    return board.publish(date, quotes, symbols, time.time())
+
+
+def test_publish_and_read_across_mappings(tmp_path):
+    path = str(tmp_path / "quotes")
+    writer = QuoteBoard(path, capacity=8)
+    assert writer.info() is None
+    assert publish(writer, {"A": 101.0, "B": 99.0}, ["A", "B", "C"]) == 1
+
+    reader = QuoteBoard(path, capacity=8)  # a second mapping, as in another worker
+    info, tiles = reader.tiles("view", ["C", "B", "A"], {"A": "IT"}, {"A": "Alpha"})
+    assert info.epoch == writer.epoch and info.version == 1 and info.date == "2024-04-01"
+    assert tiles == [
+        {"symbol": "B", "name": "B", "price": 99.0, "change": -1.0, "volume": 1000, "sector": "UNKNOWN"},
+        {"symbol": "A", "name": "Alpha", "price": 101.0, "change": 1.0, "volume": 1000, "sector": "IT"},
+    ]  # C has no quote
+    records = reader.read(lambda records, info: records.copy())
+    assert records["symbol_id"].tolist() == [0, 1, 2] and records["open"][0] == 100.0
+    assert records["timestamp"][0] == int(pd.Timestamp('2024-04-01 15:30').timestamp())
+
+    publish(writer, {"B": 98.0, "D": 50.0}, ["B", "D"])  # new symbol table
+    assert [t["symbol"] for t in reader.tiles("view", ["A", "B", "D"], {}, {})[1]] == ["B", "D"]
+    with pytest.raises(ValueError):
+        publish(writer, {}, [f"S{i}" for i in range(9)])
+    assert QuoteBoard(path, capacity=16).info() is None  # another layout starts a fresh board
+    assert reader.info().version == 2  # in a new file: the old mapping stays readable
+
+
+def test_views_follow_symbol_table_changes_across_threads(tmp_path):
+    board = QuoteBoard(str(tmp_path / "quotes"), capacity=4)
+    tables = [["A", "B"], ["B", "A"]]
+    publish(board, {"A": 1.0, "B": 2.0}, tables[0])
+    errors = []
+
+    def read():
+        for _ in range(300):
+            tiles = board.tiles("view", ["A", "B"], {}, {})[1]
+            if {t["symbol"]: t["price"] for t in tiles} != {"A": 1.0, "B": 2.0}:
+                errors.append(tiles)
+
+    readers = [threading.Thread(target=read) for _ in range(4)]
+    for thread in readers:
+        thread.start()
+    for i in range(300):
+        publish(board, {"A": 1.0, "B": 2.0}, tables[i % 2])
+    for thread in readers:
+        thread.join()
+    assert errors == []
+
+
+def test_reader_retries_when_a_write_lands_mid_read(tmp_path):
+    board = QuoteBoard(str(tmp_path / "quotes"), capacity=4)
+    publish(board, {"A": 101.0}, ["A"])
+    calls = []
+
+    def read(records, info):
+        calls.append(info.version)
+        if len(calls) == 1:
+            publish(board, {"A": 102.0}, ["A"])  # the writer publishes while we read
+        return float(records["price"][0])
+
+    assert board.read(read) == 102.0 and calls == [1, 2]
+    assert board.stats()["retries"] == 1
+
+
+def _write_forever(path, stop):
+    board = QuoteBoard(path, capacity=512)
+    symbols = [f"S{i}" for i in range(500)]
+    quotes = latest_quotes(quotes_frame({s: 0.0 for s in symbols}), symbols, detail=True)
+    k = 0
+    while not stop.is_set():
+        k += 1
+        quotes["price"] = float(k)
+        board.publish("2024-04-01", quotes, symbols, float(k))
+
+
+def test_reads_are_never_torn_by_a_writer_process(tmp_path):
+    path = str(tmp_path / "quotes")
+    board = QuoteBoard(path, capacity=512)
+    stop = multiprocessing.Event()
+    writer = multiprocessing.Process(target=_write_forever, args=(path, stop))
+    writer.start()
+    try:
+        deadline = time.time() + 10
+        while board.info() is None and time.time() < deadline:
+            time.sleep(0.01)
+        for _ in range(300):
+            # Every row and the header belong to the same publish
+            prices, as_of = board.read(lambda records, info: (np.unique(records["price"]).tolist(), info.as_of))
+            assert prices == [as_of]
+    finally:
+        stop.set()
+        writer.join(10)
+    assert board.info().version > 1
+
+
+def test_one_writer_at_a_time(tmp_path):
+    path = str(tmp_path / "quotes")
+    board = QuoteBoard(path, capacity=4)
+    assert board.acquire_writer() and board.acquire_writer()
+    code = ("from app.quote_board import QuoteBoard; "
+            f"print(QuoteBoard({path!r}, capacity=4).acquire_writer())")
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == "False"
+
+
+class NoDownloads(MarketDataProvider):
+    def download(self, symbols, start, end):
+        raise AssertionError("workers must read the shared board")
+
+    def download_intraday(self, symbols, date, interval="1m"):
+        raise AssertionError("workers must read the shared board")
+
+
+def test_workers_serve_identical_board_data(tmp_path):
+    today = market_today().strftime('%Y-%m-%d')
+    workers = []
+    for _ in range(2):
+        app = create_app()
+        app.config['SHARED_QUOTES_FILE'] = str(tmp_path / "quotes")
+        app.extensions['market_data_provider'] = NoDownloads()
+        workers.append(app)
+    board = get_quote_board(workers[0])
+    snapshot = MarketSnapshot(1, today, datetime.now(), quotes_frame({"HDFCBANK": 1616.0, "INFY": 1400.0}))
+    board.publish_snapshot(snapshot, ["HDFCBANK", "INFY"])
+
+    bodies = [app.test_client().get('/api/heatmap-data?index=NIFTY50').get_json() for app in workers]
+    assert bodies[0] == bodies[1]
+    assert bodies[0]["version"] == f"{board.epoch}-1"
+    assert [(t["symbol"], t["price"]) for t in bodies[0]["data"]] == [("HDFCBANK", 1616.0), ("INFY", 1400.0)]
+
+    board.publish_snapshot(MarketSnapshot(2, today, datetime.now(), quotes_frame({"HDFCBANK": 1620.0, "INFY": 1400.0})),
+                           ["HDFCBANK", "INFY"])
+    client = workers[1].test_client()
+    delta = client.get(f'/api/heatmap-data?index=NIFTY50&since={bodies[0]["version"]}').get_json()
+    assert delta["version"] == f"{board.epoch}-2" and [t["symbol"] for t in delta["data"]] == ["HDFCBANK"]
+
+
+def test_prefetch_writer_publishes_to_board(tmp_path):
+    today = market_today().strftime('%Y-%m-%d')
+    app = create_app()
+    app.config['SHARED_QUOTES_FILE'] = str(tmp_path / "quotes")
+    frame = quotes_frame({"HDFCBANK": 1616.0, "INFY": 1400.0}, when=today)
+    app.extensions['market_data_provider'] = FrameProvider(frame)
+    scheduler = start_prefetch(app, lambda: ["HDFCBANK", "INFY"])
+    try:
+        deadline = time.time() + 5
+        while get_quote_board(app).info() is None and time.time() < deadline:
+            time.sleep(0.01)
+    finally:
+        scheduler.stop(5)
+    info = get_quote_board(app).info()
+    assert info.date == today and info.version == 1
+    assert get_quote_board(app).stats()["writer"] is True
+
+
+def _writer_process(path, today, prices, published, stop):
+    board = QuoteBoard(path)
+    assert board.acquire_writer()
+    symbols = ["HDFCBANK", "INFY"]
+    for price in prices:
+        quotes = latest_quotes(quotes_frame({"HDFCBANK": price, "INFY": 1400.0}, when=f"{today} 10:15"),
+                               symbols, detail=True)
+        board.publish(today, quotes, symbols, time.time())
+        published.set()
+        stop.wait(10)
+        stop.clear()
+
+
+def test_non_writers_follow_the_writer_process(tmp_path):
+    today = market_today().strftime('%Y-%m-%d')
+    path = str(tmp_path / "quotes")
+    published, stop = multiprocessing.Event(), multiprocessing.Event()
+    writer = multiprocessing.Process(target=_writer_process, args=(path, today, [1616.0, 1650.0], published, stop))
+    writer.start()
+    app = create_app()
+    app.config['SHARED_QUOTES_FILE'] = path
+    app.config['PREFETCH_INTERVAL'] = 0.02
+    app.extensions['market_data_provider'] = NoDownloads()
+    store = get_snapshot_store(app)
+    scheduler = None
+    try:
+        assert published.wait(10)
+        published.clear()
+        scheduler = start_prefetch(app, lambda: ["HDFCBANK", "INFY"])
+
+        def wait_for(version):
+            deadline = time.time() + 10
+            while (store.latest() is None or store.latest().version < version) and time.time() < deadline:
+                time.sleep(0.01)
+            return store.latest()
+
+        snapshot = wait_for(1)
+        assert snapshot.date == today
+        quotes = latest_quotes(snapshot.frame, ["HDFCBANK", "INFY"], detail=True)
+        assert quotes["price"].tolist() == [1616.0, 1400.0] and quotes["volume"].tolist() == [1000, 1000]
+        assert quotes["timestamp"]["HDFCBANK"] == int(pd.Timestamp(f"{today} 10:15").timestamp())
+        client = app.test_client()
+        movers = client.get('/api/movers?index=NIFTY50&k=1').get_json()
+        assert movers["gainers"][0]["symbol"] == "HDFCBANK" and movers["gainers"][0]["price"] == 1616.0
+
+        publisher = get_tile_publisher(app, lambda frame, view: view_tiles(app, frame, view))
+        subscriber = publisher.subscribe(("NIFTY50", None, None), store.latest())
+        subscriber._queue.get_nowait()  # the full view
+
+        stop.set()  # the writer publishes its next version
+        assert published.wait(10)
+        assert wait_for(2).version == 2
+        event = json.loads(subscriber._queue.get(timeout=5).decode().split("data: ", 1)[1])
+        assert [(t["symbol"], t["price"]) for t in event["tiles"]] == [("HDFCBANK", 1650.0)]
+        tree = client.get('/api/treemap?index=NIFTY50').get_json()["tree"]
+        prices = {stock["name"]: stock["price"] for sector in tree["children"] for stock in sector["children"]}
+        assert prices == {"HDFCBANK": 1650.0, "INFY": 1400.0}
+        assert not get_quote_board(app).stats()["writer"] and scheduler.error_count == 0
+    finally:
+        if scheduler is not None:
+            scheduler.stop(5)
+        stop.set()
+        writer.join(10)
@@ -0,0 +1,97 @@
+"""
+Tests for the constituent registry (app/registry.py).
+Covers: precomputed index x sector x category views, hot reload, bad reloads, endpoint wiring.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import json
+from app import create_app
+from app.providers import FrameProvider
+from app.registry import ConstituentRegistry, get_registry
+from conftest import make_frame
+
+DATA = {
+    "categories": ["LARGE_CAP", "MID_CAP"],
+    "indices": {"NIFTY50": ["HDFCBANK", "INFY", "TCS"], "NIFTYBANK": ["HDFCBANK", "KOTAKBANK"]},
+    "symbols": {
+        "HDFCBANK": {"name": "HDFC Bank", "sector": "FINANCE", "category": "LARGE_CAP"},
+        "INFY": {"name": "Infosys Ltd", "sector": "IT", "category": "LARGE_CAP"},
+        "TCS": {"name": "TCS", "sector": "IT", "category": "LARGE_CAP"},
+        "KOTAKBANK": {"name": "Kotak Bank", "sector": "FINANCE", "category": "MID_CAP"},
+    },
+}
+
+
+def write(path, data):
+    path.write_text(json.dumps(data))
+    return str(path)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_views_and_universe(tmp_path):
+    tables = ConstituentRegistry(write(tmp_path / "c.json", DATA)).current()
+    assert tables.universe == ("HDFCBANK", "INFY", "TCS", "KOTAKBANK")
+    assert tables.select("NIFTY50") == ("HDFCBANK", "INFY", "TCS")
+    assert tables.select("NIFTY50", "IT") == ("INFY", "TCS")
+    assert tables.select("NIFTYBANK", "FINANCE", "MID_CAP") == ("KOTAKBANK",)
+    assert tables.select("NIFTY50", None, "MID_CAP") == ()
+    assert tables.select("NIFTY50", "AUTO") == ()
+    # Unknown categories (and "ALL") do not filter
+    assert tables.select("NIFTY50", "IT", "ALL") == ("INFY", "TCS")
+    assert tables.name_of["KOTAKBANK"] == "Kotak Bank"
+    assert not tables.has_index("SENSEX")
+
+
+def test_reloads_when_file_changes(tmp_path):
+    path = write(tmp_path / "c.json", DATA)
+    clock = FakeClock()
+    registry = ConstituentRegistry(path, check_interval=5, clock=clock)
+    first = registry.current()
+    changed = dict(DATA, indices={"NIFTY50": ["INFY"]})
+    write(tmp_path / "c.json", changed)
+    os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 10 ** 9))
+    assert registry.current() is first  # not checked again before the interval
+    clock.now = 5
+    second = registry.current()
+    assert second.version == first.version + 1
+    assert second.select("NIFTY50") == ("INFY",)
+    clock.now = 10
+    assert registry.current() is second  # unchanged file is not re-read
+
+
+def test_bad_reload_keeps_previous_tables(tmp_path):
+    path = write(tmp_path / "c.json", DATA)
+    clock = FakeClock()
+    registry = ConstituentRegistry(path, check_interval=1, clock=clock)
+    first = registry.current()
+    (tmp_path / "c.json").write_text("{not json")
+    clock.now = 1
+    assert registry.current() is first
+    assert registry.stats()["reload_errors"] == 1
+
+
+def test_endpoint_uses_registry_file(tmp_path, monkeypatch):
+    monkeypatch.setenv('NSEVIZ_CONSTITUENTS_FILE', write(tmp_path / "c.json", DATA))
+    app = create_app()
+    app.testing = True
+    provider = FrameProvider(make_frame(dict.fromkeys(['HDFCBANK', 'INFY', 'TCS', 'KOTAKBANK'], 101.0), volumes=10))
+    app.extensions['market_data_provider'] = provider
+    client = app.test_client()
+
+    data = client.get('/api/heatmap-data?index=NIFTYBANK&category=MID_CAP&date=2024-04-01').get_json()
+    assert [tile["symbol"] for tile in data["data"]] == ["KOTAKBANK"]
+    assert data["data"][0]["name"] == "Kotak Bank"
+    data = client.get('/api/heatmap-data?index=NIFTY50&sector=IT&date=2024-04-01').get_json()
+    assert [tile["symbol"] for tile in data["data"]] == ["INFY", "TCS"]
+    assert provider.calls[0]["symbols"] == ["HDFCBANK", "INFY", "TCS", "KOTAKBANK"]
+    assert client.get('/api/heatmap-data?index=NIFTY100').status_code == 400
+    assert get_registry(app).stats()["symbols"] == 4
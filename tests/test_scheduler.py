@@ -0,0 +1,109 @@
+"""
+Tests for the market-hours prefetch scheduler (app/scheduler.py) and snapshot store.
+Covers: trading-hours cadence, closing refresh, IST session dates, today's yfinance range,
+snapshot publishing, route reads.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from datetime import date, datetime, timedelta, timezone
+from unittest.mock import patch
+
+import pandas as pd
+from app import scheduler
+from app.routes import is_past_session
+from app.scheduler import IST, PrefetchScheduler, is_market_open, market_today, refresh_snapshot
+from app.providers import YFinanceProvider
+from app.snapshot import get_snapshot_store
+from conftest import make_frame
+
+
+def ist(*args):
+    return datetime(*args, tzinfo=IST)
+
+
+def test_is_market_open():
+    assert is_market_open(ist(2024, 4, 1, 9, 15))   # Monday open
+    assert is_market_open(ist(2024, 4, 1, 15, 30))
+    assert not is_market_open(ist(2024, 4, 1, 9, 0))
+    assert not is_market_open(ist(2024, 4, 1, 16, 0))
+    assert not is_market_open(ist(2024, 4, 6, 11, 0))  # Saturday
+
+
+def test_session_dates_follow_ist(app, provider, monkeypatch):
+    class Clock(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            # 20:00 UTC on 1 April is 01:30 on 2 April in IST
+            return datetime(2024, 4, 1, 20, 0, tzinfo=timezone.utc).astimezone(tz)
+
+    monkeypatch.setattr(scheduler, "datetime", Clock)
+    assert market_today() == date(2024, 4, 2)
+    assert is_past_session('2024-04-01') and not is_past_session('2024-04-02')
+    assert refresh_snapshot(app, ['HDFCBANK', 'INFY']).date == '2024-04-02'
+    assert provider.calls[-1]['start'] == '2024-04-02'
+
+
+def test_scheduler_refreshes_in_session_and_once_after_close():
+    now = {'t': ist(2024, 4, 1, 8, 0)}
+    calls = []
+    scheduler = PrefetchScheduler(lambda: calls.append(now['t']), clock=lambda: now['t'])
+    assert scheduler.tick()          # startup refresh
+    assert not scheduler.tick()      # pre-open: idle
+    now['t'] = ist(2024, 4, 1, 10, 0)
+    assert scheduler.tick()
+    assert scheduler.tick()
+    now['t'] = ist(2024, 4, 1, 15, 45)
+    assert scheduler.tick()          # closing refresh
+    assert not scheduler.tick()
+    now['t'] = ist(2024, 4, 6, 12, 0)
+    assert not scheduler.tick()      # weekend
+    assert len(calls) == 4
+
+
+def test_scheduler_counts_failures():
+    def failing():
+        raise RuntimeError('throttled')
+    scheduler = PrefetchScheduler(failing, clock=lambda: ist(2024, 4, 1, 10, 0))
+    assert not scheduler.tick()
+    assert scheduler.error_count == 1
+    assert scheduler.refresh_count == 0
+
+
+
+def test_snapshot_asks_yfinance_for_todays_session(app):
+    app.extensions['market_data_provider'] = YFinanceProvider()
+    today = market_today()
+    with patch('yfinance.download', return_value=make_frame(dates=[today.isoformat()])) as download:
+        snapshot = refresh_snapshot(app, ['HDFCBANK', 'INFY'])
+    # yf.download's end is exclusive: start == end would be an empty range
+    assert download.call_args.kwargs['start'] == today.isoformat()
+    assert download.call_args.kwargs['end'] == (today + timedelta(days=1)).isoformat()
+    assert not snapshot.frame.empty
+
+
+def test_route_reads_published_snapshot(app, provider):
+    snapshot = refresh_snapshot(app, ['HDFCBANK', 'INFY'])
+    assert snapshot.version == 1
+    assert len(provider.calls) == 1
+    client = app.test_client()
+    for index in ('NIFTY50', 'NIFTYBANK', 'NIFTY50'):
+        resp = client.get(f'/api/heatmap-data?index={index}')
+        assert resp.status_code == 200
+        assert resp.get_json()['data']
+    assert len(provider.calls) == 1
+
+    # A new snapshot version is picked up immediately
+    get_snapshot_store(app).publish(snapshot.date, pd.DataFrame())
+    data = client.get('/api/heatmap-data?index=NIFTY50').get_json()
+    assert data['data'] == []
+    assert len(provider.calls) == 1
+
+
+def test_scheduler_thread_start_stop(app):
+    scheduler = PrefetchScheduler(lambda: refresh_snapshot(app, ['HDFCBANK']), interval=60)
+    scheduler.start()
+    scheduler.stop(timeout=5)
+    assert scheduler.refresh_count == 1
+    assert get_snapshot_store(app).latest() is not None
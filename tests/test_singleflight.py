@@ -0,0 +1,83 @@
+"""
+Tests for single-flight coalescing (app/singleflight.py) of upstream fetches.
+Covers: shared results, shared errors, concurrent endpoint requests.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import threading
+import time
+import pytest
+from app.providers import FrameProvider
+from app.singleflight import SingleFlight
+from conftest import make_frame
+
+
+def run_concurrently(target, args_list):
+    threads = [threading.Thread(target=target, args=args) for args in args_list]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+
+
+def test_concurrent_calls_share_one_execution():
+    group = SingleFlight()
+    release = threading.Event()
+    executions = []
+    results = []
+
+    def work():
+        executions.append(1)
+        release.wait(5)
+        return 'frame'
+
+    def caller():
+        results.append(group.do('2024-04-01', work))
+
+    threads = [threading.Thread(target=caller) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    # Wait until every caller has joined the flight, then let the leader finish
+    for _ in range(500):
+        if group.stats()['calls'] == 8:
+            break
+        time.sleep(0.01)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert results == ['frame'] * 8
+    assert len(executions) == 1
+    stats = group.stats()
+    assert stats['coalesced'] == 7
+    assert stats['in_flight'] == 0
+
+
+def test_errors_are_shared_and_not_remembered():
+    group = SingleFlight()
+    with pytest.raises(RuntimeError):
+        group.do('k', lambda: (_ for _ in ()).throw(RuntimeError('throttled')))
+    assert group.do('k', lambda: 'ok') == 'ok'
+    assert group.stats()['executions'] == 2
+
+
+class SlowProvider(FrameProvider):
+    def download(self, symbols, start, end):
+        time.sleep(0.2)
+        return super().download(symbols, start, end)
+
+
+def test_concurrent_requests_coalesce_upstream_download(app):
+    provider = app.extensions['market_data_provider'] = SlowProvider(make_frame())
+    statuses = []
+
+    def request_index(index):
+        # Different views of the same date share the in-flight universe download
+        statuses.append(app.test_client().get(f'/api/heatmap-data?index={index}&date=2024-04-01').status_code)
+
+    run_concurrently(request_index, [('NIFTY50',), ('NIFTYBANK',)] * 4)
+    assert statuses == [200] * 8
+    assert len(provider.calls) == 1
+    stats = app.test_client().get('/api/cache-stats').get_json()
+    assert stats['singleflight']['coalesced'] >= 1
@@ -0,0 +1,132 @@
+"""
+Tests for deferred heavy imports (app/lazy.py) and the pre-fork warm-up (app/warmup.py).
+Covers: create_app() without numpy/pandas/yfinance, lazy proxies, warm-up snapshot and fork-unsafe state.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import gc
+import subprocess
+from types import ModuleType
+from unittest.mock import patch
+
+from app import create_app
+from app.fetch_engine import get_fetch_engine
+from app.lazy import LazyModule, is_loaded, lazy_import
+from app.providers import FrameProvider, MarketDataProvider
+from app.scheduler import market_today
+from app.snapshot import get_snapshot_store
+from app.warmup import warm_up
+from conftest import make_frame
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+
+def test_create_app_defers_heavy_imports():
+    code = ("import sys; from app import create_app; create_app(); "
+            "print(','.join(m for m in ('numpy', 'pandas', 'yfinance') if m in sys.modules))")
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == ""
+
+
+def test_lazy_module_imports_on_first_use_and_rebinds():
+    proxy = LazyModule("json")
+    assert not is_loaded(proxy)
+    assert proxy.loads("[1]") == [1] and is_loaded(proxy)
+    with patch("json.loads", return_value="patched"):
+        assert proxy.loads("[1]") == "patched"
+
+    namespace = {}
+    namespace["wave"] = lazy_import("wave", namespace)
+    assert isinstance(namespace["wave"], LazyModule)
+    namespace["wave"].Error
+    assert isinstance(namespace["wave"], ModuleType)  # later accesses skip the proxy
+    assert lazy_import("wave") is namespace["wave"]
+
+
+def quotes_frame():
+    return make_frame({'HDFCBANK': [1590.0, 1600.5], 'INFY': [1420.0, 1400.0]},
+                      opens={'HDFCBANK': [1580.0, 1590.0], 'INFY': [1410.0, 1420.0]},
+                      volumes={'HDFCBANK': [90000, 100000], 'INFY': [70000, 80000]},
+                      dates=['2024-03-28', '2024-04-01'])
+
+
+def test_warm_up_publishes_snapshot_before_first_request():
+    app = create_app()
+    app.config['FETCH_CHUNK_SIZE'] = 1
+    app.config['PREFETCH_ENABLED'] = True  # the workers' schedulers replace the snapshot
+    provider = app.extensions['market_data_provider'] = FrameProvider(quotes_frame())
+    get_fetch_engine(app)
+    try:
+        summary = warm_up(app)
+    finally:
+        gc.unfreeze()
+    assert summary["symbols"] == 2 and summary["version"] == 1
+    assert {"numpy", "pandas", "yfinance"} <= set(summary["modules"])
+    assert "fetch_engine" not in app.extensions  # its threads would not survive a fork
+    calls = len(provider.calls)
+    body = app.test_client().get('/api/heatmap-data?index=NIFTY50').get_json()
+    assert body["version"].endswith("-1") and len(body["data"]) == 2
+    assert len(provider.calls) == calls  # served from the warmed snapshot
+
+
+def test_warm_up_without_prefetch_publishes_no_snapshot():
+    app = create_app()
+    app.config['HEATMAP_CACHE_TTL'] = 0
+    app.config['HEATMAP_CACHE_STALE_TTL'] = 0
+    frame = quotes_frame()
+    provider = app.extensions['market_data_provider'] = FrameProvider(frame)
+    try:
+        summary = warm_up(app)
+    finally:
+        gc.unfreeze()
+    # Nothing would ever publish a newer snapshot, so today's data must keep expiring
+    assert summary["version"] is None and get_snapshot_store(app).latest() is None
+    client = app.test_client()
+    assert client.get('/api/heatmap-data?index=NIFTY50').get_json()["data"][0]["price"] == 1600.5
+    provider.frame = frame.copy()
+    provider.frame[('HDFCBANK', 'Close')] = 1650.0
+    assert client.get('/api/heatmap-data?index=NIFTY50').get_json()["data"][0]["price"] == 1650.0
+
+
+def test_warmed_app_starts_prefetch_on_first_request(tmp_path, monkeypatch):
+    today = market_today().strftime('%Y-%m-%d')
+    quotes = tmp_path / "quotes.csv"
+    quotes.write_text(f"Date,Symbol,Open,High,Low,Close,Volume\n{today},INFY,100,102,99,101,1000\n")
+    for name, value in (('NSEVIZ_PREFETCH', '1'), ('NSEVIZ_WARMUP', '1'), ('NSEVIZ_DATA_PROVIDER', 'file'),
+                        ('NSEVIZ_DATA_FILE', str(quotes))):
+        monkeypatch.setenv(name, value)
+    try:
+        app = create_app()
+    finally:
+        gc.unfreeze()
+    # Not in the loading process, nor in every forked child: only where requests are served
+    assert "prefetch_scheduler" not in app.extensions
+    assert get_snapshot_store(app).latest().version == 1
+    try:
+        assert app.test_client().get('/api/heatmap-data?index=NIFTY50').status_code == 200
+        scheduler = app.extensions["prefetch_scheduler"]
+        assert scheduler.running
+        app.test_client().get('/api/heatmap-data?index=NIFTY50')
+        assert app.extensions["prefetch_scheduler"] is scheduler
+    finally:
+        app.extensions["prefetch_scheduler"].stop(5)
+
+
+def test_warm_up_survives_upstream_failure():
+    class Failing(MarketDataProvider):
+        def download(self, symbols, start, end):
+            raise RuntimeError("upstream down")
+
+        def download_intraday(self, symbols, date, interval="1m"):
+            raise RuntimeError("upstream down")
+
+    app = create_app()
+    app.config['PREFETCH_ENABLED'] = True
+    app.extensions['market_data_provider'] = Failing()
+    try:
+        summary = warm_up(app)
+    finally:
+        gc.unfreeze()
+    assert summary["version"] is None and get_snapshot_store(app).latest() is None
@@ -0,0 +1,133 @@
+"""
+Tests for the SSE tile stream (app/streaming.py) and /api/heatmap-stream.
+Covers: one computation per view per snapshot, diffs, resume by event id, limits, endpoint.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import json
+from app.snapshot import SnapshotStore
+from app.streaming import KEEPALIVE, TilePublisher, diff_tiles
+from conftest import make_frame
+
+
+def parse(event):
+    lines = event.decode().strip().split("\n")
+    fields = dict(line.split(": ", 1) for line in lines)
+    return int(fields["id"].rsplit("-", 1)[1]), json.loads(fields["data"])
+
+
+def tiles_from(values):
+    return [{"symbol": s, "price": p, "change": 0.0, "volume": 1} for s, p in values.items()]
+
+
+class FakeBuild:
+    def __init__(self):
+        self.calls = 0
+        self.values = {"A": 1.0, "B": 2.0}
+
+    def __call__(self, frame, view):
+        self.calls += 1
+        return tiles_from(self.values)
+
+
+def test_diff_tiles():
+    previous = {t["symbol"]: t for t in tiles_from({"A": 1.0, "B": 2.0, "C": 3.0})}
+    current = {t["symbol"]: t for t in tiles_from({"A": 1.0, "B": 2.5, "D": 4.0})}
+    changed, removed = diff_tiles(previous, current)
+    assert [t["symbol"] for t in changed] == ["B", "D"]
+    assert removed == ["C"]
+
+
+def test_fan_out_computes_once_per_view():
+    store = SnapshotStore()
+    build = FakeBuild()
+    publisher = TilePublisher(build)
+    store.add_listener(publisher.publish)
+    first = store.publish("2024-04-01", make_frame())
+    subs = [publisher.subscribe(("NIFTY50", None, None), first) for _ in range(3)]
+    assert build.calls == 1
+    assert all(parse(s._queue.get_nowait())[1]["full"] for s in subs)
+
+    build.values = {"A": 1.5, "B": 2.0}
+    store.publish("2024-04-01", make_frame())
+    assert build.calls == 2
+    events = [s._queue.get_nowait() for s in subs]
+    assert len(set(events)) == 1  # the same bytes are queued to every subscriber
+    version, data = parse(events[0])
+    assert version == 2 and data["full"] is False
+    assert data["tiles"] == [{"symbol": "A", "price": 1.5, "change": 0.0, "volume": 1}]
+
+    store.publish("2024-04-01", make_frame())  # nothing changed: no event
+    assert all(s._queue.empty() for s in subs)
+    assert publisher.stats()["subscribers"] == 3
+
+
+def test_resume_and_limits():
+    publisher = TilePublisher(FakeBuild(), max_subscribers=2)
+    snapshot = SnapshotStore().publish("2024-04-01", make_frame())
+    current = publisher.subscribe(("NIFTY50", None, None), snapshot, last_version=snapshot.version)
+    assert current._queue.empty()  # already has this version
+    publisher.subscribe(("NIFTYBANK", None, None), snapshot)
+    assert publisher.subscribe(("NIFTY50", "IT", None), snapshot) is None
+    publisher.unsubscribe(current)
+    assert current.closed
+    assert publisher.stats()["channels"] == 1
+
+
+def test_slow_subscriber_is_dropped():
+    store = SnapshotStore()
+    build = FakeBuild()
+    publisher = TilePublisher(build)
+    store.add_listener(publisher.publish)
+    subscriber = publisher.subscribe(("NIFTY50", None, None), store.publish("2024-04-01", make_frame()))
+    for i in range(70):
+        build.values = {"A": float(i), "B": 2.0}
+        store.publish("2024-04-01", make_frame())
+    assert subscriber.closed
+    assert publisher.stats()["dropped"] == 1
+    assert publisher.stats()["subscribers"] == 0
+
+
+def test_stream_endpoint(app, client):
+    app.config['STREAM_HEARTBEAT'] = 0.05
+    store = app.extensions['snapshot_store'] = SnapshotStore()
+    # No updates would ever arrive: without prefetch, or before its first snapshot
+    assert client.get('/api/heatmap-stream?index=NIFTY50').status_code == 503
+    app.config['PREFETCH_ENABLED'] = True
+    assert client.get('/api/heatmap-stream?index=NIFTY50').get_json()['error']['code'] == 'UNAVAILABLE'
+    store.publish("2024-04-01", make_frame())
+    resp = client.get('/api/heatmap-stream?index=NIFTY50&sector=FINANCE', buffered=False)
+    assert resp.status_code == 200
+    assert resp.mimetype == 'text/event-stream'
+    chunks = iter(resp.response)
+    assert next(chunks).startswith(b"retry:")
+    version, data = parse(next(chunks))
+    assert data["full"] and [t["symbol"] for t in data["tiles"]] == ["HDFCBANK"]
+    assert next(chunks) == KEEPALIVE
+
+    moved = make_frame()
+    moved[('HDFCBANK', 'Close')], moved[('INFY', 'Close')] = 1610.0, 1390.0
+    store.publish("2024-04-01", moved)
+    version, data = parse(next(chunks))
+    assert version == 2 and not data["full"]
+    assert data["tiles"] == [{"symbol": "HDFCBANK", "price": 1610.0, "change": 1.9, "volume": 100000}]
+    resp.close()
+    assert app.extensions['tile_publisher'].stats()["subscribers"] == 0
+
+    # Resuming: the same store's id skips the full event, another epoch's (e.g. before a restart) does not
+    for last_id, full in ((f"{store.epoch}-2", False), ("0badcafe-2", True)):
+        resp = client.get('/api/heatmap-stream?index=NIFTY50&sector=FINANCE', buffered=False,
+                                     headers={"Last-Event-ID": last_id})
+        chunks = iter(resp.response)
+        next(chunks)
+        event = next(chunks)
+        assert (event != KEEPALIVE) == full
+        if full:
+            assert event.startswith(f"event: tiles\nid: {store.epoch}-2\n".encode())
+        resp.close()
+
+    assert client.get('/api/heatmap-stream').status_code == 400
+    assert client.get('/api/heatmap-stream?index=SENSEX').status_code == 400
+    assert client.get('/api/heatmap-stream?index=NIFTY50&index=NIFTYBANK').status_code == 400
@@ -0,0 +1,60 @@
+"""
+Tests for vectorized heatmap tile computation (app/tiles.py).
+Covers: last valid row, NaN handling, flat frames, sector join and ordering.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+import pandas as pd
+from app.tiles import build_tiles, latest_quotes
+from conftest import make_frame
+
+SECTORS = {"HDFCBANK": "FINANCE", "INFY": "IT", "TCS": "IT"}
+NAMES = {"HDFCBANK": "HDFC Bank", "INFY": "Infosys Ltd"}
+
+
+def two_sessions():
+    # TCS never traded; HDFCBANK has no volume and INFY a zero open on the second day
+    return make_frame({'HDFCBANK': [1600.0, 1616.0], 'INFY': [1400.0, 1415.0], 'TCS': np.nan},
+                      opens={'HDFCBANK': [1580.0, 1600.0], 'INFY': [1410.0, 0.0]},
+                      volumes={'HDFCBANK': [100000, np.nan], 'INFY': [80000, 85000]},
+                      dates=['2024-04-01', '2024-04-02'])
+
+
+def test_latest_quotes_vectorized():
+    quotes = latest_quotes(two_sessions(), ['HDFCBANK', 'INFY', 'TCS', 'SBIN'])
+    assert list(quotes.index) == ['HDFCBANK', 'INFY']  # TCS has no Close, SBIN is absent
+    hdfc = quotes.loc['HDFCBANK']
+    assert hdfc['price'] == 1616.0
+    assert hdfc['change'] == 1.0
+    assert hdfc['volume'] == 0  # missing volume
+    assert quotes.loc['INFY', 'change'] == 0.0  # non-positive open
+
+
+def test_latest_quotes_uses_last_valid_close():
+    df = two_sessions()
+    df.loc[df.index[-1], ('HDFCBANK', 'Close')] = np.nan
+    quotes = latest_quotes(df, ['HDFCBANK'])
+    assert quotes.loc['HDFCBANK', 'price'] == 1600.0
+    assert quotes.loc['HDFCBANK', 'volume'] == 100000
+
+
+def test_flat_frame_applies_to_every_symbol():
+    df = pd.DataFrame({'Open': [1000.0], 'Close': [1020.0], 'Volume': [5]}, index=pd.to_datetime(['2024-04-01']))
+    quotes = latest_quotes(df, ['HDFCBANK', 'INFY'])
+    assert list(quotes['price']) == [1020.0, 1020.0]
+    assert latest_quotes(pd.DataFrame({'Open': [1.0]}), ['HDFCBANK']).empty
+
+
+def test_build_tiles_joins_names_and_sectors():
+    quotes = latest_quotes(two_sessions(), ['HDFCBANK', 'INFY'])
+    tiles = build_tiles(quotes, ['INFY', 'HDFCBANK', 'TCS'], SECTORS, NAMES)
+    assert [tile['symbol'] for tile in tiles] == ['INFY', 'HDFCBANK']
+    assert tiles[0] == {"symbol": "INFY", "name": "Infosys Ltd", "price": 1415.0,
+                        "change": 0.0, "volume": 85000, "sector": "IT"}
+    assert isinstance(tiles[1]['volume'], int)
+    assert isinstance(tiles[1]['price'], float)
+    assert [tile['symbol'] for tile in build_tiles(quotes, ['INFY', 'HDFCBANK'], SECTORS, NAMES, 'FINANCE')] == ['HDFCBANK']
+    assert build_tiles(quotes, ['INFY'], SECTORS, NAMES, 'AUTO') == []
@@ -0,0 +1,109 @@
+"""
+Tests for the treemap hierarchy (app/treemap.py) and /api/treemap.
+Covers: sector totals, market-cap weighting, sector reuse per data and members, unrounded index totals,
+endpoint.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import json
+from app.scheduler import market_today
+from app.snapshot import get_snapshot_store
+from app.treemap import TreemapBuilder, sector_totals
+from conftest import make_frame
+
+
+def tile(symbol, change, sector, volume=100, price=10.0):
+    return {"symbol": symbol, "name": symbol, "price": price, "change": change, "volume": volume, "sector": sector}
+
+
+def test_sector_totals():
+    tiles = [tile("A", 2.0, "X", 10), tile("B", -1.0, "X", 20), tile("C", 0.0, "X", 30)]
+    totals = sector_totals(tiles, {"A": 300.0, "B": 100.0})
+    assert totals == {"count": 3, "volume": 60, "market_cap": 400.0, "change": 1.25,
+                      "advances": 1, "declines": 1, "unchanged": 1}
+    assert sector_totals(tiles, {})["change"] == 0.33  # no market caps: plain mean
+
+
+class Tiles:
+    def __init__(self, tiles):
+        self.tiles = {t["symbol"]: t for t in tiles}
+        self.calls = []
+
+    def __call__(self, symbols):
+        self.calls.append(list(symbols))
+        return [self.tiles[s] for s in symbols if s in self.tiles]
+
+
+def test_sectors_reused_for_the_same_data_and_members():
+    builder = TreemapBuilder()
+    sectors = {"A": "IT", "B": "IT", "C": "FINANCE"}
+    caps = {"A": 1.0, "B": 1.0, "C": 2.0}
+    make_tiles = Tiles([tile("A", 1.0, "IT"), tile("B", 3.0, "IT"), tile("C", -1.0, "FINANCE")])
+    first = builder.build(1, "IDX", ["A", "B", "C"], sectors, {}, caps, make_tiles)
+    assert [node["name"] for node in first["children"]] == ["FINANCE", "IT"]
+    assert first["children"][1]["change"] == 2.0
+    assert (first["count"], first["advances"], first["declines"], first["change"]) == (3, 2, 1, 0.5)
+    assert make_tiles.calls == [["C", "A", "B"]]
+
+    # Another view of the same snapshot sharing IT: no tiles computed
+    other = builder.build(1, "IDX2", ["A", "B"], sectors, {}, caps, make_tiles)
+    assert other["children"][0] is first["children"][1] and len(make_tiles.calls) == 1
+    # A constituents change in FINANCE recomputes FINANCE only
+    builder.build(1, "IDX", ["A", "B", "C"], sectors, {}, dict(caps, C=3.0), make_tiles)
+    assert make_tiles.calls[-1] == ["C"]
+    # New data (snapshot version), or data that may change (None), recomputes every sector
+    builder.build(2, "IDX", ["A", "B", "C"], sectors, {}, caps, make_tiles)
+    builder.build(None, "IDX", ["A", "B", "C"], sectors, {}, caps, make_tiles)
+    builder.build(None, "IDX", ["A", "B", "C"], sectors, {}, caps, make_tiles)
+    assert make_tiles.calls[-3:] == [["C", "A", "B"]] * 3
+    assert builder.stats() == {"builds": 6, "sectors_computed": 9, "sectors_reused": 2, "sectors": 5}
+
+
+def test_index_change_uses_unrounded_sector_sums():
+    builder = TreemapBuilder()
+    make_tiles = Tiles([tile("A", 0.0049, "IT"), tile("B", 0.0149, "FINANCE")])
+    tree = builder.build(1, "IDX", ["A", "B"], {"A": "IT", "B": "FINANCE"}, {}, {"A": 3.0, "B": 1.0}, make_tiles)
+    assert [node["change"] for node in tree["children"]] == [0.01, 0.0]
+    # (0.0049 * 3 + 0.0149) / 4 = 0.0074; from the rounded sector changes it would be 0.0025
+    assert tree["change"] == 0.01
+
+
+def test_treemap_endpoint(app, client, tmp_path):
+    path = tmp_path / "c.json"
+    path.write_text(json.dumps({"indices": {"IDX": ["A", "B", "C"], "IDX2": ["A", "B"]}, "symbols": {
+        "A": {"name": "Alpha", "sector": "IT", "market_cap": 300},
+        "B": {"name": "Beta", "sector": "IT", "market_cap": 100},
+        "C": {"name": "Gamma", "sector": "FINANCE"},
+    }}))
+    app.config['CONSTITUENTS_FILE'] = str(path)
+    today = market_today().strftime('%Y-%m-%d')
+    store = get_snapshot_store(app)
+    store.publish(today, make_frame({"A": 102.0, "B": 99.0, "C": 100.0}))
+
+    resp = client.get('/api/treemap?index=IDX')
+    assert resp.status_code == 200
+    body = resp.get_json()
+    assert body["version"] == f"{store.epoch}-1"
+    tree = body["tree"]
+    assert (tree["name"], tree["count"], tree["volume"], tree["advances"], tree["declines"]) == ("IDX", 3, 3000, 1, 1)
+    finance, it = tree["children"]
+    assert finance["change"] == 0.0 and finance["market_cap"] == 0
+    assert it["change"] == 1.25 and it["market_cap"] == 400
+    assert [leaf["name"] for leaf in it["children"]] == ["A", "B"]
+    assert it["children"][0]["label"] == "Alpha" and it["children"][0]["market_cap"] == 300
+
+    store.publish(today, make_frame({"A": 102.0, "B": 99.0, "C": 103.0}))
+    tree = client.get('/api/treemap?index=IDX').get_json()["tree"]
+    assert tree["children"][0]["change"] == 3.0
+    # IDX2's only sector has the same members as IDX's IT: reused for this snapshot
+    it = client.get('/api/treemap?index=IDX2').get_json()["tree"]["children"][0]
+    assert (it["name"], it["change"]) == ("IT", 1.25)
+    stats = client.get('/api/cache-stats').get_json()["treemap"]
+    assert stats["sectors_computed"] == 4 and stats["sectors_reused"] == 1
+
+    assert client.get('/api/treemap').status_code == 400
+    assert client.get('/api/treemap?index=SENSEX').status_code == 400
+    assert client.get('/api/treemap?index=IDX&date=2024-13-01').status_code == 400
+    assert client.get('/api/treemap?index=IDX&index=IDX').status_code == 400
@@ -0,0 +1,210 @@
+"""
+Tests for the resilient upstream client (app/upstream.py) and its use by the yfinance provider.
+Covers: retries against a local fake HTTP server, token bucket, circuit breaker trips and
+half-open recovery, last-known-good results while open, yfinance throttling, observability.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+import pandas as pd
+import pytest
+import yfinance as yf
+from app import create_app
+from app.providers import YFinanceProvider, is_missing_data_error
+from app.upstream import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError, TokenBucket, UpstreamClient, UpstreamError
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def server():
+    """Local HTTP server answering with the next status of `server.statuses` (then 200)."""
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            httpd.hits += 1
+            status = httpd.statuses.pop(0) if httpd.statuses else 200
+            self.send_response(status)
+            if status == 429:
+                self.send_header("Retry-After", "1")
+            self.end_headers()
+            self.wfile.write(b"ok")
+
+        def log_message(self, *args):
+            pass
+
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    httpd.statuses, httpd.hits = [], 0
+    httpd.url = f"http://127.0.0.1:{httpd.server_address[1]}/quote"
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_retries_transient_statuses_with_backoff(server):
+    delays = []
+    client = UpstreamClient(retries=3, backoff=0.1, sleep=delays.append)
+    server.statuses = [503, 429]
+    assert client.get(server.url).text == "ok"
+    assert server.hits == 3
+    assert 0 <= delays[0] <= 0.1 and delays[1] == 1.0  # jittered, then the server's Retry-After
+    assert client.stats()["retries"] == 2 and client.breaker.state == CLOSED
+
+    server.statuses = [404]
+    with pytest.raises(UpstreamError) as raised:
+        client.get(server.url)
+    assert raised.value.status == 404 and server.hits == 4  # client errors are not retried
+
+
+def test_breaker_fails_fast_then_recovers(server):
+    clock = FakeClock()
+    client = UpstreamClient(breaker=CircuitBreaker(failure_threshold=2, reset_timeout=30, clock=clock),
+                            retries=1, sleep=lambda s: None)
+    server.statuses = [500] * 4
+    for _ in range(2):
+        with pytest.raises(UpstreamError):
+            client.get(server.url)
+    assert client.breaker.state == OPEN and server.hits == 4
+    with pytest.raises(CircuitOpenError):
+        client.get(server.url)
+    assert server.hits == 4  # no request while open
+
+    clock.now += 30
+    assert client.breaker.state == HALF_OPEN
+    assert client.get(server.url).status_code == 200
+    stats = client.stats()
+    assert stats["breaker"] == {"state": CLOSED, "consecutive_failures": 0, "trips": 1, "rejected": 1}
+
+
+def test_half_open_trial_failure_reopens():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=clock)
+    breaker.record_failure()
+    clock.now += 10
+    assert breaker.allow() and not breaker.allow()  # one trial call at a time
+    breaker.record_failure()
+    assert breaker.state == OPEN and breaker.stats()["trips"] == 2
+
+
+def test_open_breaker_serves_last_known_good():
+    client = UpstreamClient(session=object(), breaker=CircuitBreaker(failure_threshold=1), retries=0)
+    assert client.call(lambda: "quotes", key="nifty") == "quotes"
+
+    def down():
+        raise ConnectionError("upstream down")
+
+    with pytest.raises(ConnectionError):
+        client.call(down, key="nifty")
+    assert client.call(down, key="nifty") == "quotes"
+    with pytest.raises(CircuitOpenError):
+        client.call(down, key="banknifty")
+    assert client.stats()["served_stale"] == 1
+
+
+def test_empty_results_do_not_replace_last_known_good():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=clock)
+    client = UpstreamClient(session=object(), breaker=breaker, retries=0)
+    quotes = pd.DataFrame({"Close": [101.0]})
+    assert client.call(lambda: quotes, key="nifty") is quotes
+
+    def down():
+        raise ConnectionError("upstream down")
+
+    with pytest.raises(ConnectionError):
+        client.call(down, key="nifty")
+    clock.now += 10
+    # The half-open trial gets an empty answer: not a recovery, and the real data is kept
+    assert client.call(pd.DataFrame, key="nifty").empty
+    assert breaker.stats()["consecutive_failures"] == 1
+    with pytest.raises(ConnectionError):
+        client.call(down, key="nifty")
+    assert client.call(down, key="nifty") is quotes
+    assert client.stats()["last_good"] == 1
+
+
+def test_token_bucket_limits_rate():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=2, burst=2, clock=clock, sleep=clock.sleep)
+    waits = [bucket.acquire() for _ in range(4)]
+    assert waits == [0.0, 0.0, 0.5, 0.5] and clock.now == 1.0
+    with pytest.raises(UpstreamError):
+        bucket.acquire(max_wait=0.1)
+    clock.now += 0.5
+    assert bucket.acquire(max_wait=0.1) == 0.0  # the refused call did not use up a token
+
+
+def test_yfinance_throttling_is_retried_then_trips_breaker():
+    client = UpstreamClient(session=object(), breaker=CircuitBreaker(failure_threshold=1), retries=2,
+                            sleep=lambda s: None)
+    provider = YFinanceProvider(client=client)
+    assert provider.session is client.session
+
+    def throttled(*args, **kwargs):
+        yf.shared._ERRORS = {"INFY.NS": "YFRateLimitError('Too Many Requests. Rate limited. Try after a while.')"}
+        return pd.DataFrame()
+
+    with patch('yfinance.download', side_effect=throttled) as download:
+        with pytest.raises(UpstreamError):
+            provider.download(["INFY.NS"], "2024-04-01", "2024-04-02")
+        with pytest.raises(CircuitOpenError):
+            provider.download(["INFY.NS"], "2024-04-01", "2024-04-02")
+    assert download.call_count == 3
+    assert all(call.kwargs["session"] is client.session for call in download.call_args_list)
+
+
+def test_yfinance_connection_failures_are_upstream_errors():
+    client = UpstreamClient(session=object(), breaker=CircuitBreaker(failure_threshold=1), retries=1,
+                            timeout=3, sleep=lambda s: None)
+    provider = YFinanceProvider(client=client)
+
+    def answer(errors):
+        def download(*args, **kwargs):
+            yf.shared._ERRORS = dict(errors)
+            return pd.DataFrame()
+        return download
+
+    # Yahoo answered that there is no data: an empty result, not an outage
+    no_data = {"INFY.NS": "YFPricesMissingError('$INFY.NS: possibly delisted; no price data found')"}
+    with patch('yfinance.download', side_effect=answer(no_data)) as download:
+        assert provider.download(["INFY.NS"], "2024-04-06", "2024-04-07").empty
+    assert download.call_args.kwargs["timeout"] == 3 and client.breaker.state == CLOSED
+
+    # A rejected range is a bug in the request, not a day without prices
+    assert not is_missing_data_error("YFInvalidPeriodError('INFY.NS: Period 1d is invalid')")
+
+    offline = {"INFY.NS": "ConnectionError(MaxRetryError('Failed to resolve query1.finance.yahoo.com'))",
+               "TCS.NS": "ConnectionError(MaxRetryError('Failed to resolve query1.finance.yahoo.com'))"}
+    with patch('yfinance.download', side_effect=answer(offline)) as download:
+        with pytest.raises(UpstreamError) as raised:
+            provider.download(["INFY.NS", "TCS.NS"], "2024-04-01", "2024-04-02")
+        assert raised.value.retryable and "ConnectionError" in str(raised.value)
+        with pytest.raises(CircuitOpenError):
+            provider.download(["INFY.NS", "TCS.NS"], "2024-04-01", "2024-04-02")
+    assert download.call_count == 2 and client.stats()["breaker"]["trips"] == 1
+
+
+def test_upstream_state_is_observable():
+    app = create_app()
+    with patch('yfinance.download', return_value=pd.DataFrame()):
+        client = app.test_client()
+        stats = client.get('/api/cache-stats').get_json()["upstream"]
+        assert stats["breaker"]["state"] == CLOSED and stats["bucket"]["rate"] == 2.0
+        text = client.get('/api/metrics').get_data(as_text=True)
+    assert "nseviz_upstream_breaker_state 0" in text
+    assert "nseviz_upstream_breaker_trips_total 0" in text
@@ -0,0 +1,98 @@
+"""
+Tests for compact wire formats (app/wire.py) via /api/heatmap-data?format=.
+Covers: columnar round trip, dictionary encoding, payload size, msgpack typed columns (skipped
+without the msgpack package), validation.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import json
+import numpy as np
+import pytest
+from app import wire
+from app.providers import FrameProvider
+from app.wire import columnar_payload
+from conftest import make_frame
+
+SYMBOLS = [f"SYM{i:03d}" for i in range(500)]
+
+
+def tiles_from(payload):
+    """Client-side decode of a columnar payload back to tiles."""
+    columns, dictionaries = payload["columns"], payload["dictionaries"]
+    return [
+        {
+            "symbol": columns["symbol"][i],
+            "name": dictionaries["name"][columns["name"][i]],
+            "price": columns["price"][i],
+            "change": columns["change"][i],
+            "volume": columns["volume"][i],
+            "sector": dictionaries["sector"][columns["sector"][i]],
+        }
+        for i in range(payload["count"])
+    ]
+
+
+@pytest.fixture
+def client(app, tmp_path):
+    path = tmp_path / "c.json"
+    path.write_text(json.dumps({"indices": {"BIG": SYMBOLS}, "symbols": {
+        symbol: {"name": f"Company {i}", "sector": ["FINANCE", "IT", "ENERGY"][i % 3]}
+        for i, symbol in enumerate(SYMBOLS)}}))
+    app.config['CONSTITUENTS_FILE'] = str(path)
+    rng = np.random.default_rng(0)
+    closes, volumes = {}, {}
+    for symbol in SYMBOLS:
+        closes[symbol] = round(100 + rng.normal(0, 2), 2)
+        volumes[symbol] = int(rng.integers(1, 10**7))
+    app.extensions['market_data_provider'] = FrameProvider(make_frame(closes, volumes=volumes))
+    return app.test_client()
+
+
+def test_columnar_dictionary_encoding():
+    payload = {"index": "X", "data": [
+        {"symbol": "A", "name": "Alpha", "price": 1.0, "change": 0.5, "volume": 10, "sector": "IT"},
+        {"symbol": "B", "name": "Beta", "price": 2.0, "change": -0.5, "volume": 20, "sector": "IT"},
+    ]}
+    columnar = columnar_payload(payload)
+    assert columnar["columns"]["sector"] == [0, 0] and columnar["dictionaries"]["sector"] == ["IT"]
+    assert "data" not in columnar and columnar["index"] == "X" and columnar["count"] == 2
+    assert tiles_from(columnar) == payload["data"]
+
+
+def test_columnar_endpoint_round_trips_and_shrinks(client):
+    url = '/api/heatmap-data?index=BIG&date=2024-04-01'
+    rows = client.get(url, headers={"Accept-Encoding": "identity"})
+    cols = client.get(f'{url}&format=columnar', headers={"Accept-Encoding": "identity"})
+    body = cols.get_json()
+    assert body["format"] == "columnar" and body["note"] == "Records returned: 500"
+    assert tiles_from(body) == rows.get_json()["data"]
+    assert len(cols.data) < 0.6 * len(rows.data)
+    assert cols.headers["ETag"] != rows.headers["ETag"]
+    # Repeated requests for a format are served from the cache
+    assert client.get(f'{url}&format=columnar', headers={"If-None-Match": cols.headers["ETag"],
+                                                         "Accept-Encoding": "identity"}).status_code == 304
+
+
+def test_invalid_format(client):
+    assert client.get('/api/heatmap-data?index=BIG&format=xml').status_code == 400
+    assert client.get('/api/heatmap-data?index=BIG&format=json&format=columnar').status_code == 400
+
+
+def test_msgpack_needs_its_package(client, monkeypatch):
+    monkeypatch.setattr(wire, "msgpack", None)
+    assert client.get('/api/heatmap-data?index=BIG&format=msgpack').status_code == 400
+
+
+def test_msgpack_typed_columns(client):
+    msgpack = pytest.importorskip("msgpack")
+    url = '/api/heatmap-data?index=BIG&date=2024-04-01'
+    resp = client.get(f'{url}&format=msgpack', headers={"Accept-Encoding": "identity"})
+    assert resp.mimetype == "application/x-msgpack"
+    body = msgpack.unpackb(resp.data, raw=False)
+    columns = {name: np.frombuffer(body["columns"][name], dtype=dtype) for name, dtype in body["types"].items()}
+    expected = client.get(url).get_json()["data"]
+    assert columns["price"].tolist() == [tile["price"] for tile in expected]
+    assert columns["volume"].tolist() == [tile["volume"] for tile in expected]
+    assert [body["dictionaries"]["sector"][c] for c in columns["sector"]] == [t["sector"] for t in expected]